@@ -3,19 +3,40 @@ import logging
 
 from homeassistant.components import bluetooth
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
-
-from .const import DOMAIN
-from .coordinator import HTRAMDataUpdateCoordinator
-
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.SWITCH, Platform.NUMBER, Platform.SELECT, Platform.BUTTON]
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .const import (
+    DOMAIN,
+    CONF_FLEET,
+    DATA_FLEET,
+    SIGNAL_COORDINATOR_ADDED,
+    SIGNAL_COORDINATOR_REMOVED,
+)
+from .coordinator import HTRAMDataUpdateCoordinator, async_disconnect_parked_client, async_remove_buckets
+from .fleet import HTRAMFleet
+from .pending import PendingWrites
+from .services import async_setup_services, async_unload_services
+
+PLATFORMS: list[Platform] = [
+    Platform.SENSOR,
+    Platform.BINARY_SENSOR,
+    Platform.SWITCH,
+    Platform.NUMBER,
+    Platform.SELECT,
+    Platform.BUTTON,
+]
+FLEET_PLATFORMS: list[Platform] = [Platform.SENSOR]
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up HTRAM from a config entry."""
+    if entry.data.get(CONF_FLEET):
+        return await _async_setup_fleet(hass, entry)
+
     address = entry.unique_id
     assert address is not None
 
@@ -23,64 +44,76 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if not ble_device:
         raise ConfigEntryNotReady(f"Could not find HTRAM device with address {address}")
 
-    coordinator = HTRAMDataUpdateCoordinator(hass, ble_device)
-    await coordinator.async_config_entry_first_refresh()
+    coordinator = HTRAMDataUpdateCoordinator(hass, ble_device, entry)
+    # Setting changes queued before a restart go out with the first refresh
+    await coordinator.async_load_pending()
+    await coordinator.async_load_buckets()
+    # Start before the first refresh so the initial connection is captured too
+    await coordinator.async_start_capture()
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except ConfigEntryNotReady:
+        # Do not leave a (possibly taken over) connection behind between retries
+        await coordinator.async_shutdown()
+        raise
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
-
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Register Service
-    async def handle_configure_device(call):
-        """Handle the service call."""
-        ssid = call.data.get("ssid")
-        password = call.data.get("password")
-        mqtt_server = call.data.get("mqtt_server")
-        aes_key = call.data.get("aes_key")
-        aes_iv = call.data.get("aes_iv")
-
-        # Find the coordinator. In a real scenario, user should target a device/entity.
-        # But for now, we'll try to find the coordinator associated with the service call context
-        # or just pick the first one if global? Service calls usually target an entity.
-        # Let's assume the user targets an entity or device, but standard HA service calls need target resolution.
-        # Simplification: We iterate over all loaded coordinators and apply to all? 
-        # Or better: Require device_id/entity_id?
-        # Standard approach: register service at platform level or use helper to get coordinator.
-        
-        # For this custom component, let's iterate all entries for now (assuming 1 device usually)
-        # or rely on the user to pick the right one if we implemented entity services.
-        # But we are registering a DOMAIN service.
-        
-        for entry_id, coord in hass.data[DOMAIN].items():
-            if mqtt_server and aes_key and aes_iv:
-                await coord.async_provision_mqtt(mqtt_server, aes_key, aes_iv)
-                # Small delay between commands
-                await asyncio.sleep(1)
-            
-            if ssid and password:
-                await coord.async_provision_wifi(ssid, password)
-
-    import voluptuous as vol
-    from homeassistant.helpers import config_validation as cv
-
-    SERVICE_SCHEMA = vol.Schema({
-        vol.Optional("ssid"): cv.string,
-        vol.Optional("password"): cv.string,
-        vol.Optional("mqtt_server"): cv.string,
-        vol.Optional("aes_key"): cv.string,
-        vol.Optional("aes_iv"): cv.string,
-    })
-
-    hass.services.async_register(DOMAIN, "configure_device", handle_configure_device, schema=SERVICE_SCHEMA)
+    await coordinator.async_start_mqtt_ingest()
+    entry.async_on_unload(coordinator.async_stop_mqtt_ingest)
+    entry.async_on_unload(coordinator.async_register_advertisement_callback())
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, coordinator.async_handle_stop)
+    )
+
+    # Options are read by the coordinator at creation, so apply changes with a reload
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    async_setup_services(hass)
 
+    async_dispatcher_send(hass, SIGNAL_COORDINATOR_ADDED, coordinator)
+
+    return True
+
+async def _async_setup_fleet(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up the fleet aggregate device."""
+    # Kept outside hass.data[DOMAIN], which only holds device coordinators
+    fleet = hass.data[DATA_FLEET] = HTRAMFleet(hass)
+    fleet.async_start()
+    await hass.config_entries.async_forward_entry_setups(entry, FLEET_PLATFORMS)
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when options change."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    # Data updates (e.g. stored MQTT credentials) are applied live by the coordinator
+    if dict(entry.options) != coordinator.options:
+        await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
+    if entry.data.get(CONF_FLEET):
+        if unload_ok := await hass.config_entries.async_unload_platforms(entry, FLEET_PLATFORMS):
+            hass.data.pop(DATA_FLEET).async_stop()
+        return unload_ok
+
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        async_dispatcher_send(hass, SIGNAL_COORDINATOR_REMOVED, coordinator)
+        # On a reload the next coordinator takes over the live connection
+        await coordinator.async_shutdown(handover=not hass.is_stopping)
+
+        if not hass.data[DOMAIN]:
+            async_unload_services(hass)
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Close a connection parked at unload and drop stored state when the entry is removed."""
+    if entry.unique_id and not entry.data.get(CONF_FLEET):
+        await async_disconnect_parked_client(hass, entry.unique_id.upper())
+        await PendingWrites(hass, entry.unique_id.upper()).async_remove()
+        await async_remove_buckets(hass, entry.unique_id.upper())
@@ -1,15 +1,36 @@
 """Binary Sensor platform for HTRAM."""
+from collections.abc import Callable
+from dataclasses import dataclass
+
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
     BinarySensorEntity,
+    BinarySensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import HTRAMDataUpdateCoordinator
+from .entity import HTRAMEntity
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTRAMBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Describes a HTRAM binary sensor."""
+
+    value_fn: Callable[[dict], bool]
+
+
+BINARY_SENSORS: tuple[HTRAMBinarySensorEntityDescription, ...] = (
+    HTRAMBinarySensorEntityDescription(
+        key="charging",
+        translation_key="charging",
+        device_class=BinarySensorDeviceClass.BATTERY_CHARGING,
+        value_fn=lambda data: data.get("charging", False),
+    ),
+)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -18,22 +39,14 @@ async def async_setup_entry(
 ) -> None:
     """Set up the binary sensor platform."""
     coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([HTRAMChargingSensor(coordinator)])
+    async_add_entities(HTRAMBinarySensor(coordinator, description) for description in BINARY_SENSORS)
 
-class HTRAMChargingSensor(CoordinatorEntity, BinarySensorEntity):
-    """Representation of HTRAM Charging Status."""
+class HTRAMBinarySensor(HTRAMEntity, BinarySensorEntity):
+    """Representation of a HTRAM binary sensor."""
 
-    def __init__(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_name = "HTRAM Charging"
-        self._attr_unique_id = f"{coordinator.address}_charging"
-        self._attr_device_class = BinarySensorDeviceClass.BATTERY_CHARGING
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-        }
+    entity_description: HTRAMBinarySensorEntityDescription
 
     @property
     def is_on(self) -> bool:
         """Return true if the binary sensor is on."""
-        return self.coordinator.data.get("charging", False)
+        return self.entity_description.value_fn(self.coordinator.data)
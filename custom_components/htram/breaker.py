@@ -0,0 +1,72 @@
+"""Backoff and circuit breaker for connection attempts to unreachable devices."""
+from __future__ import annotations
+
+import random
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+BREAKER_STATES = [BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN]
+
+
+class CircuitBreaker:
+    """Decide when the next connection attempt to a device may be made.
+
+    Failures back off exponentially with jitter. After ``failure_threshold``
+    consecutive failures the breaker opens and only allows a half-open probe
+    every ``open_interval`` seconds, or sooner when ``probe`` is called
+    because the device was seen advertising. A successful attempt closes it.
+    """
+
+    def __init__(
+        self,
+        base_delay: float,
+        max_delay: float,
+        failure_threshold: int,
+        open_interval: float,
+    ) -> None:
+        """Initialize the breaker."""
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.open_interval = open_interval
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.next_attempt_at = 0.0
+
+    def allow(self, now: float) -> bool:
+        """Return True if a connection attempt may be made now."""
+        if now < self.next_attempt_at:
+            return False
+        if self.state == BREAKER_OPEN:
+            self.state = BREAKER_HALF_OPEN
+        return True
+
+    def probe(self) -> bool:
+        """Allow an immediate half-open attempt; return True if the breaker was open."""
+        if self.state != BREAKER_OPEN:
+            return False
+        self.state = BREAKER_HALF_OPEN
+        self.next_attempt_at = 0.0
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful attempt."""
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.next_attempt_at = 0.0
+
+    def record_failure(self, now: float) -> None:
+        """Back off after a failed attempt, opening the breaker if needed."""
+        self.failures += 1
+        if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = BREAKER_OPEN
+            delay = self.open_interval
+        else:
+            delay = min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+        # Jitter keeps devices that failed together from retrying in lockstep
+        self.next_attempt_at = now + delay * random.uniform(0.5, 1.0)
+
+    def time_until_next_attempt(self, now: float) -> float:
+        """Return seconds until the next attempt is allowed."""
+        return max(0.0, self.next_attempt_at - now)
@@ -0,0 +1,135 @@
+"""Time bucket aggregation of HTRAM readings for statistics import."""
+from __future__ import annotations
+
+from dataclasses import astuple, dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+
+@dataclass(slots=True)
+class Aggregate:
+    """Mean, minimum and maximum of the values added so far."""
+
+    total: float = 0.0
+    low: float = 0.0
+    high: float = 0.0
+    samples: int = 0
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+        if self.samples == 0:
+            self.low = self.high = value
+        else:
+            self.low = min(self.low, value)
+            self.high = max(self.high, value)
+        self.total += value
+        self.samples += 1
+
+    def merge(self, other: Aggregate) -> None:
+        """Add all values of another aggregate."""
+        if other.samples == 0:
+            return
+        if self.samples == 0:
+            self.low, self.high = other.low, other.high
+        else:
+            self.low = min(self.low, other.low)
+            self.high = max(self.high, other.high)
+        self.total += other.total
+        self.samples += other.samples
+
+    def row(self, start: datetime) -> dict:
+        """Return the aggregate as a statistics row."""
+        return {"start": start, "mean": self.total / self.samples, "min": self.low, "max": self.high}
+
+
+class BucketAggregator:
+    """Aggregate readings into fixed buckets and roll the buckets up into hours.
+
+    Only the open bucket and the open hour are kept. A bucket is closed by the
+    first reading after its end; closed buckets are folded into their hour,
+    and every completed hour is returned once for import, as the recorder only
+    accepts hourly external statistics. The open bucket and hour are stored
+    across reloads rather than imported early, since a later import of the
+    same hour would replace the partial row.
+    """
+
+    def __init__(self, bucket: timedelta) -> None:
+        """Initialize the aggregator."""
+        self.bucket = bucket
+        self._bucket_start: datetime | None = None
+        self._bucket: dict[str, Aggregate] = {}
+        self._hour_start: datetime | None = None
+        self._hour: dict[str, Aggregate] = {}
+        self._completed: dict[str, list[dict]] = {}
+        # The most recently closed bucket per quantity
+        self.last_bucket: dict[str, dict] = {}
+
+    def _start_of(self, when: datetime) -> datetime:
+        """Return the start of the bucket containing ``when``."""
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        return hour + (when - hour) // self.bucket * self.bucket
+
+    def add(self, when: datetime, values: dict[str, float]) -> bool:
+        """Add a reading taken at ``when`` (UTC). Return True if a bucket was closed."""
+        start = self._start_of(when)
+        closed = False
+        if self._bucket_start is not None and start != self._bucket_start:
+            self._close_bucket()
+            closed = True
+        if self._bucket_start is None:
+            self._bucket_start = start
+
+        for quantity, value in values.items():
+            if value is not None:
+                self._bucket.setdefault(quantity, Aggregate()).add(value)
+        return closed
+
+    def _close_bucket(self) -> None:
+        """Fold the open bucket into its hour."""
+        hour = self._bucket_start.replace(minute=0)
+        if self._hour_start is not None and hour != self._hour_start:
+            self._close_hour()
+        self._hour_start = hour
+
+        self.last_bucket = {}
+        for quantity, aggregate in self._bucket.items():
+            self._hour.setdefault(quantity, Aggregate()).merge(aggregate)
+            self.last_bucket[quantity] = aggregate.row(self._bucket_start)
+        self._bucket = {}
+        self._bucket_start = None
+
+    def _close_hour(self) -> None:
+        """Move the open hour to the completed rows."""
+        for quantity, aggregate in self._hour.items():
+            self._completed.setdefault(quantity, []).append(aggregate.row(self._hour_start))
+        self._hour = {}
+        self._hour_start = None
+
+    def pop_completed(self) -> dict[str, list[dict]]:
+        """Return the hours completed since the last call."""
+        completed, self._completed = self._completed, {}
+        return completed
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the open bucket and hour for storage."""
+        return {
+            "bucket_start": _isoformat(self._bucket_start),
+            "bucket": {quantity: list(astuple(aggregate)) for quantity, aggregate in self._bucket.items()},
+            "hour_start": _isoformat(self._hour_start),
+            "hour": {quantity: list(astuple(aggregate)) for quantity, aggregate in self._hour.items()},
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Continue the open bucket and hour stored by ``as_dict``."""
+        self._bucket_start = _fromisoformat(data["bucket_start"])
+        self._bucket = {quantity: Aggregate(*values) for quantity, values in data["bucket"].items()}
+        self._hour_start = _fromisoformat(data["hour_start"])
+        self._hour = {quantity: Aggregate(*values) for quantity, values in data["hour"].items()}
+
+
+def _isoformat(when: datetime | None) -> str | None:
+    return None if when is None else when.isoformat()
+
+
+def _fromisoformat(when: str | None) -> datetime | None:
+    return None if when is None else datetime.fromisoformat(when)
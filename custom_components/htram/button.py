@@ -1,12 +1,32 @@
 """Button platform for HTRAM."""
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.components.button import ButtonEntity
+from homeassistant.components.button import ButtonEntity, ButtonEntityDescription
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import HTRAMDataUpdateCoordinator
+from .entity import HTRAMEntity
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTRAMButtonEntityDescription(ButtonEntityDescription):
+    """Describes a HTRAM button."""
+
+    press_fn: Callable[[HTRAMDataUpdateCoordinator], Awaitable[None]]
+
+
+BUTTONS: tuple[HTRAMButtonEntityDescription, ...] = (
+    HTRAMButtonEntityDescription(
+        key="sync_time",
+        translation_key="sync_time",
+        icon="mdi:clock-sync",
+        press_fn=lambda coordinator: coordinator.async_sync_time(),
+    ),
+)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -15,22 +35,13 @@ async def async_setup_entry(
 ) -> None:
     """Set up the button platform."""
     coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([HTRAMSyncTimeButton(coordinator)])
-
-class HTRAMSyncTimeButton(CoordinatorEntity, ButtonEntity):
-    """Representation of HTRAM Time Sync Button."""
-
-    def __init__(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_has_entity_name = True
-        self._attr_translation_key = "sync_time"
-        self._attr_unique_id = f"{coordinator.address}_sync_time"
-        self._attr_icon = "mdi:clock-sync"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-        }
+    async_add_entities(HTRAMButton(coordinator, description) for description in BUTTONS)
+
+class HTRAMButton(HTRAMEntity, ButtonEntity):
+    """Representation of a HTRAM button."""
+
+    entity_description: HTRAMButtonEntityDescription
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        await self.coordinator.async_sync_time()
+        await self.entity_description.press_fn(self.coordinator)
@@ -0,0 +1,225 @@
+"""Append-only binary capture of raw HTRAM traffic.
+
+A capture file starts with a fixed header followed by length-prefixed
+records::
+
+    header  <4s B B 6s Q 4x>  magic "HTRC", version, reserved, device MAC,
+                              wall clock start time (ns since the epoch)
+    record  <H Q B> + bytes   payload length, monotonic timestamp (ns),
+                              direction, raw frame bytes
+
+All integers are little endian. Timestamps are monotonic so intervals are
+exact; the header start time anchors them to the wall clock together with
+the timestamp of the first record.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import RESPONSE_REALTIME
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"HTRC"
+VERSION = 1
+HEADER = struct.Struct("<4sBB6sQ4x")
+RECORD = struct.Struct("<HQB")
+
+# Record directions
+DIRECTION_RX = 0  # BLE notification
+DIRECTION_TX = 1  # BLE write
+DIRECTION_MQTT = 2  # decrypted MQTT payload
+DIRECTION_CONNECT = 3  # connection established (empty payload)
+DIRECTION_DISCONNECT = 4  # connection lost or closed (empty payload)
+
+# Buffered records are written out once this much has accumulated
+FLUSH_SIZE = 64 * 1024
+
+
+@dataclass(slots=True)
+class CaptureHeader:
+    """Header of a capture file."""
+
+    address: str
+    started_ns: int
+    version: int = VERSION
+
+
+class CaptureWriter:
+    """Record frames of one device into a capture file.
+
+    ``record`` only appends to an in-memory buffer so it is safe to call from
+    the notification handler; the buffer is written in the executor once it
+    is large enough, on ``async_flush`` and on ``async_close``.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str, address: str, max_bytes: int) -> None:
+        """Initialize the writer."""
+        self.hass = hass
+        self.path = path
+        self.address = address
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._file = None
+        self._buffer = bytearray()
+        self._flushing = False
+        # Set once the file is being closed; later records are dropped
+        self._closing = False
+
+    async def async_open(self) -> None:
+        """Create the file and write the header."""
+        header = HEADER.pack(MAGIC, VERSION, 0, bytes.fromhex(self.address.replace(":", "")), time.time_ns())
+        self._file = await self.hass.async_add_executor_job(self._open, header)
+        self.size = len(header)
+        _LOGGER.info(f"Capturing traffic of {self.address} to {self.path}")
+
+    def _open(self, header: bytes):
+        """Open the file for appending (in the executor)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        file = open(self.path, "ab")
+        file.write(header)
+        return file
+
+    def record(self, direction: int, data: bytes = b"") -> None:
+        """Append a record."""
+        if self._file is None or self._closing:
+            return
+        if self.size + RECORD.size + len(data) > self.max_bytes:
+            _LOGGER.warning(f"Capture {self.path} reached {self.max_bytes} bytes, stopping")
+            self._closing = True
+            self.hass.async_create_task(self._async_close())
+            return
+        self._buffer += RECORD.pack(len(data), time.monotonic_ns(), direction)
+        self._buffer += data
+        self.size += RECORD.size + len(data)
+        if len(self._buffer) >= FLUSH_SIZE and not self._flushing:
+            self.hass.async_create_task(self.async_flush())
+
+    async def async_flush(self) -> None:
+        """Write buffered records to the file."""
+        if self._flushing or self._file is None or not self._buffer:
+            return
+        # One write at a time keeps the records in order
+        self._flushing = True
+        try:
+            while self._buffer and self._file is not None:
+                chunk, self._buffer = bytes(self._buffer), bytearray()
+                await self.hass.async_add_executor_job(self._write, self._file, chunk)
+        finally:
+            self._flushing = False
+
+    @staticmethod
+    def _write(file, chunk: bytes) -> None:
+        """Write a chunk and hand it to the OS (in the executor)."""
+        file.write(chunk)
+        file.flush()
+
+    async def async_close(self) -> None:
+        """Flush and close the file, unless that is already under way."""
+        if self._file is None or self._closing:
+            return
+        self._closing = True
+        await self._async_close()
+
+    async def _async_close(self) -> None:
+        """Flush and close the file."""
+        await self.async_flush()
+        file, self._file = self._file, None
+        await self.hass.async_add_executor_job(file.close)
+
+
+class CaptureReader:
+    """Read a capture file through a memory map."""
+
+    def __init__(self, path: str) -> None:
+        """Map the file and parse its header."""
+        with open(path, "rb") as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, mac, started_ns = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} HTRAM capture")
+        self.header = CaptureHeader(":".join(f"{byte:02X}" for byte in mac), started_ns, version)
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._mm.close()
+
+    def __enter__(self) -> CaptureReader:
+        """Enter the context."""
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        """Unmap on exit."""
+        self.close()
+
+    def index(self) -> tuple[list[int], list[int], list[int], list[int]]:
+        """Return payload offsets, lengths, timestamps and directions of all records.
+
+        A truncated last record (e.g. after a crash) is ignored. This stays a
+        Python loop: records have variable length, so each offset depends on
+        all lengths before it and can not be computed in one NumPy step.
+        """
+        mm = self._mm
+        end = len(mm)
+        offsets, lengths, timestamps, directions = [], [], [], []
+        offset = HEADER.size
+        unpack = RECORD.unpack_from
+        while offset + RECORD.size <= end:
+            length, timestamp, direction = unpack(mm, offset)
+            offset += RECORD.size
+            if offset + length > end:
+                break
+            offsets.append(offset)
+            lengths.append(length)
+            timestamps.append(timestamp)
+            directions.append(direction)
+            offset += length
+        return offsets, lengths, timestamps, directions
+
+    def records(self) -> Iterator[tuple[int, int, bytes]]:
+        """Yield ``(timestamp_ns, direction, payload)`` for every record."""
+        mm = self._mm
+        for offset, length, timestamp, direction in zip(*self.index()):
+            yield timestamp, direction, mm[offset:offset + length]
+
+    def realtime(self) -> dict[str, Any]:
+        """Decode all received realtime frames into NumPy arrays.
+
+        Returns arrays of equal length keyed ``timestamp`` (monotonic ns),
+        ``co2``, ``temperature``, ``humidity``, ``battery`` and ``charging``,
+        with the same conversions as the coordinator.
+        """
+        import numpy as np
+
+        offsets, lengths, timestamps, directions = (np.asarray(values, dtype=np.int64) for values in self.index())
+        raw = np.frombuffer(self._mm, dtype=np.uint8)
+
+        # Realtime responses received over BLE or MQTT
+        received = (directions == DIRECTION_RX) | (directions == DIRECTION_MQTT)
+        candidates = received & (lengths >= 13)
+        cmd = bytes.fromhex(RESPONSE_REALTIME)
+        candidates[candidates] = (raw[offsets[candidates] + 4] == cmd[0]) & (raw[offsets[candidates] + 5] == cmd[1])
+
+        # One gather for all frames: rows are the first 13 bytes of each frame
+        frames = raw[offsets[candidates, None] + np.arange(13)]
+        temperature = frames[:, 9].astype(np.int16)
+        temperature[temperature > 128] -= 256
+
+        return {
+            "timestamp": timestamps[candidates],
+            "co2": frames[:, 7].astype(np.uint16) << 8 | frames[:, 8],
+            "temperature": temperature,
+            "humidity": frames[:, 10].copy(),
+            "battery": np.minimum(frames[:, 11].astype(np.uint16) * 25, 100),
+            "charging": frames[:, 12] == 1,
+        }
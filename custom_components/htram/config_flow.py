@@ -1,24 +1,83 @@
 """Config flow for HTRAM integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
 import voluptuous as vol
+from bleak import BleakClient
+from bleak.exc import BleakError
 
 from homeassistant.components import bluetooth
 from homeassistant.components.bluetooth import (
     BluetoothServiceInfo,
     async_discovered_service_info,
 )
-from homeassistant.config_entries import ConfigFlow
-from homeassistant.const import CONF_ADDRESS
+from homeassistant.config_entries import (
+    SOURCE_INTEGRATION_DISCOVERY,
+    ConfigEntry,
+    ConfigFlow,
+    OptionsFlow,
+)
+from homeassistant.const import CONF_ADDRESS, CONF_NAME
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, SERVICE_UUID
+from .const import (
+    DOMAIN,
+    NOTIFY_UUID,
+    SERVICE_UUID,
+    DEVICE_NAME_PREFIXES,
+    BULK_VERIFY_CONCURRENCY,
+    CONF_DEADBAND_CO2,
+    CONF_DEADBAND_TEMPERATURE,
+    CONF_DEADBAND_HUMIDITY,
+    CONF_MAX_SILENCE,
+    CONF_STREAM_MODE,
+    CONF_STALE_FAILURES,
+    CONF_STALE_MINUTES,
+    CONF_MQTT_INGEST,
+    CONF_MQTT_TOPIC,
+    CONF_LEVEL_HYSTERESIS,
+    CONF_LEVEL_DWELL,
+    CONF_DERIVED_SENSORS,
+    CONF_HISTORY_BACKFILL,
+    CONF_STATISTICS_IMPORT,
+    CONF_CAPTURE,
+    CONF_FLEET,
+    FLEET_UNIQUE_ID,
+    DEFAULT_DEADBAND_CO2,
+    DEFAULT_DEADBAND_TEMPERATURE,
+    DEFAULT_DEADBAND_HUMIDITY,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_STREAM_MODE,
+    DEFAULT_STALE_FAILURES,
+    DEFAULT_STALE_MINUTES,
+    DEFAULT_MQTT_INGEST,
+    DEFAULT_MQTT_TOPIC,
+    DEFAULT_LEVEL_HYSTERESIS,
+    DEFAULT_LEVEL_DWELL,
+    DEFAULT_DERIVED_SENSORS,
+    DEFAULT_HISTORY_BACKFILL,
+    DEFAULT_STATISTICS_IMPORT,
+    DEFAULT_CAPTURE,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+CONF_ADDRESSES = "addresses"
+
+def _is_htram_device(discovery_info: BluetoothServiceInfo) -> bool:
+    """Return True if an advertisement matches the manifest bluetooth matchers."""
+    # Service UUID check
+    if SERVICE_UUID.lower() in discovery_info.service_uuids or SERVICE_UUID.upper() in discovery_info.service_uuids:
+        return True
+    # Name Check backup
+    return bool(discovery_info.name) and discovery_info.name.startswith(DEVICE_NAME_PREFIXES)
+
+
 class HTRAMConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for HTRAM."""
 
@@ -29,6 +88,20 @@ class HTRAMConfigFlow(ConfigFlow, domain=DOMAIN):
         self._discovery_info: BluetoothServiceInfo | None = None
         self._discovered_device: Any = None
         self._discovered_devices: dict[str, Any] = {}
+        self._bulk_verified: list[str] = []
+        self._bulk_failed: dict[str, str] = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return HTRAMOptionsFlow(config_entry)
+
+    @classmethod
+    @callback
+    def async_supports_options_flow(cls, config_entry: ConfigEntry) -> bool:
+        """Return whether the entry has options (the fleet entry has none)."""
+        return not config_entry.data.get(CONF_FLEET)
 
     async def async_step_bluetooth(
         self, discovery_info: BluetoothServiceInfo
@@ -49,10 +122,6 @@ class HTRAMConfigFlow(ConfigFlow, domain=DOMAIN):
 
     async def _async_verify_connection(self, discovery_info: BluetoothServiceInfo) -> dict[str, str] | None:
         """Verify we can connect and pair with the device."""
-        from bleak import BleakClient, BleakError
-        from bleak_retry_connector import establish_connection
-        import asyncio
-
         _LOGGER.debug(f"Verifying connection to {discovery_info.address}")
         device = bluetooth.async_ble_device_from_address(
             self.hass, discovery_info.address, connectable=True
@@ -81,7 +150,6 @@ class HTRAMConfigFlow(ConfigFlow, domain=DOMAIN):
                      def _dummy_handler(sender, data):
                          pass
                      
-                     from .const import NOTIFY_UUID
                      await client.start_notify(NOTIFY_UUID, _dummy_handler)
                      _LOGGER.debug("Notifications enabled successfully")
                      # Give a moment for any auth processes to settle
@@ -134,10 +202,60 @@ class HTRAMConfigFlow(ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    def _async_scan(self) -> None:
+        """Collect discovered HTRAM devices that are not configured yet."""
+        # Scan for devices with our Service UUID
+        current_addresses = self._async_current_ids()
+        for discovery_info in async_discovered_service_info(self.hass):
+            if (
+                discovery_info.address in current_addresses
+                or discovery_info.address in self._discovered_devices
+            ):
+                continue
+
+            if _is_htram_device(discovery_info):
+                 self._discovered_devices[discovery_info.address] = discovery_info
+
+    def _device_titles(self) -> dict[str, str]:
+        """Return display names of the discovered devices keyed by address."""
+        return {
+            address: (discovery.name or address)
+            for address, discovery in self._discovered_devices.items()
+        }
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the user step to pick discovered device."""
+        """Handle a flow started by the user."""
+        self._async_scan()
+
+        menu_options = []
+        if self._discovered_devices:
+            menu_options.append("pick_device")
+        if len(self._discovered_devices) > 1:
+            menu_options.append("bulk_add")
+        if FLEET_UNIQUE_ID not in self._async_current_ids():
+            menu_options.append("fleet")
+
+        if not menu_options:
+            return self.async_abort(reason="no_devices_found")
+        if menu_options == ["pick_device"]:
+            return await self.async_step_pick_device()
+
+        return self.async_show_menu(step_id="user", menu_options=menu_options)
+
+    async def async_step_fleet(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Add the fleet aggregate device."""
+        await self.async_set_unique_id(FLEET_UNIQUE_ID)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title="HTRAM Fleet", data={CONF_FLEET: True})
+
+    async def async_step_pick_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the step to pick one discovered device."""
         errors: dict[str, str] = {}
         
         if user_input is not None:
@@ -158,35 +276,185 @@ class HTRAMConfigFlow(ConfigFlow, domain=DOMAIN):
                 )
             errors = errors_or_none
 
-        # Scan for devices with our Service UUID
-        current_addresses = self._async_current_ids()
-        for discovery_info in async_discovered_service_info(self.hass):
-            if (
-                discovery_info.address in current_addresses
-                or discovery_info.address in self._discovered_devices
-            ):
-                continue
+        return self.async_show_form(
+            step_id="pick_device",
+            data_schema=vol.Schema({
+                vol.Required(CONF_ADDRESS): vol.In(self._device_titles()),
+            }),
+            errors=errors,
+        )
 
-            # Check if it matches our device (Service UUID or Name prefix)
-            # Service UUID check
-            if SERVICE_UUID.lower() in discovery_info.service_uuids or SERVICE_UUID.upper() in discovery_info.service_uuids:
-                 self._discovered_devices[discovery_info.address] = discovery_info
-            # Name Check backup
-            elif discovery_info.name and (discovery_info.name.startswith("HTRAM") or discovery_info.name.startswith("Storm_Shadow")):
-                 self._discovered_devices[discovery_info.address] = discovery_info
+    async def async_step_bulk_add(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the step to verify and add several discovered devices at once."""
+        errors: dict[str, str] = {}
+        titles = self._device_titles()
 
-        if not self._discovered_devices:
-            return self.async_abort(reason="no_devices_found")
+        if user_input is not None:
+            addresses = user_input[CONF_ADDRESSES]
+            if not addresses:
+                errors["base"] = "no_devices_selected"
+            else:
+                # Pairing holds a connection slot per device, so verify a few at a time
+                semaphore = asyncio.Semaphore(BULK_VERIFY_CONCURRENCY)
+
+                async def verify(address: str) -> dict[str, str] | None:
+                    async with semaphore:
+                        return await self._async_verify_connection(self._discovered_devices[address])
+
+                results = await asyncio.gather(*(verify(address) for address in addresses))
+                self._bulk_verified = [
+                    address for address, result in zip(addresses, results) if not result
+                ]
+                self._bulk_failed = {
+                    address: result["base"]
+                    for address, result in zip(addresses, results)
+                    if result
+                }
+                if self._bulk_failed:
+                    return await self.async_step_bulk_summary()
+                return await self._async_create_bulk_entries()
 
-        titles = {
-            address: (discovery.name or address)
-            for address, discovery in self._discovered_devices.items()
-        }
-        
         return self.async_show_form(
-            step_id="user",
+            step_id="bulk_add",
             data_schema=vol.Schema({
-                vol.Required(CONF_ADDRESS): vol.In(titles),
+                vol.Required(CONF_ADDRESSES, default=list(titles)): cv.multi_select(titles),
             }),
             errors=errors,
         )
+
+    async def async_step_bulk_summary(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Show which devices failed verification before adding the rest."""
+        titles = self._device_titles()
+        failed = "\n".join(
+            f"- {titles[address]} ({address}): {error}"
+            for address, error in self._bulk_failed.items()
+        )
+
+        if not self._bulk_verified:
+            return self.async_abort(
+                reason="bulk_failed", description_placeholders={"failed": failed}
+            )
+
+        if user_input is not None:
+            return await self._async_create_bulk_entries()
+
+        return self.async_show_form(
+            step_id="bulk_summary",
+            description_placeholders={
+                "verified": str(len(self._bulk_verified)),
+                "failed": failed,
+            },
+        )
+
+    async def _async_create_bulk_entries(self) -> FlowResult:
+        """Create config entries for all verified devices."""
+        titles = self._device_titles()
+        first, *others = self._bulk_verified
+
+        # A flow creates a single entry, so hand the others to their own flows
+        for address in others:
+            self.hass.async_create_task(
+                self.hass.config_entries.flow.async_init(
+                    DOMAIN,
+                    context={"source": SOURCE_INTEGRATION_DISCOVERY},
+                    data={CONF_ADDRESS: address, CONF_NAME: titles[address]},
+                )
+            )
+
+        await self.async_set_unique_id(first, raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title=titles[first], data={})
+
+    async def async_step_integration_discovery(
+        self, discovery_info: dict[str, Any]
+    ) -> FlowResult:
+        """Create an entry for a device already verified by the bulk add step."""
+        await self.async_set_unique_id(discovery_info[CONF_ADDRESS], raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(title=discovery_info[CONF_NAME], data={})
+
+
+class HTRAMOptionsFlow(OptionsFlow):
+    """Handle HTRAM options."""
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_DEADBAND_CO2,
+                    default=options.get(CONF_DEADBAND_CO2, DEFAULT_DEADBAND_CO2),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=500)),
+                vol.Optional(
+                    CONF_DEADBAND_TEMPERATURE,
+                    default=options.get(CONF_DEADBAND_TEMPERATURE, DEFAULT_DEADBAND_TEMPERATURE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Optional(
+                    CONF_DEADBAND_HUMIDITY,
+                    default=options.get(CONF_DEADBAND_HUMIDITY, DEFAULT_DEADBAND_HUMIDITY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=20)),
+                vol.Optional(
+                    CONF_MAX_SILENCE,
+                    default=options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+                vol.Optional(
+                    CONF_STALE_FAILURES,
+                    default=options.get(CONF_STALE_FAILURES, DEFAULT_STALE_FAILURES),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Optional(
+                    CONF_STALE_MINUTES,
+                    default=options.get(CONF_STALE_MINUTES, DEFAULT_STALE_MINUTES),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+                vol.Optional(
+                    CONF_LEVEL_HYSTERESIS,
+                    default=options.get(CONF_LEVEL_HYSTERESIS, DEFAULT_LEVEL_HYSTERESIS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=500)),
+                vol.Optional(
+                    CONF_LEVEL_DWELL,
+                    default=options.get(CONF_LEVEL_DWELL, DEFAULT_LEVEL_DWELL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Optional(
+                    CONF_DERIVED_SENSORS,
+                    default=options.get(CONF_DERIVED_SENSORS, DEFAULT_DERIVED_SENSORS),
+                ): bool,
+                vol.Optional(
+                    CONF_STATISTICS_IMPORT,
+                    default=options.get(CONF_STATISTICS_IMPORT, DEFAULT_STATISTICS_IMPORT),
+                ): bool,
+                vol.Optional(
+                    CONF_HISTORY_BACKFILL,
+                    default=options.get(CONF_HISTORY_BACKFILL, DEFAULT_HISTORY_BACKFILL),
+                ): bool,
+                vol.Optional(
+                    CONF_STREAM_MODE,
+                    default=options.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE),
+                ): bool,
+                vol.Optional(
+                    CONF_MQTT_INGEST,
+                    default=options.get(CONF_MQTT_INGEST, DEFAULT_MQTT_INGEST),
+                ): bool,
+                vol.Optional(
+                    CONF_MQTT_TOPIC,
+                    default=options.get(CONF_MQTT_TOPIC, DEFAULT_MQTT_TOPIC),
+                ): str,
+                vol.Optional(
+                    CONF_CAPTURE,
+                    default=options.get(CONF_CAPTURE, DEFAULT_CAPTURE),
+                ): bool,
+            }),
+        )
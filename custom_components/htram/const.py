@@ -2,11 +2,27 @@
 
 DOMAIN = "htram"
 
+# hass.data key for connections kept open across a reload
+DATA_PARKED_CLIENTS = f"{DOMAIN}_parked_clients"
+# Seconds a parked connection waits to be taken over before it is closed
+HANDOVER_TIMEOUT = 30
+
+# Fleet aggregate entry (one per installation, not a device)
+CONF_FLEET = "fleet"
+FLEET_UNIQUE_ID = "fleet"
+DATA_FLEET = f"{DOMAIN}_fleet"
+# Dispatched with the coordinator when a device entry is set up or unloaded
+SIGNAL_COORDINATOR_ADDED = f"{DOMAIN}_coordinator_added"
+SIGNAL_COORDINATOR_REMOVED = f"{DOMAIN}_coordinator_removed"
+
 # Bluetooth UUIDs
 SERVICE_UUID = "FC247940-6E08-11E4-80FC-0002A5D5C51B"
 NOTIFY_UUID = "F833D6C0-6E0B-11E4-9136-0002A5D5C51B"
 WRITE_UUID = "3D115840-6E0B-11E4-B24F-0002A5D5C51B"
 
+# Advertised local name prefixes (keep in sync with the manifest bluetooth matchers)
+DEVICE_NAME_PREFIXES = ("HTRAM", "Storm_Shadow")
+
 # Commands (Byte Arrays)
 # 7B 41 00 07 40 44 02 00 FC 3E 7D
 # 7B 41 00 07 40 44 02 00 FC 3E 7D
@@ -31,11 +47,91 @@ CMD_SET_SOUND_ON = b"\x7B\x41\x00\x09\x26\x43\x01\x00\x00\x01\x2B\x66\x7D"
  
 # Screen Off
 # 7B 41 00 09 40 43 04 00 60 06 EF 17 7D (Read Settings - includes screen off)
+# Unlike the other captured packets its checksum is not the CRC of the frame
+# (that would be BF 11); kept as captured since the device answers it.
 CMD_GET_SETTINGS = b"\x7B\x41\x00\x09\x40\x43\x04\x00\x60\x06\xEF\x17\x7D"
 
+# Payload of a single write at the default ATT MTU of 23 bytes
+DEFAULT_WRITE_CHUNK_SIZE = 20
+
+# Devices verified at the same time when adding several in the config flow
+BULK_VERIFY_CONCURRENCY = 3
+
 # Polling Interval
 POLL_INTERVAL = 60 
 
+# Response command ids (bytes 4-5 of a notification)
+RESPONSE_REALTIME = "4144"
+RESPONSE_SETTINGS = "4143"
+RESPONSE_SOUND = "2723"
+
+# Parts of the device state, each read with its own request (in this order)
+PART_REALTIME = "realtime"
+PART_SOUND = "sound"
+PART_SETTINGS = "settings"
+PARTS = (PART_REALTIME, PART_SOUND, PART_SETTINGS)
+# Data keys filled by each part
+PART_KEYS = {
+    PART_REALTIME: ("co2", "temperature", "humidity", "battery", "charging"),
+    PART_SOUND: ("mute",),
+    PART_SETTINGS: ("alarm_low", "alarm_high", "screen_off"),
+}
+
+# Settings written through the pending writes queue and the part that reads
+# each back (None: the device has no read-back, a sent frame confirms it)
+PENDING_FIELDS = {
+    "mute": PART_SOUND,
+    "temp_unit": None,
+    "alarm_low": PART_SETTINGS,
+    "alarm_high": PART_SETTINGS,
+    "screen_off": PART_SETTINGS,
+}
+PENDING_STORAGE_VERSION = 1
+# Seconds to wait before writing, so quick successive changes are sent once
+PENDING_FLUSH_DELAY = 1.0
+# Writes the device did not take are dropped after this many attempts
+PENDING_MAX_ATTEMPTS = 5
+
+# In stream mode, settings and sound status are re-read this often (seconds)
+SETTINGS_REFRESH_INTERVAL = 900
+
+# Transports for realtime readings
+TRANSPORT_BLE = "ble"
+TRANSPORT_MQTT = "mqtt"
+# Fall back to BLE polling when MQTT has been silent this long (seconds)
+MQTT_STALE_TIMEOUT = 180
+
+# Connection backoff and circuit breaker
+BACKOFF_BASE_DELAY = 60  # seconds, doubled per consecutive failure
+BACKOFF_MAX_DELAY = 900
+BREAKER_FAILURE_THRESHOLD = 5
+# While open, probe the device this often
+BREAKER_OPEN_INTERVAL = 3600
+# An advertisement triggers an early probe at most this often
+BREAKER_ADVERTISEMENT_PROBE_INTERVAL = 300
+
+# Provisioning via the configure_device service
+PROVISION_TIMEOUT = 60  # seconds per device
+DEFAULT_PROVISION_CONCURRENCY = 3
+
+# Burst sampling
+BURST_MIN_INTERVAL = 2
+BURST_MAX_DURATION = 1800
+# Entities are updated at most this often during a burst
+BURST_PUBLISH_INTERVAL = 10
+
+# History download
+# The logging command follows the request/response pairing of the other
+# commands (40xx -> 41xx) but has not been confirmed against the app, so
+# history is only downloaded when enabled or asked for.
+RESPONSE_HISTORY = "4146"
+# Record: YY MM DD HH mm ss (UTC, as set by the time sync), CO2 (2 bytes), temperature, humidity
+HISTORY_RECORD_SIZE = 10
+# Seconds to wait for the next chunk of a download
+HISTORY_CHUNK_TIMEOUT = 10
+# Backfill at most this far back
+HISTORY_MAX_DAYS = 30
+
 # Temperature Unit
 # Fetch: 7B 41 00 07 20 6E 02 06 7E 30 7D
 CMD_GET_TEMP_UNIT = b"\x7B\x41\x00\x07\x20\x6E\x02\x06\x7E\x30\x7D"
@@ -50,3 +146,98 @@ CMD_SET_TEMP_UNIT_F = b"\x7B\x41\x00\x08\x22\x32\x02\x06\x01\x29\xE6\x7D"
 # Command Header: 7B 41 00 0B 42 43 04 00 20 00 ... 7D
 # Note: The '20 00' might vary or be fixed.
 
+
+# Config entry data
+# Credentials sent to the device by the configure_device service
+CONF_MQTT_SERVER = "mqtt_server"
+CONF_AES_KEY = "aes_key"
+CONF_AES_IV = "aes_iv"
+
+# Options
+# Deadbands suppress publishing of insignificant changes (0 disables filtering).
+CONF_DEADBAND_CO2 = "deadband_co2"
+CONF_DEADBAND_TEMPERATURE = "deadband_temperature"
+CONF_DEADBAND_HUMIDITY = "deadband_humidity"
+# Publish the latest reading after this many seconds even if it is inside the deadband.
+CONF_MAX_SILENCE = "max_silence"
+
+# Keep the notification subscription open and consume unsolicited realtime frames
+CONF_STREAM_MODE = "stream_mode"
+
+# Keep serving the last reading until this many updates failed in a row
+# or the reading is this many minutes old, whichever comes first
+CONF_STALE_FAILURES = "stale_failures"
+CONF_STALE_MINUTES = "stale_minutes"
+
+# Receive readings from the device over a local MQTT broker
+CONF_MQTT_INGEST = "mqtt_ingest"
+# Topic the device publishes on; {address} is replaced by the lowercase MAC without colons
+CONF_MQTT_TOPIC = "mqtt_topic"
+
+# CO2 level (good/warning/alarm) transitions
+CONF_LEVEL_HYSTERESIS = "level_hysteresis"
+CONF_LEVEL_DWELL = "level_dwell"
+
+# Expose sensors derived from the rolling statistics window
+CONF_DERIVED_SENSORS = "derived_sensors"
+
+# Aggregate readings into buckets, import them as long-term statistics and
+# update the entities once per bucket instead of on every reading
+CONF_STATISTICS_IMPORT = "statistics_import"
+
+# Record raw BLE and MQTT traffic to a binary capture file in the config dir
+CONF_CAPTURE = "capture"
+
+# Download on-device history after an outage and import it as long-term statistics
+CONF_HISTORY_BACKFILL = "history_backfill"
+
+DEFAULT_DEADBAND_CO2 = 0
+DEFAULT_DEADBAND_TEMPERATURE = 0.0
+DEFAULT_DEADBAND_HUMIDITY = 0
+DEFAULT_MAX_SILENCE = 900
+DEFAULT_STREAM_MODE = False
+DEFAULT_STALE_FAILURES = 3
+DEFAULT_STALE_MINUTES = 10
+DEFAULT_MQTT_INGEST = False
+DEFAULT_MQTT_TOPIC = "htram/{address}/#"
+DEFAULT_LEVEL_HYSTERESIS = 50
+DEFAULT_LEVEL_DWELL = 0
+DEFAULT_DERIVED_SENSORS = False
+DEFAULT_HISTORY_BACKFILL = False
+DEFAULT_STATISTICS_IMPORT = False
+DEFAULT_CAPTURE = False
+
+# Rolling statistics
+STATS_WINDOW = 900  # seconds
+# Readings closer together (e.g. during a burst) are thinned to one per interval,
+# so the window holds at most STATS_WINDOW / STATS_MIN_INTERVAL samples
+STATS_MIN_INTERVAL = 1  # seconds
+# Typical outdoor CO2 level used for air change estimation
+OUTDOOR_CO2 = 420
+
+# Traffic captures
+CAPTURE_DIR = "htram_captures"
+CAPTURE_MAX_BYTES = 256 * 1024 * 1024
+
+# Profiles written by the profile service
+PROFILE_DIR = "htram_profiles"
+PROFILE_MAX_CYCLES = 100
+# Wall time after which a profile stops with cycles left (seconds), since
+# the event loop runs in debug mode meanwhile
+PROFILE_MAX_DURATION = 900
+# Seconds the service waits for the report before it answers without one
+PROFILE_RESPONSE_TIMEOUT = 300
+
+# Bucket length used with statistics import (seconds)
+STATISTICS_BUCKET = 300
+# Version of the stored open bucket and hour
+BUCKETS_STORAGE_VERSION = 1
+
+# CO2 levels relative to the device alarm thresholds, in increasing severity
+CO2_LEVEL_GOOD = "good"
+CO2_LEVEL_WARNING = "warning"
+CO2_LEVEL_ALARM = "alarm"
+CO2_LEVELS = [CO2_LEVEL_GOOD, CO2_LEVEL_WARNING, CO2_LEVEL_ALARM]
+
+# Fired once per CO2 level transition
+EVENT_CO2_LEVEL_CHANGED = "htram_co2_level_changed"
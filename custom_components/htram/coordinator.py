@@ -1,18 +1,33 @@
 """DataUpdateCoordinator for HTRAM."""
 import asyncio
+import contextlib
 import logging
+import math
+import time
 from datetime import timedelta
+from typing import TYPE_CHECKING, Any
 import async_timeout
 
+from bleak import BleakClient
 from bleak.backends.device import BLEDevice
 from bleak.exc import BleakError
+from bleak_retry_connector import establish_connection
 
 from homeassistant.components import bluetooth
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
+    DATA_PARKED_CLIENTS,
+    HANDOVER_TIMEOUT,
     SERVICE_UUID,
     WRITE_UUID,
     NOTIFY_UUID,
@@ -24,17 +39,145 @@ from .const import (
     CMD_SET_TEMP_UNIT_C,
     CMD_SET_TEMP_UNIT_F,
     CMD_HEARTBEAT,
-    CMD_HEARTBEAT,
-    POLL_INTERVAL
+    POLL_INTERVAL,
+    BURST_PUBLISH_INTERVAL,
+    RESPONSE_REALTIME,
+    RESPONSE_SETTINGS,
+    RESPONSE_SOUND,
+    SETTINGS_REFRESH_INTERVAL,
+    MQTT_STALE_TIMEOUT,
+    DEFAULT_WRITE_CHUNK_SIZE,
+    BACKOFF_BASE_DELAY,
+    BACKOFF_MAX_DELAY,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_OPEN_INTERVAL,
+    BREAKER_ADVERTISEMENT_PROBE_INTERVAL,
+    TRANSPORT_BLE,
+    TRANSPORT_MQTT,
+    CONF_STREAM_MODE,
+    CONF_STALE_FAILURES,
+    CONF_STALE_MINUTES,
+    DEFAULT_STALE_FAILURES,
+    DEFAULT_STALE_MINUTES,
+    CONF_MQTT_INGEST,
+    CONF_MQTT_TOPIC,
+    CONF_AES_KEY,
+    CONF_AES_IV,
+    CONF_MQTT_SERVER,
+    DEFAULT_STREAM_MODE,
+    DEFAULT_MQTT_INGEST,
+    DEFAULT_MQTT_TOPIC,
+    CONF_DEADBAND_CO2,
+    CONF_DEADBAND_TEMPERATURE,
+    CONF_DEADBAND_HUMIDITY,
+    CONF_MAX_SILENCE,
+    CONF_DERIVED_SENSORS,
+    CONF_LEVEL_HYSTERESIS,
+    CONF_LEVEL_DWELL,
+    DEFAULT_DEADBAND_CO2,
+    DEFAULT_DEADBAND_TEMPERATURE,
+    DEFAULT_DEADBAND_HUMIDITY,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_DERIVED_SENSORS,
+    DEFAULT_LEVEL_HYSTERESIS,
+    DEFAULT_LEVEL_DWELL,
+    EVENT_CO2_LEVEL_CHANGED,
+    STATS_WINDOW,
+    STATS_MIN_INTERVAL,
+    OUTDOOR_CO2,
+    CONF_HISTORY_BACKFILL,
+    DEFAULT_HISTORY_BACKFILL,
+    HISTORY_CHUNK_TIMEOUT,
+    HISTORY_MAX_DAYS,
+    CONF_STATISTICS_IMPORT,
+    DEFAULT_STATISTICS_IMPORT,
+    STATISTICS_BUCKET,
+    BUCKETS_STORAGE_VERSION,
+    CONF_CAPTURE,
+    DEFAULT_CAPTURE,
+    CAPTURE_DIR,
+    CAPTURE_MAX_BYTES,
+    PARTS,
+    PART_REALTIME,
+    PART_SETTINGS,
+    PART_SOUND,
+    PENDING_FIELDS,
+    PENDING_FLUSH_DELAY,
 )
-from . import utils
+from . import capture, history, utils
+from .breaker import CircuitBreaker
+from .buckets import BucketAggregator
+from .sources import SourceScorer, free_slots
+from .filters import DeadbandFilter, crosses_threshold
+from .levels import CO2LevelTracker
+from .mqtt_ingest import HTRAMMqttIngest
+from .pending import PendingWrites
+from .stats import RollingStats
+
+if TYPE_CHECKING:
+    # Only loaded when the profile service is used
+    from .profiling import ProfileSession
 
 _LOGGER = logging.getLogger(__name__)
 
+
+@callback
+def _async_park_client(hass: HomeAssistant, address: str, client) -> None:
+    """Keep a connection open briefly so a reloaded coordinator can take it over."""
+    parked = hass.data.setdefault(DATA_PARKED_CLIENTS, {})
+
+    async def _async_expire(_now) -> None:
+        if address in parked and parked[address][0] is client:
+            del parked[address]
+            _LOGGER.debug(f"Parked connection to {address} was not taken over, disconnecting")
+            with contextlib.suppress(Exception):
+                await client.disconnect()
+
+    parked[address] = (client, async_call_later(hass, HANDOVER_TIMEOUT, _async_expire))
+
+
+@callback
+def _async_adopt_client(hass: HomeAssistant, address: str):
+    """Take a parked connection if it is still alive."""
+    parked = hass.data.get(DATA_PARKED_CLIENTS, {}).pop(address, None)
+    if parked is None:
+        return None
+    client, cancel_expiry = parked
+    cancel_expiry()
+    if not client.is_connected:
+        return None
+    _LOGGER.debug(f"Taking over the connection to {address}")
+    return client
+
+
+def _buckets_store(hass: HomeAssistant, address: str) -> Store[dict[str, Any]]:
+    """Return the store of the open statistics bucket and hour."""
+    return Store(hass, BUCKETS_STORAGE_VERSION, f"{DOMAIN}.buckets.{address.replace(':', '').lower()}")
+
+
+async def async_remove_buckets(hass: HomeAssistant, address: str) -> None:
+    """Delete the stored open statistics bucket and hour."""
+    await _buckets_store(hass, address).async_remove()
+
+
+async def async_disconnect_parked_client(hass: HomeAssistant, address: str) -> None:
+    """Disconnect a parked connection right away."""
+    parked = hass.data.get(DATA_PARKED_CLIENTS, {}).pop(address, None)
+    if parked is None:
+        return
+    client, cancel_expiry = parked
+    cancel_expiry()
+    with contextlib.suppress(Exception):
+        await client.disconnect()
+
+
 class HTRAMDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching HTRAM data."""
 
-    def __init__(self, hass: HomeAssistant, ble_device: BLEDevice) -> None:
+    # Checksum of frames built at runtime, the same as in the captured packets of const.py
+    _crc16 = staticmethod(utils.CRC16.crc16_short)
+
+    def __init__(self, hass: HomeAssistant, ble_device: BLEDevice, entry: ConfigEntry) -> None:
         """Initialize."""
         super().__init__(
             hass,
@@ -44,118 +187,807 @@ class HTRAMDataUpdateCoordinator(DataUpdateCoordinator):
         )
         self.ble_device = ble_device
         self.address = ble_device.address
+        self.entry = entry
+        # One device info shared by all entities of the device
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, self.address)},
+            connections={(dr.CONNECTION_BLUETOOTH, self.address)},
+            name="HTRAM Air Monitor",
+            manufacturer="Honeywell",
+            model="HTRAM-RM",
+        )
+        # Options this coordinator was built with; changing them reloads the entry
+        self.options = dict(entry.options)
+        self.stream_mode = self.options.get(CONF_STREAM_MODE, DEFAULT_STREAM_MODE)
         self.data = {}
         self._client = None
+        # Serializes request/response exchanges on the connection
+        self._lock = asyncio.Lock()
+        # Keeps the chunks of one frame together on the connection
+        self._write_lock = asyncio.Lock()
+        # Client whose MTU has been acquired
+        self._mtu_client = None
+        # Pending responses keyed by response command id
+        self._response_futures: dict[str, asyncio.Future] = {}
+        self._burst_task: asyncio.Task | None = None
+        # On-demand fetch shared by concurrent refresh calls, and the parts it reads
+        self._fetch_task: asyncio.Task | None = None
+        self._fetch_parts: set[str] = set()
+        # Receives every notification while a history download is running
+        self._history_stream: history.HistoryStream | None = None
+        self._history_task: asyncio.Task | None = None
+        self.history_backfill = self.options.get(CONF_HISTORY_BACKFILL, DEFAULT_HISTORY_BACKFILL)
+        # Client that currently has the notification subscription
+        self._notify_client = None
+        # Monotonic times of the last parsed frames
+        self._realtime_at: float | None = None
+        self._settings_at: float | None = None
+        self._sound_at: float | None = None
+
+        self.mqtt_ingest: HTRAMMqttIngest | None = None
+        # Raw traffic recorder, only while the capture option is enabled
+        self.capture: capture.CaptureWriter | None = None
+        # Profile session of the profile service, only while it runs
+        self.profiler: ProfileSession | None = None
+        # Setting changes waiting for the device, written on the next exchange
+        self.pending = PendingWrites(hass, self.address)
+        self._flush_debouncer = Debouncer(
+            hass, _LOGGER, cooldown=PENDING_FLUSH_DELAY, immediate=False, function=self._async_flush_pending
+        )
+        # Set by the first async_shutdown; the config entry calls it again on unload
+        self._shut_down = False
+
+        # Failed updates tolerated before entities go unavailable
+        self.consecutive_failures = 0
+        self._stale_failures = self.options.get(CONF_STALE_FAILURES, DEFAULT_STALE_FAILURES)
+        self._stale_seconds = self.options.get(CONF_STALE_MINUTES, DEFAULT_STALE_MINUTES) * 60
+
+        # Limits connection attempts while the device is unreachable
+        self.breaker = CircuitBreaker(
+            BACKOFF_BASE_DELAY, BACKOFF_MAX_DELAY, BREAKER_FAILURE_THRESHOLD, BREAKER_OPEN_INTERVAL
+        )
+        self._last_probe_at = -math.inf
+
+        # Connection history of the adapters and proxies that can reach the device
+        self.sources = SourceScorer()
+        # Transport currently used for realtime readings; settings are always written over BLE
+        self.transport = TRANSPORT_BLE
+        self.transport_switches = 0
+        self.transport_changed_at = None
+
+        # Significant-change filters applied before readings are fanned out to entities
+        options = self.options
+        max_silence = options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)
+        self._filters = {
+            "co2": DeadbandFilter(options.get(CONF_DEADBAND_CO2, DEFAULT_DEADBAND_CO2), max_silence),
+            "temperature": DeadbandFilter(
+                options.get(CONF_DEADBAND_TEMPERATURE, DEFAULT_DEADBAND_TEMPERATURE), max_silence
+            ),
+            "humidity": DeadbandFilter(options.get(CONF_DEADBAND_HUMIDITY, DEFAULT_DEADBAND_HUMIDITY), max_silence),
+        }
+
+        # Local threshold crossing detection
+        self._level_tracker = CO2LevelTracker(
+            options.get(CONF_LEVEL_HYSTERESIS, DEFAULT_LEVEL_HYSTERESIS),
+            options.get(CONF_LEVEL_DWELL, DEFAULT_LEVEL_DWELL),
+        )
+        self._raw_co2: int | None = None
+
+        # Rolling window statistics backing the optional derived sensors
+        self.stats: RollingStats | None = None
+        if options.get(CONF_DERIVED_SENSORS, DEFAULT_DERIVED_SENSORS):
+            self.stats = RollingStats(STATS_WINDOW, STATS_MIN_INTERVAL, OUTDOOR_CO2)
+
+        # Bucketed readings imported as long-term statistics; entities follow the buckets
+        self.buckets: BucketAggregator | None = None
+        if options.get(CONF_STATISTICS_IMPORT, DEFAULT_STATISTICS_IMPORT):
+            self.buckets = BucketAggregator(timedelta(seconds=STATISTICS_BUCKET))
+        self._buckets_store = _buckets_store(hass, self.address)
+        self._bucket_closed = False
+        self._skip_listener_update = False
+
+    async def _async_refresh(self, *args, **kwargs) -> None:
+        """Refresh, profiling the whole cycle including listener updates when requested."""
+        if self.profiler is None:
+            await super()._async_refresh(*args, **kwargs)
+            return
+        with self.profiler.cycle(self):
+            await super()._async_refresh(*args, **kwargs)
 
     async def _async_update_data(self):
+        """Fetch data, serving the last good reading through short outages."""
+        try:
+            data = await self._async_poll()
+        except UpdateFailed as err:
+            self.consecutive_failures += 1
+            if self._serve_stale():
+                _LOGGER.debug(
+                    f"Serving last reading of {self.address} ({self.last_reading_age:.0f}s old) "
+                    f"after {self.consecutive_failures} failed update(s): {err}"
+                )
+                return self.data
+            raise
+
+        # Catch up on what the device logged while it was unreachable (or HA was down)
+        if self.history_backfill and (self.consecutive_failures or self._history_task is None):
+            self.async_start_history_sync()
+
+        # Without a closed bucket the reading only goes into the statistics
+        if self.buckets is not None and self.last_update_success and not self._take_bucket_closed():
+            self._skip_listener_update = True
+
+        if self.capture is not None:
+            self.hass.async_create_task(self.capture.async_flush())
+
+        self.consecutive_failures = 0
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, unless a poll only fed the buckets."""
+        if self._skip_listener_update:
+            self._skip_listener_update = False
+            return
+        super().async_update_listeners()
+
+    def _take_bucket_closed(self) -> bool:
+        """Return whether a bucket closed since the last call."""
+        closed, self._bucket_closed = self._bucket_closed, False
+        return closed
+
+    def _serve_stale(self) -> bool:
+        """Return True if entities should keep the last reading instead of going unavailable."""
+        age = self.last_reading_age
+        return (
+            age is not None
+            and self.consecutive_failures < self._stale_failures
+            and age < self._stale_seconds
+        )
+
+    @property
+    def last_reading_age(self) -> float | None:
+        """Return seconds since the last realtime reading."""
+        if self._realtime_at is None:
+            return None
+        return self._age(self._realtime_at)
+
+    async def _async_poll(self):
         """Fetch data from the device."""
+        if self.burst_active:
+            # The burst loop owns the connection and publishes readings itself
+            return self.data
+
+        # Re-discover device to get fresh objects
+        ble_device = bluetooth.async_ble_device_from_address(self.hass, self.address, connectable=True)
+        if ble_device:
+            self.ble_device = ble_device
+
+        transport = self._update_transport()
+        parts = set()
+        if self.stream_mode or transport == TRANSPORT_MQTT:
+            # Readings are pushed; only ask for what has gone stale
+            if transport == TRANSPORT_BLE and self._age(self._realtime_at) >= POLL_INTERVAL:
+                parts.add(PART_REALTIME)
+            if self._age(self._settings_at) >= SETTINGS_REFRESH_INTERVAL:
+                parts.update((PART_SOUND, PART_SETTINGS))
+            listening = transport == TRANSPORT_MQTT or (
+                self._notify_client is not None and self._notify_client.is_connected
+            )
+            if not parts and listening and not self.pending:
+                return self.data
+        else:
+            parts.update(PARTS)
+
+        await self._async_fetch(parts)
+        return self.data
+
+    def part_age(self, part: str) -> float:
+        """Return seconds since a part was last read from the device."""
+        return self._age(
+            {
+                PART_REALTIME: self._realtime_at,
+                PART_SOUND: self._sound_at,
+                PART_SETTINGS: self._settings_at,
+            }[part]
+        )
+
+    async def async_fetch(self, parts: set[str], max_age: float) -> None:
+        """Read the parts older than ``max_age`` seconds, sharing a fetch already in flight."""
+        while True:
+            due = {part for part in parts if self.part_age(part) > max_age}
+            if not due:
+                return
+            task = self._fetch_task
+            if task is None or task.done():
+                break
+            covered = due <= self._fetch_parts
+            try:
+                await asyncio.shield(task)
+            except UpdateFailed:
+                if covered:
+                    raise
+            if covered:
+                return
+            # The fetch in flight did not cover everything, check again
+
+        self._fetch_parts = due
+        self._fetch_task = self.hass.async_create_task(self._async_shared_fetch(due, max_age))
+        await asyncio.shield(self._fetch_task)
+
+    async def _async_shared_fetch(self, parts: set[str], max_age: float) -> None:
+        """Fetch on behalf of all waiting callers and publish the result once."""
+        await self._async_fetch(parts, max_age)
+        self.async_update_listeners()
+
+    async def _async_fetch(self, parts: set[str], max_age: float = 0.0) -> None:
+        """Request the given parts from the device in one exchange."""
+        requests = {
+            PART_REALTIME: (CMD_GET_REALTIME, RESPONSE_REALTIME, self._parse_realtime),
+            PART_SOUND: (CMD_GET_SOUND_STATUS, RESPONSE_SOUND, self._parse_sound),
+            PART_SETTINGS: (CMD_GET_SETTINGS, RESPONSE_SETTINGS, self._parse_settings),
+        }
+        if self.burst_active and parts <= {PART_REALTIME}:
+            # The burst keeps the realtime reading fresh; serve its latest samples
+            return
         try:
-            # Re-discover device to get fresh objects
-            ble_device = bluetooth.async_ble_device_from_address(self.hass, self.address, connectable=True)
-            if ble_device:
-                self.ble_device = ble_device
+            self._check_breaker()
+            self._check_burst()
 
             # Use a larger timeout for the entire update cycle
-            async with async_timeout.timeout(30):
-                if not self._client or not self._client.is_connected:
-                     # Connect will happen below
-                     pass
-
-                from bleak import BleakClient
-                from bleak_retry_connector import establish_connection
-
-                _LOGGER.debug(f"Coordinator updating: Check connection to {self.address}")
-                
-                if self._client and self._client.is_connected:
-                     client = self._client
-                else:
-                     _LOGGER.debug(f"Coordinator updating: Establishing NEW connection to {self.address}")
-                     client = await establish_connection(BleakClient, self.ble_device, self.ble_device.address)
-                     self._client = client
-                
-                _LOGGER.debug(f"Coordinator connected: {client.is_connected}")
-
-                # Future objects for async responses
-                realtime_future = asyncio.Future()
-                settings_future = asyncio.Future()
-                sound_future = asyncio.Future()
-
-                def notification_handler(sender, data: bytearray):
-                    hex_data = data.hex()
-                    _LOGGER.debug(f"Received notification: {hex_data}")
-                    if len(data) < 6:
-                        return
-
-                    cmd_id = data[4:6].hex()
-                    
-                    if cmd_id == "4144": # Realtime
-                        if not realtime_future.done():
-                            realtime_future.set_result(data)
-                    elif cmd_id == "4143": # Settings
-                        if not settings_future.done():
-                            settings_future.set_result(data)
-                    elif cmd_id == "2723": # Sound status
-                        if not sound_future.done():
-                            sound_future.set_result(data)
+            async with self._lock, async_timeout.timeout(30):
+                # Parts read by another exchange while waiting for the lock are skipped;
+                # queued settings are written and read back in the same exchange
+                readback = {PENDING_FIELDS[field] for field in self.pending.values}
+                due = [
+                    part for part in PARTS
+                    if part in readback or (part in parts and self.part_age(part) > max_age)
+                ]
+                if not due and not self.pending:
+                    return
+
+                client = await self._async_get_client()
 
                 # Start notifying
-                await client.start_notify(NOTIFY_UUID, notification_handler)
+                await self._async_start_notify(client)
 
-                # 0. Send Heartbeat
-                await client.write_gatt_char(WRITE_UUID, CMD_HEARTBEAT, response=False)
+                # Send Heartbeat
+                await self._async_write_frame(client, CMD_HEARTBEAT)
                 await asyncio.sleep(0.5)
 
+                written = await self._async_write_pending(client) if self.pending else {}
+
                 timeout_occurred = False
+                read = set()
 
-                # 1. Get Realtime Data
-                await client.write_gatt_char(WRITE_UUID, CMD_GET_REALTIME, response=False)
-                try:
-                    data = await asyncio.wait_for(realtime_future, timeout=5.0)
-                    self._parse_realtime(data)
-                except asyncio.TimeoutError:
-                    _LOGGER.warning("Timeout waiting for realtime data")
-                    timeout_occurred = True
-
-                # 2. Get Sound Status
-                await client.write_gatt_char(WRITE_UUID, CMD_GET_SOUND_STATUS, response=False)
-                try:
-                    data = await asyncio.wait_for(sound_future, timeout=5.0)
-                    self._parse_sound(data)
-                except asyncio.TimeoutError:
-                    _LOGGER.warning("Timeout waiting for sound status")
-                    # Non-critical, but note it
-
-                # 3. Get Settings
-                await client.write_gatt_char(WRITE_UUID, CMD_GET_SETTINGS, response=False)
-                try:
-                    data = await asyncio.wait_for(settings_future, timeout=5.0)
-                    self._parse_settings(data)
-                except asyncio.TimeoutError:
-                    _LOGGER.warning("Timeout waiting for settings")
-                    # Non-critical
+                for part in due:
+                    command, response_id, parse = requests[part]
+                    try:
+                        data = await self._async_request(client, command, response_id)
+                        parse(data)
+                        read.add(part)
+                    except asyncio.TimeoutError:
+                        _LOGGER.warning(f"Timeout waiting for {part} data")
+                        # Only a missing realtime reading points at a bad connection
+                        timeout_occurred = timeout_occurred or part == PART_REALTIME
 
-                await client.stop_notify(NOTIFY_UUID)
+                self._confirm_pending(written, read)
+
+                # In stream mode the subscription stays open for unsolicited frames
+                if not self.stream_mode:
+                    await self._async_stop_notify(client)
 
                 # If we had a timeout on realtime data, our connection might be bad.
                 # Recycle the client to force a fresh connection next time.
                 if timeout_occurred:
                     _LOGGER.debug("Timeouts occurred, forcing client recycle")
                     await self._cleanup_client()
+                elif self.transport == TRANSPORT_MQTT:
+                    # Readings arrive over Wi-Fi, do not hold a BLE connection slot
+                    await self._cleanup_client()
 
-            return self.data
+            self.breaker.record_success()
 
+        except UpdateFailed:
+            raise
         except asyncio.TimeoutError:
             await self._cleanup_client()
+            self.breaker.record_failure(time.monotonic())
             raise UpdateFailed("Update timed out")
         except BleakError as func_call_error:
             await self._cleanup_client()
+            self.breaker.record_failure(time.monotonic())
             raise UpdateFailed(f"Bluetooth error: {func_call_error}") from func_call_error
         except Exception as e:
             await self._cleanup_client()
+            self.breaker.record_failure(time.monotonic())
             raise UpdateFailed(f"Unexpected error: {repr(e)}") from e
 
+    def _check_breaker(self) -> None:
+        """Raise UpdateFailed while the circuit breaker holds off connection attempts."""
+        now = time.monotonic()
+        if not self.breaker.allow(now):
+            raise UpdateFailed(
+                f"Not connecting to {self.address} ({self.breaker.state}), "
+                f"next attempt in {self.breaker.time_until_next_attempt(now):.0f}s"
+            )
+
+    def _check_burst(self) -> None:
+        """Raise UpdateFailed while burst sampling holds the connection."""
+        if self.burst_active:
+            raise UpdateFailed(f"Burst sampling of {self.address} is running, try again when it ends")
+
+    async def _async_get_client(self):
+        """Return the connected client, establishing a new connection if needed."""
+        _LOGGER.debug(f"Coordinator updating: Check connection to {self.address}")
+
+        if self._client is None:
+            # Take over the connection left behind by the previous coordinator on reload
+            self._client = _async_adopt_client(self.hass, self.address)
+            if self._client is not None:
+                # Drops must reach this coordinator, not the one that parked the client
+                self._client.set_disconnected_callback(self._on_disconnected)
+
+        if self._client and self._client.is_connected:
+            return self._client
+
+        ble_device, source = self._async_pick_source()
+        _LOGGER.debug(f"Coordinator updating: Establishing NEW connection to {self.address} via {source}")
+        started = time.monotonic()
+        try:
+            client = await self._async_establish_connection(ble_device)
+        except Exception:
+            self.sources.record(source, False, None, time.monotonic())
+            raise
+        connected = time.monotonic()
+        self.sources.record(source, True, connected - started, connected)
+        self._client = client
+        if self.capture is not None:
+            self.capture.record(capture.DIRECTION_CONNECT)
+        _LOGGER.debug(f"Coordinator connected: {client.is_connected}")
+        return client
+
+    async def _async_establish_connection(self, ble_device: BLEDevice):
+        """Open a connection to the device (replaced by the replay harness)."""
+        return await establish_connection(
+            BleakClient,
+            ble_device,
+            ble_device.address,
+            disconnected_callback=self._on_disconnected,
+        )
+
+    @callback
+    def _async_pick_source(self) -> tuple[BLEDevice, str | None]:
+        """Return the device path of the best scoring connectable adapter or proxy."""
+        now = time.monotonic()
+        best = None
+        best_score = -math.inf
+        for scanner_device in bluetooth.async_scanner_devices_by_address(self.hass, self.address, connectable=True):
+            source = scanner_device.scanner.source
+            score = self.sources.score(
+                source, scanner_device.advertisement.rssi, free_slots(source), now
+            )
+            if score > best_score:
+                best, best_score = scanner_device, score
+
+        if best is None:
+            details = self.ble_device.details if isinstance(self.ble_device.details, dict) else {}
+            return self.ble_device, details.get("source")
+        return best.ble_device, best.scanner.source
+
+    @callback
+    def async_register_advertisement_callback(self) -> CALLBACK_TYPE:
+        """Probe an unreachable device early when it is seen advertising."""
+        return bluetooth.async_register_callback(
+            self.hass,
+            self._async_advertisement_received,
+            bluetooth.BluetoothCallbackMatcher(address=self.address, connectable=True),
+            bluetooth.BluetoothScanningMode.PASSIVE,
+        )
+
+    @callback
+    def _async_advertisement_received(
+        self, service_info: bluetooth.BluetoothServiceInfoBleak, change: bluetooth.BluetoothChange
+    ) -> None:
+        """Half-open the breaker when the device is back in range."""
+        now = time.monotonic()
+        if now - self._last_probe_at < BREAKER_ADVERTISEMENT_PROBE_INTERVAL:
+            return
+        if self.breaker.probe():
+            self._last_probe_at = now
+            _LOGGER.debug(f"{self.address} is advertising again, probing connection")
+            self.hass.async_create_task(self.async_request_refresh())
+
+    def _on_disconnected(self, client) -> None:
+        """Forget the notification subscription of a dropped connection."""
+        _LOGGER.debug(f"Disconnected from {self.address}")
+        if self.capture is not None:
+            self.capture.record(capture.DIRECTION_DISCONNECT)
+        if self._notify_client is client:
+            self._notify_client = None
+
+    async def _async_start_notify(self, client):
+        """Subscribe to notifications unless already subscribed on this client."""
+        if self._notify_client is client:
+            return
+        await client.start_notify(NOTIFY_UUID, self._notification_handler)
+        self._notify_client = client
+
+    async def _async_stop_notify(self, client):
+        """Unsubscribe from notifications."""
+        if self._notify_client is not client:
+            return
+        self._notify_client = None
+        if client.is_connected:
+            await client.stop_notify(NOTIFY_UUID)
+
+    def _update_transport(self) -> str:
+        """Pick the transport for realtime readings and record switches."""
+        transport = TRANSPORT_BLE
+        if self.mqtt_ingest is not None and self._age(self.mqtt_ingest.last_frame_at) < MQTT_STALE_TIMEOUT:
+            transport = TRANSPORT_MQTT
+
+        if transport != self.transport:
+            _LOGGER.info(f"Switching realtime readings of {self.address} from {self.transport} to {transport}")
+            self.transport = transport
+            self.transport_switches += 1
+            self.transport_changed_at = dt_util.utcnow()
+        return transport
+
+    @staticmethod
+    def _age(timestamp: float | None) -> float:
+        """Return seconds since a monotonic timestamp (infinite if never)."""
+        if timestamp is None:
+            return math.inf
+        return time.monotonic() - timestamp
+
+    def _notification_handler(self, sender, data: bytearray):
+        """Route a notification to the request waiting for it."""
+        _LOGGER.debug(f"Received notification: {data.hex()}")
+        if self.capture is not None:
+            self.capture.record(capture.DIRECTION_RX, bytes(data))
+        if len(data) < 6:
+            return
+
+        if self._history_stream is not None:
+            # History chunks may be split across notifications
+            self._history_stream.feed(data)
+            return
+
+        cmd_id = data[4:6].hex()
+        future = self._response_futures.get(cmd_id)
+        if future is not None and not future.done():
+            future.set_result(data)
+        elif cmd_id == RESPONSE_REALTIME and self.stream_mode and not self.burst_active:
+            # Unsolicited realtime frame pushed by the device
+            self._async_handle_pushed_frame(data)
+
+    @callback
+    def _async_handle_pushed_frame(self, data: bytes):
+        """Update readings from a frame the device sent without a request."""
+        cmd_id = data[4:6].hex()
+        if cmd_id == RESPONSE_REALTIME:
+            self._parse_realtime(data)
+            if self.buckets is not None and not self._take_bucket_closed():
+                return
+        elif cmd_id == RESPONSE_SETTINGS:
+            self._parse_settings(data)
+        elif cmd_id == RESPONSE_SOUND:
+            self._parse_sound(data)
+        else:
+            return
+        self.async_update_listeners()
+
+    @callback
+    def _async_handle_mqtt_frame(self, data: bytes):
+        """Handle a frame received over MQTT."""
+        if self.capture is not None:
+            self.capture.record(capture.DIRECTION_MQTT, data)
+        # Switch back from BLE polling as soon as MQTT recovers
+        self._update_transport()
+        self._async_handle_pushed_frame(data)
+
+    async def async_start_mqtt_ingest(self):
+        """Start receiving readings over MQTT if enabled and provisioned."""
+        self.async_stop_mqtt_ingest()
+        if not self.options.get(CONF_MQTT_INGEST, DEFAULT_MQTT_INGEST):
+            return
+
+        data = self.entry.data
+        if CONF_AES_KEY not in data or CONF_AES_IV not in data:
+            _LOGGER.warning(
+                f"MQTT ingest enabled for {self.address} but the device has not been "
+                "provisioned with an AES key, use the configure_device service first"
+            )
+            return
+
+        topic = self.options.get(CONF_MQTT_TOPIC, DEFAULT_MQTT_TOPIC).format(
+            address=self.address.replace(":", "").lower()
+        )
+        try:
+            ingest = HTRAMMqttIngest(
+                self.hass,
+                topic,
+                utils.decode_aes_key(data[CONF_AES_KEY]),
+                data[CONF_AES_IV].encode("utf-8"),
+                self._async_handle_mqtt_frame,
+            )
+        except ValueError as err:
+            _LOGGER.error(f"Invalid AES key or IV for {self.address}: {err}")
+            return
+
+        if await ingest.async_start():
+            self.mqtt_ingest = ingest
+
+    async def async_start_capture(self):
+        """Start recording raw traffic if the capture option is enabled."""
+        if not self.options.get(CONF_CAPTURE, DEFAULT_CAPTURE):
+            return
+        name = f"{self.address.replace(':', '').lower()}_{dt_util.utcnow():%Y%m%d_%H%M%S}.htrc"
+        writer = capture.CaptureWriter(
+            self.hass, self.hass.config.path(CAPTURE_DIR, name), self.address, CAPTURE_MAX_BYTES
+        )
+        try:
+            await writer.async_open()
+        except OSError as err:
+            _LOGGER.error(f"Could not start capture of {self.address}: {err}")
+            return
+        self.capture = writer
+
+    async def async_stop_capture(self):
+        """Flush and close the capture file."""
+        if self.capture is not None:
+            writer, self.capture = self.capture, None
+            await writer.async_close()
+
+    @callback
+    def async_stop_mqtt_ingest(self):
+        """Stop receiving readings over MQTT."""
+        if self.mqtt_ingest is not None:
+            self.mqtt_ingest.async_stop()
+            self.mqtt_ingest = None
+
+    async def _async_request(self, client, command: bytes, response_id: str, timeout: float = 5.0) -> bytearray:
+        """Send a request and wait for the notification carrying its response."""
+        future = self.hass.loop.create_future()
+        self._response_futures[response_id] = future
+        try:
+            await self._async_write_frame(client, command)
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            if self._response_futures.get(response_id) is future:
+                del self._response_futures[response_id]
+
+    async def _async_write_chunk_size(self, client) -> int:
+        """Return the largest write the connection carries in one packet."""
+        if client is not self._mtu_client:
+            backend = getattr(client, "_backend", None)
+            if hasattr(backend, "_acquire_mtu"):
+                # BlueZ only reports the negotiated MTU after it has been acquired
+                try:
+                    await backend._acquire_mtu()
+                except Exception as err:
+                    _LOGGER.debug(f"Could not acquire MTU from {self.address}: {err}")
+            self._mtu_client = client
+
+        char = self._write_characteristic(client)
+        size = getattr(char, "max_write_without_response_size", None) or client.mtu_size - 3
+        return max(size, DEFAULT_WRITE_CHUNK_SIZE)
+
+    @staticmethod
+    def _write_characteristic(client):
+        """Return the write characteristic if the services have been resolved."""
+        return client.services.get_characteristic(WRITE_UUID) if client.services else None
+
+    @staticmethod
+    def _write_response(char, preferred: bool) -> bool:
+        """Return the write mode to use, falling back to the one the characteristic supports."""
+        properties = getattr(char, "properties", None)
+        if not properties:
+            return preferred
+        if preferred:
+            return "write" in properties
+        return "write-without-response" not in properties
+
+    async def _async_write_frame(self, client, frame: bytes):
+        """Write a frame, splitting it into MTU-sized chunks when it does not fit."""
+        async with self._write_lock:
+            chunk_size = await self._async_write_chunk_size(client)
+            char = self._write_characteristic(client)
+            if len(frame) <= chunk_size:
+                if self.capture is not None:
+                    self.capture.record(capture.DIRECTION_TX, bytes(frame))
+                await client.write_gatt_char(WRITE_UUID, frame, response=self._write_response(char, False))
+                return
+
+            _LOGGER.debug(f"Writing {len(frame)} byte frame to {self.address} in {chunk_size} byte chunks")
+            # Chunks are written in order under the write lock so no other frame can interleave,
+            # and writing with response (where the characteristic supports it) paces them at the
+            # rate the device acknowledges.
+            response = self._write_response(char, True)
+            for offset in range(0, len(frame), chunk_size):
+                chunk = frame[offset:offset + chunk_size]
+                if self.capture is not None:
+                    self.capture.record(capture.DIRECTION_TX, bytes(chunk))
+                await client.write_gatt_char(WRITE_UUID, chunk, response=response)
+
+    @property
+    def burst_active(self) -> bool:
+        """Return True while burst sampling is running."""
+        return self._burst_task is not None and not self._burst_task.done()
+
+    @callback
+    def async_start_burst(self, duration: float, interval: float) -> None:
+        """Sample realtime data at a high rate for a limited time."""
+        if self.burst_active:
+            self._burst_task.cancel()
+        self._burst_task = self.hass.async_create_background_task(
+            self._async_burst(duration, interval), f"{DOMAIN} burst {self.address}"
+        )
+
+    async def _async_burst(self, duration: float, interval: float):
+        """Hold one connection and request only realtime frames until the burst ends."""
+        loop = self.hass.loop
+        end = loop.time() + duration
+        buffer: list[tuple[float, bytearray]] = []
+        next_publish = loop.time() + BURST_PUBLISH_INTERVAL
+        _LOGGER.info(f"Starting {duration}s burst sampling of {self.address} every {interval}s")
+
+        try:
+            async with self._lock:
+                client = await self._async_get_client()
+                await self._async_start_notify(client)
+                try:
+                    while (started := loop.time()) < end:
+                        try:
+                            data = await self._async_request(client, CMD_GET_REALTIME, RESPONSE_REALTIME)
+                            buffer.append((time.monotonic(), data))
+                        except asyncio.TimeoutError:
+                            _LOGGER.debug("Timeout waiting for burst realtime data")
+
+                        # Entities are updated at a bounded rate, not per sample
+                        if loop.time() >= next_publish:
+                            self._publish_burst(buffer)
+                            next_publish = loop.time() + BURST_PUBLISH_INTERVAL
+
+                        await asyncio.sleep(max(0, started + interval - loop.time()))
+                finally:
+                    self._publish_burst(buffer)
+                    if not self.stream_mode:
+                        await self._async_stop_notify(client)
+        except (BleakError, asyncio.TimeoutError) as err:
+            _LOGGER.warning(f"Burst sampling of {self.address} stopped: {err}")
+            await self._cleanup_client()
+        else:
+            _LOGGER.info(f"Burst sampling of {self.address} finished")
+
+    def _publish_burst(self, buffer: list[tuple[float, bytearray]]):
+        """Parse buffered burst samples and notify listeners once."""
+        if not buffer:
+            return
+        for sample_time, data in buffer:
+            self._parse_realtime(data, sample_time)
+        buffer.clear()
+        # Also reschedules the regular poll relative to this update
+        self.async_set_updated_data(self.data)
+
+    @callback
+    def async_start_history_sync(self) -> None:
+        """Download the device history in the background unless already running."""
+        if self._history_task is not None and not self._history_task.done():
+            return
+        self._history_task = self.hass.async_create_background_task(
+            self.async_sync_history(), f"{DOMAIN} history {self.address}"
+        )
+
+    async def async_sync_history(self) -> dict:
+        """Download records logged since the last import and backfill them as statistics."""
+        try:
+            self._check_breaker()
+            self._check_burst()
+        except UpdateFailed as err:
+            return {"status": "unavailable", "error": str(err)}
+
+        since = await history.async_get_resume_time(
+            self.hass, self.address, timedelta(days=HISTORY_MAX_DAYS)
+        )
+        _LOGGER.debug(f"Downloading history of {self.address} since {since}")
+
+        try:
+            async with self._lock:
+                client = await self._async_get_client()
+                await self._async_start_notify(client)
+                self._history_stream = history.HistoryStream()
+                try:
+                    await self._async_write_frame(client, history.build_history_request(since))
+                    chunks, complete = await self._history_stream.async_collect(HISTORY_CHUNK_TIMEOUT)
+                finally:
+                    self._history_stream = None
+                    if not self.stream_mode:
+                        await self._async_stop_notify(client)
+        except (BleakError, asyncio.TimeoutError) as err:
+            _LOGGER.warning(f"History download from {self.address} failed: {err}")
+            await self._cleanup_client()
+            self.breaker.record_failure(time.monotonic())
+            return {"status": "error", "error": str(err)}
+        self.breaker.record_success()
+
+        # Decoding a month of records is too slow for the event loop
+        statistics, records, newest = await self.hass.async_add_executor_job(
+            history.decode_chunks, chunks, since
+        )
+        history.async_import_statistics(self.hass, self.address, self.entry.title, statistics)
+
+        _LOGGER.info(
+            f"Imported {records} history record(s) of {self.address} since {since}"
+            + ("" if complete else ", download incomplete")
+        )
+        return {
+            "status": "success" if complete else "incomplete",
+            "records": records,
+            "since": since.isoformat(),
+            "until": newest.isoformat() if newest else None,
+        }
+
+    async def async_shutdown(self, handover: bool = False) -> None:
+        """Stop background work and release the connection.
+
+        With ``handover`` the live connection is parked for the coordinator
+        created by a reload instead of being disconnected. Only the first
+        call does anything, so a later call can not undo the handover.
+        """
+        if self._shut_down:
+            return
+        self._shut_down = True
+        await super().async_shutdown()
+        self._flush_debouncer.async_cancel()
+
+        for task in (self._burst_task, self._history_task, self._fetch_task):
+            if task is not None and not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+        # Fail requests still waiting for a response so an in-flight poll ends now
+        for future in self._response_futures.values():
+            if not future.done():
+                future.set_exception(UpdateFailed("Shutting down"))
+        self._response_futures.clear()
+
+        self.async_stop_mqtt_ingest()
+
+        if self.profiler is not None:
+            self.profiler.async_discard(self)
+
+        if self.buckets is not None:
+            # The next coordinator continues the partial hour instead of importing it twice
+            await self._buckets_store.async_save(self.buckets.as_dict())
+
+        async with self._lock:
+            client = self._client
+            if handover and client is not None and client.is_connected:
+                try:
+                    # The notification handler is bound to this coordinator
+                    await self._async_stop_notify(client)
+                except BleakError:
+                    await self._cleanup_client()
+                else:
+                    self._client = None
+                    _async_park_client(self.hass, self.address, client)
+            else:
+                await self._cleanup_client()
+
+        await self.async_stop_capture()
+        # The next coordinator (after a reload) loads the queue from disk
+        await self.pending.async_save()
+
+    async def async_handle_stop(self, event: Event) -> None:
+        """Disconnect when Home Assistant stops."""
+        await self.async_shutdown()
+        await async_disconnect_parked_client(self.hass, self.address)
+
     async def _cleanup_client(self):
         """Clean up the client connection."""
+        self._notify_client = None
         if self._client:
             try:
                 await self._client.disconnect()
@@ -163,7 +995,7 @@ class HTRAMDataUpdateCoordinator(DataUpdateCoordinator):
                 pass
             self._client = None
 
-    def _parse_realtime(self, data: bytearray):
+    def _parse_realtime(self, data: bytearray, now: float | None = None):
         # Validation
         if len(data) < 13:
             _LOGGER.warning(f"Realtime data too short: {len(data)}")
@@ -182,18 +1014,86 @@ class HTRAMDataUpdateCoordinator(DataUpdateCoordinator):
 
         charging = data[12]
 
-        self.data["co2"] = co2
-        self.data["temperature"] = temp
-        self.data["humidity"] = hum
+        if now is None:
+            now = time.monotonic()
+        self._realtime_at = now
+        # CO2 moving across an alarm threshold is always published immediately
+        alarm_crossed = crosses_threshold(
+            self._filters["co2"].value, co2, (self.data.get("alarm_low"), self.data.get("alarm_high"))
+        )
+
+        self.data["co2"] = self._filters["co2"].update(co2, now, force=alarm_crossed)
+        self.data["temperature"] = self._filters["temperature"].update(temp, now)
+        self.data["humidity"] = self._filters["humidity"].update(hum, now)
         self.data["battery"] = batt
         self.data["charging"] = charging == 1
 
+        self._raw_co2 = co2
+        self._update_level(now)
+
+        if self.stats is not None:
+            self._update_stats(now, co2)
+
+        if self.buckets is not None:
+            self._update_buckets(now, {"co2": co2, "temperature": temp, "humidity": hum})
+
+    def _update_buckets(self, now: float, values: dict[str, float]):
+        """Add a raw reading to the buckets and import completed hours."""
+        when = dt_util.utcnow() - timedelta(seconds=time.monotonic() - now)
+        if self.buckets.add(when, values):
+            self._bucket_closed = True
+            self._import_statistics()
+
+    def _import_statistics(self):
+        """Import the hours the buckets have completed."""
+        completed = self.buckets.pop_completed()
+        if completed:
+            history.async_import_statistics(self.hass, self.address, self.entry.title, completed)
+
+    def _update_level(self, now: float):
+        """Track the CO2 level and fire an event when it changes."""
+        low = self.data.get("alarm_low")
+        high = self.data.get("alarm_high")
+        if self._raw_co2 is None or low is None or high is None:
+            return
+
+        change = self._level_tracker.update(now, self._raw_co2, low, high)
+        self.data["co2_level"] = self._level_tracker.level
+        if change is None:
+            return
+
+        previous, level = change
+        _LOGGER.debug(f"CO2 level of {self.address} changed from {previous} to {level}")
+        self.hass.bus.async_fire(
+            EVENT_CO2_LEVEL_CHANGED,
+            {
+                "address": self.address,
+                "level": level,
+                "previous_level": previous,
+                "co2": self._raw_co2,
+                "alarm_low": low,
+                "alarm_high": high,
+            },
+        )
+
+    def _update_stats(self, now: float, co2: int):
+        """Feed a raw CO2 reading into the rolling statistics."""
+        stats = self.stats
+        stats.add(now, co2, self.data.get("alarm_high"))
+
+        self.data["co2_average"] = stats.average
+        self.data["co2_peak"] = stats.peak
+        self.data["co2_rate"] = stats.rate
+        self.data["co2_time_above_high"] = stats.time_above_high
+        self.data["air_change_rate"] = stats.air_change_rate
+
     def _parse_sound(self, data: bytearray):
         if len(data) < 10:
              _LOGGER.warning(f"Sound data too short: {len(data)}")
              return
         is_off = data[9] == 0 
         self.data["mute"] = is_off 
+        self._sound_at = time.monotonic()
 
     def _parse_settings(self, data: bytearray):
         if len(data) < 13:
@@ -208,172 +1108,170 @@ class HTRAMDataUpdateCoordinator(DataUpdateCoordinator):
         self.data["alarm_high"] = high
         self.data["screen_off"] = screen_off 
 
-    async def async_set_mute(self, mute: bool):
-        """Set mute state."""
-        # Use verified hardcoded packets from Java source
-        cmd = CMD_SET_SOUND_OFF if mute else CMD_SET_SOUND_ON
-        await self._send_command(cmd)
-        self.data["mute"] = mute
+        self._settings_at = time.monotonic()
+
+        # Thresholds may have changed on the device itself
+        self._update_level(self._settings_at)
+
+    async def async_load_buckets(self) -> None:
+        """Continue the statistics bucket and hour left open before a reload or restart."""
+        if self.buckets is not None and (data := await self._buckets_store.async_load()):
+            self.buckets.restore(data)
+
+    async def async_load_pending(self) -> None:
+        """Load setting writes queued before a restart and show their values."""
+        await self.pending.async_load()
+        self.data.update(self.pending.values)
+
+    @callback
+    def _async_queue_write(self, values: dict[str, Any]) -> None:
+        """Queue setting changes, showing them until the device confirms them.
+
+        Returns without waiting for the device; the write goes out with the
+        next exchange, or right away if the device can be reached.
+        """
+        for field, value in values.items():
+            self.pending.set(field, value)
+        self.data.update(values)
         self.async_update_listeners()
+        self._flush_debouncer.async_schedule_call()
 
-    async def async_set_temp_unit(self, celsius: bool):
-        """Set temperature unit."""
-        cmd = CMD_SET_TEMP_UNIT_C if celsius else CMD_SET_TEMP_UNIT_F
-        await self._send_command(cmd)
-        # Update local state optimistically
-        self.data["temp_unit"] = "C" if celsius else "F"
+    async def _async_flush_pending(self) -> None:
+        """Write the queued settings now if the device can be reached."""
+        if not self.pending or self.burst_active:
+            # The burst loop owns the connection; the next poll writes them
+            return
+        try:
+            await self._async_fetch(set())
+        except UpdateFailed as err:
+            _LOGGER.debug(f"Pending writes to {self.address} wait for the next connection: {err}")
+            return
         self.async_update_listeners()
 
-    async def _send_command(self, command: bytes):
-        """Send a command to the device."""
-        # This is tricky because we might not be connected if we are outside the update loop.
-        # We need a quick connection.
-        from bleak import BleakClient
-        from bleak_retry_connector import establish_connection
-        ble_device = bluetooth.async_ble_device_from_address(self.hass, self.address, connectable=True)
-        _LOGGER.debug(f"Sending command {command.hex()} to {self.address}")
-        
-        # Reuse existing client if possible
-        if self._client and self._client.is_connected:
-            client = self._client
-            await client.write_gatt_char(WRITE_UUID, command, response=False)
-            _LOGGER.debug("Command sent successfully (REUSED connection)")
-        else:
-             # If not connected during an action, we must connect.
-             # We should probably update self._client to keep it persistent too?
-            _LOGGER.debug("Sending command: Establishing NEW connection")
-            client = await establish_connection(BleakClient, ble_device, self.address)
-            self._client = client
-            try:
-                await client.write_gatt_char(WRITE_UUID, command, response=False)
-                _LOGGER.debug("Command sent successfully")
-            except Exception:
-                # If command fails, perhaps we should disconnect to be clean?
-                # But for now let's hope it stays open for next poll?
-                # Actually if we just opened it, we might want to keep it open for consistency with the new policy.
-                 raise
-            # finally:
-            #    await client.disconnect() <-- REMOVED
+    async def _async_write_pending(self, client) -> dict[str, Any]:
+        """Send the queued settings and return the values written."""
+        writes = self.pending.values
+        frames = []
+        if "mute" in writes:
+            # Use verified hardcoded packets from Java source
+            frames.append(CMD_SET_SOUND_OFF if writes["mute"] else CMD_SET_SOUND_ON)
+        if "temp_unit" in writes:
+            frames.append(CMD_SET_TEMP_UNIT_C if writes["temp_unit"] == "C" else CMD_SET_TEMP_UNIT_F)
+        if "alarm_low" in writes or "alarm_high" in writes:
+            if self._settings_at is None:
+                # The thresholds frame also carries the unchanged values, so read them first
+                self._parse_settings(await self._async_request(client, CMD_GET_SETTINGS, RESPONSE_SETTINGS))
+            frames.append(
+                self._thresholds_frame(
+                    writes.get("alarm_low", self.data.get("alarm_low", 800)),
+                    writes.get("alarm_high", self.data.get("alarm_high", 1000)),
+                    writes.get("screen_off", self.data.get("screen_off", 0)),
+                )
+            )
+        elif "screen_off" in writes:
+            frames.append(self._screen_off_frame(writes["screen_off"]))
 
-    async def async_set_screen_off(self, minutes: int):
-         # Create command for screen off
-         # Header: 7B 41 00 0B 42 43 04 00 20 00 00 00 00 00 7D (Example from java for submitScreenOffTime)
-         # But wait, java:
-         # Logger.e("send command：4243 submitScreenOffTime", new Object[0]);
-         # byte[] bArr = {123, 65, 0, 11, 66, 67, 4, 0, 32, 0, 0, 0, 0, 0, 125};
-         # bArr[10] = bArrShortToByteArray[1];
-         # bArr[11] = bArrShortToByteArray[0];
-         # CRC at 12, 13
-         
-         # Note: Java array is:
-         # 0: 123 (7B)
-         # 1: 65 (41)
-         # ...
-         # 8: 32 (0x20) -> This seems to be a mask or type?
-         # 9: 0
-         # 10: High Byte of value? NO, ShortToByteArray: bArr[i2] = (byte) (i & 255); -> Little Endian?
-         # bArr[10] = (byte) ((i & MotionEventCompat.ACTION_POINTER_INDEX_MASK) >> 8); -> High byte!
-         # Wait `shortToByteArray` impl in java:
-         # bArr[i2] = (byte) (i & 255);
-         # bArr[i2 + 1] = (byte) ((i & ... ) >> 8);
-         # So index 0 is Lo, index 1 is Hi.
-         # But then usage:
-         # bArr[10] = bArrShortToByteArray[1]; (High Byte)
-         # bArr[11] = bArrShortToByteArray[0]; (Low Byte)
-         # So Big Endian on the wire for these 2 bytes?
-         
-         val_hi = (minutes >> 8) & 0xFF
-         val_lo = minutes & 0xFF
-         
-         # Base Packet
-         #                7B    41    00    0B    42    43    04    00    20    00    [HI]  [LO]  [CRC_L] [CRC_H] 7D
-         packet = bytearray([0x7B, 0x41, 0x00, 0x0B, 0x42, 0x43, 0x04, 0x00, 0x20, 0x00, val_hi, val_lo])
-         
-         # Calculate CRC
-         crc = self._crc16(packet)
-         packet.append(crc & 0xFF)
-         packet.append((crc >> 8) & 0xFF)
-         packet.append(0x7D)
-         
-         await self._send_command(packet)
-         self.data["screen_off"] = minutes # Optimistic update
-         self.async_update_listeners()
+        for frame in frames:
+            await self._async_write_frame(client, frame)
+        _LOGGER.debug(f"Wrote pending settings {writes} to {self.address}")
+        self.pending.attempted(writes)
+        return writes
+
+    def _confirm_pending(self, written: dict[str, Any], read: set[str]) -> None:
+        """Drop the written settings the device reads back."""
+        for field, value in written.items():
+            part = PENDING_FIELDS[field]
+            if part is None or (part in read and self.data.get(field) == value):
+                self.pending.confirm(field, value)
+
+    async def async_set_mute(self, mute: bool):
+        """Set mute state."""
+        self._async_queue_write({"mute": mute})
+
+    async def async_set_temp_unit(self, celsius: bool):
+        """Set temperature unit."""
+        self._async_queue_write({"temp_unit": "C" if celsius else "F"})
 
     async def async_set_alarm_thresholds(self, low: int | None = None, high: int | None = None, screen_off: int | None = None):
         """Set alarm thresholds and screen off timer."""
-        # Get current values to fill in gaps
-        current_low = self.data.get("alarm_low", 800)
-        current_high = self.data.get("alarm_high", 1000)
-        current_screen_off = self.data.get("screen_off", 0)
-
-        new_low = low if low is not None else current_low
-        new_high = high if high is not None else current_high
-        new_screen_off = screen_off if screen_off is not None else current_screen_off
+        # Get current values (including queued ones) to fill in gaps
+        new_low = low if low is not None else self.data.get("alarm_low", 800)
+        new_high = high if high is not None else self.data.get("alarm_high", 1000)
 
         # Validate logic: Low < High
         if new_low >= new_high:
             _LOGGER.warning(f"Low threshold ({new_low}) must be less than High ({new_high})")
             return
 
-        # Build packet using "submitAlertValue" structure (Full Update)
-        # Header: 7B 41 00 0F 42 43 04 00 40 06 [Lov V] [Hi V] [Screen V] [CRC] 7D
-        # Len: 0x0F (15)
-        # Cmd: 42 43
-        # Magic: 04 00 40 06 (Matches Java submitAlertValue)
-        
+        values = {}
+        if low is not None:
+            values["alarm_low"] = low
+        if high is not None:
+            values["alarm_high"] = high
+        if screen_off is not None:
+            values["screen_off"] = screen_off
+        self._async_queue_write(values)
+
+    async def async_set_screen_off(self, minutes: int):
+        """Set screen off timer."""
+        self._async_queue_write({"screen_off": minutes})
+
+    def _thresholds_frame(self, low: int, high: int, screen_off: int) -> bytes:
+        """Build a frame setting both alarm thresholds and the screen off timer."""
+        # "submitAlertValue" structure (Full Update)
+        # Header: 7B 41 00 0F 42 43 04 00 40 06 [Low V] [Hi V] [Screen V] [CRC] 7D
+        # Len: 0x0F (15), Cmd: 42 43, Magic: 04 00 40 06 (Matches Java submitAlertValue)
+        # Values are 2 bytes Big Endian
         packet = bytearray([0x7B, 0x41, 0x00, 0x0F, 0x42, 0x43, 0x04, 0x00, 0x40, 0x06])
-        
-        # Low (2 bytes Big Endian)
-        packet.append((new_low >> 8) & 0xFF)
-        packet.append(new_low & 0xFF)
-        
-        # High (2 bytes Big Endian)
-        packet.append((new_high >> 8) & 0xFF)
-        packet.append(new_high & 0xFF)
-        
-        # Screen Off (2 bytes Big Endian) - Pass current value to preserve it (assuming 3rd arg is Screen Off)
-        packet.append((new_screen_off >> 8) & 0xFF)
-        packet.append(new_screen_off & 0xFF)
+        packet += low.to_bytes(2, "big")
+        packet += high.to_bytes(2, "big")
+        packet += screen_off.to_bytes(2, "big")
 
-        # CRC (Calculated on the first 16 bytes: Header(4) + Data(12))
         crc = self._crc16(packet)
         packet.append((crc >> 8) & 0xFF)
         packet.append(crc & 0xFF)
         packet.append(0x7D)
+        return bytes(packet)
 
-        await self._send_command(packet)
-        
-        # Optimistic update
-        self.data["alarm_low"] = new_low
-        self.data["alarm_high"] = new_high
-        self.data["screen_off"] = new_screen_off
-        self.async_update_listeners()
+    def _screen_off_frame(self, minutes: int) -> bytes:
+        """Build a frame setting the screen off timer."""
+        # "submitScreenOffTime" structure
+        # Header: 7B 41 00 0B 42 43 04 00 20 00 [VAL_HI] [VAL_LO] [CRC] 7D
+        # Java writes shortToByteArray()[1] then [0], so the value is Big Endian on the wire
+        packet = bytearray([0x7B, 0x41, 0x00, 0x0B, 0x42, 0x43, 0x04, 0x00, 0x20, 0x00])
+        packet += minutes.to_bytes(2, "big")
 
-    async def async_set_screen_off(self, minutes: int):
-         """Set screen off timer using dedicated command."""
-         # Use 'submitScreenOffTime' packet structure
-         # Header: 7B 41 00 0B 42 43 04 00 20 00 [VAL_HI] [VAL_LO] [CRC] 7D
-         # Magic: 20 00
-         
-         val_hi = (minutes >> 8) & 0xFF
-         val_lo = minutes & 0xFF
-         
-         packet = bytearray([0x7B, 0x41, 0x00, 0x0B, 0x42, 0x43, 0x04, 0x00, 0x20, 0x00, val_hi, val_lo])
-         
-         # CRC
-         crc = self._crc16(packet)
-         packet.append((crc >> 8) & 0xFF)
-         packet.append(crc & 0xFF)
-         packet.append(0x7D)
-         
-         await self._send_command(packet)
-         self.data["screen_off"] = minutes
-         self.async_update_listeners()
+        crc = self._crc16(packet)
+        packet.append((crc >> 8) & 0xFF)
+        packet.append(crc & 0xFF)
+        packet.append(0x7D)
+        return bytes(packet)
+
+    async def _send_command(self, command: bytes):
+        """Send a command to the device.
+
+        Uses the connection of the polls under the same lock, so a command
+        never opens a second connection, and respects the circuit breaker.
+        Fails right away during burst sampling instead of waiting for it.
+        The connection is kept open like the one opened by a poll.
+        """
+        _LOGGER.debug(f"Sending command {command.hex()} to {self.address}")
+        self._check_breaker()
+        self._check_burst()
+        async with self._lock:
+            try:
+                client = await self._async_get_client()
+                await self._async_write_frame(client, command)
+            except Exception:
+                await self._cleanup_client()
+                self.breaker.record_failure(time.monotonic())
+                raise
+        self.breaker.record_success()
+        _LOGGER.debug("Command sent successfully")
 
     async def async_sync_time(self):
         """Sync device time (UTC)."""
-        import datetime
-        now = datetime.datetime.utcnow()
+        now = dt_util.utcnow()
         
         # Format: YY MM DD HH mm ss (decimal values as bytes)
         # Packet: 7B 41 00 0C 22 42 01 00 [YY] [MM] [DD] [HH] [mm] [ss] [CRC] 7D
@@ -411,3 +1309,15 @@ class HTRAMDataUpdateCoordinator(DataUpdateCoordinator):
         packet = utils.construct_submit_aes_key(aes_key, aes_iv, mqtt_server)
         _LOGGER.debug(f"Provisioning MQTT: {mqtt_server}")
         await self._send_command(packet)
+
+        # Remember the credentials so the MQTT ingest can decrypt what the device publishes
+        self.hass.config_entries.async_update_entry(
+            self.entry,
+            data={
+                **self.entry.data,
+                CONF_MQTT_SERVER: mqtt_server,
+                CONF_AES_KEY: aes_key,
+                CONF_AES_IV: aes_iv,
+            },
+        )
+        await self.async_start_mqtt_ingest()
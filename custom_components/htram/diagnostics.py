@@ -0,0 +1,46 @@
+"""Diagnostics support for HTRAM."""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_AES_KEY, CONF_AES_IV, CONF_FLEET, DATA_FLEET
+from .coordinator import HTRAMDataUpdateCoordinator
+
+TO_REDACT = {CONF_AES_KEY, CONF_AES_IV}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    if entry.data.get(CONF_FLEET):
+        return {"fleet": hass.data[DATA_FLEET].values}
+
+    coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    breaker = coordinator.breaker
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "data": coordinator.data,
+        "last_update_success": coordinator.last_update_success,
+        "breaker": {
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "next_attempt_in": breaker.time_until_next_attempt(time.monotonic()),
+        },
+        "sources": coordinator.sources.as_dict(time.monotonic()),
+        "pending_writes": coordinator.pending.as_dict(),
+        "transport": {
+            "active": coordinator.transport,
+            "switches": coordinator.transport_switches,
+            "last_switch": coordinator.transport_changed_at,
+        },
+    }
@@ -0,0 +1,24 @@
+"""Base entity for HTRAM."""
+from __future__ import annotations
+
+from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import HTRAMDataUpdateCoordinator
+
+
+class HTRAMEntity(CoordinatorEntity[HTRAMDataUpdateCoordinator]):
+    """Entity of one HTRAM device, described by an entity description.
+
+    Descriptions are shared module level constants and the device info is
+    the coordinator's, so an entity only holds its own unique id.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator: HTRAMDataUpdateCoordinator, description: EntityDescription) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.address}_{description.key}"
+        self._attr_device_info = coordinator.device_info
@@ -0,0 +1,43 @@
+"""Significant-change filtering for HTRAM readings."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+
+class DeadbandFilter:
+    """Hold back readings that moved less than the deadband.
+
+    The last published value is kept until a reading differs from it by at
+    least ``deadband`` or until ``max_silence`` seconds have passed, so a
+    slowly drifting value is still refreshed periodically.
+    """
+
+    def __init__(self, deadband: float, max_silence: float) -> None:
+        """Initialize the filter."""
+        self.deadband = deadband
+        self.max_silence = max_silence
+        self.value: float | None = None
+        self._published_at = 0.0
+
+    def update(self, value: float | None, now: float, force: bool = False) -> float | None:
+        """Feed a raw reading and return the value that should be published."""
+        if (
+            force
+            or value is None
+            or self.value is None
+            or abs(value - self.value) >= self.deadband
+            or now - self._published_at >= self.max_silence
+        ):
+            self.value = value
+            self._published_at = now
+        return self.value
+
+
+def crosses_threshold(old: float | None, new: float | None, thresholds: Iterable[float | None]) -> bool:
+    """Return True if old and new lie on different sides of any threshold."""
+    if old is None or new is None:
+        return False
+    return any(
+        threshold is not None and (old < threshold) != (new < threshold)
+        for threshold in thresholds
+    )
@@ -0,0 +1,169 @@
+"""Building level aggregates over all HTRAM devices."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import heapq
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN, FLEET_UNIQUE_ID, SIGNAL_COORDINATOR_ADDED, SIGNAL_COORDINATOR_REMOVED
+from .coordinator import HTRAMDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _LazyHeap:
+    """Min-heap of one value per device with lazy deletion.
+
+    Updating a device pushes a new entry and leaves the old one in place;
+    outdated entries are skipped when they reach the top and the heap is
+    rebuilt once they outnumber the live ones.
+    """
+
+    def __init__(self, sign: int = 1) -> None:
+        """Initialize the heap (``sign=-1`` for a max-heap)."""
+        self._sign = sign
+        self._heap: list[tuple[float, int, str]] = []
+        self._current: dict[str, tuple[float, int]] = {}
+        self._version = 0
+
+    def set(self, address: str, value: float | None) -> None:
+        """Set or (with None) remove the value of a device."""
+        if value is None:
+            self._current.pop(address, None)
+        else:
+            current = self._current.get(address)
+            if current is not None and current[0] == value:
+                return
+            self._version += 1
+            self._current[address] = (value, self._version)
+            heapq.heappush(self._heap, (self._sign * value, self._version, address))
+
+        if len(self._heap) > 2 * len(self._current) + 16:
+            self._heap = [
+                (self._sign * value, version, address)
+                for address, (value, version) in self._current.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def top(self) -> tuple[float, str] | None:
+        """Return the extreme value and its device."""
+        heap = self._heap
+        while heap:
+            _, version, address = heap[0]
+            current = self._current.get(address)
+            if current is not None and current[1] == version:
+                return current[0], address
+            heapq.heappop(heap)
+        return None
+
+
+class HTRAMFleet:
+    """Maintain fleet aggregates incrementally from coordinator updates.
+
+    Each coordinator update only replaces that device's contribution: its
+    CO2 and battery in lazy heaps and its above-alarm flag in a counter, so
+    the cost of an update does not grow with the number of devices.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the fleet."""
+        self.hass = hass
+        self._co2 = _LazyHeap(sign=-1)
+        self._battery = _LazyHeap()
+        self._above_alarm: set[str] = set()
+        self._coordinators: dict[str, CALLBACK_TYPE] = {}
+        self._listeners: list[Callable[[], None]] = []
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self.values: dict[str, float | str | None] = {}
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, FLEET_UNIQUE_ID)},
+            name="HTRAM Fleet",
+            manufacturer="Honeywell",
+            model="Fleet aggregate",
+        )
+
+    @callback
+    def async_start(self) -> None:
+        """Follow all current and future coordinators."""
+        for coordinator in self.hass.data.get(DOMAIN, {}).values():
+            self._async_add(coordinator)
+        self._unsubs = [
+            async_dispatcher_connect(self.hass, SIGNAL_COORDINATOR_ADDED, self._async_add),
+            async_dispatcher_connect(self.hass, SIGNAL_COORDINATOR_REMOVED, self._async_remove),
+        ]
+        self._async_publish()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following the coordinators."""
+        for unsub in self._unsubs:
+            unsub()
+        for remove in self._coordinators.values():
+            remove()
+        self._coordinators.clear()
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call ``update_callback`` when an aggregate changes."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _async_add(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
+        """Follow a coordinator."""
+        if coordinator.address in self._coordinators:
+            return
+        self._coordinators[coordinator.address] = coordinator.async_add_listener(
+            lambda: self._async_update(coordinator)
+        )
+        self._async_update(coordinator)
+
+    @callback
+    def _async_remove(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
+        """Drop a coordinator and its contribution."""
+        if (remove := self._coordinators.pop(coordinator.address, None)) is None:
+            return
+        remove()
+        self._apply(coordinator.address, None, None, False)
+        self._async_publish()
+
+    @callback
+    def _async_update(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
+        """Replace the contribution of one device."""
+        data = coordinator.data if coordinator.last_update_success else {}
+        co2 = data.get("co2")
+        high = data.get("alarm_high")
+        self._apply(coordinator.address, co2, data.get("battery"), co2 is not None and high is not None and co2 >= high)
+        self._async_publish()
+
+    def _apply(self, address: str, co2: float | None, battery: float | None, above_alarm: bool) -> None:
+        """Update the heaps and the counter for one device."""
+        self._co2.set(address, co2)
+        self._battery.set(address, battery)
+        if above_alarm:
+            self._above_alarm.add(address)
+        else:
+            self._above_alarm.discard(address)
+
+    @callback
+    def _async_publish(self) -> None:
+        """Notify listeners if an aggregate changed."""
+        co2 = self._co2.top()
+        battery = self._battery.top()
+        values = {
+            "max_co2": co2[0] if co2 else None,
+            "max_co2_device": co2[1] if co2 else None,
+            "rooms_above_alarm": len(self._above_alarm),
+            "min_battery": battery[0] if battery else None,
+            "min_battery_device": battery[1] if battery else None,
+            "devices": len(self._coordinators),
+        }
+        if values == self.values:
+            return
+        self.values = values
+        for update_callback in list(self._listeners):
+            update_callback()
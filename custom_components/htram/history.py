@@ -0,0 +1,176 @@
+"""On-device history download and long-term statistics backfill."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .buckets import Aggregate
+from .const import DOMAIN, HISTORY_RECORD_SIZE, RESPONSE_HISTORY
+from .utils import CRC16
+
+_LOGGER = logging.getLogger(__name__)
+
+# Quantities imported as external statistics: name -> unit
+HISTORY_QUANTITIES = {
+    "co2": "ppm",
+    "temperature": "°C",
+    "humidity": "%",
+}
+
+
+def statistic_id(address: str, quantity: str) -> str:
+    """Return the external statistic id of a quantity of a device."""
+    return f"{DOMAIN}:{quantity}_{address.replace(':', '').lower()}"
+
+
+def build_history_request(start: datetime) -> bytes:
+    """Build the request for records logged since ``start`` (UTC, device clock format)."""
+    # Same date layout as the 2242 time sync: YY MM DD HH mm ss
+    content = bytearray([0x7B, 0x41, 0x00, 0x0D, 0x40, 0x46, 0x01])
+    content += bytes([start.year % 100, start.month, start.day, start.hour, start.minute, start.second])
+    content[3] = (len(content) - 1) & 0xFF
+    return bytes(content) + CRC16.crc16_bytes(content) + b"\x7D"
+
+
+@dataclass
+class HistoryStream:
+    """Reassemble notifications into history chunks and check their sequence.
+
+    Chunks can exceed the MTU, so frames are rebuilt from the length in
+    their header before they are queued.
+    """
+
+    chunks: asyncio.Queue = field(default_factory=asyncio.Queue)
+    _buffer: bytearray = field(default_factory=bytearray)
+
+    def feed(self, data: bytes) -> None:
+        """Add a notification, queueing every history frame it completes."""
+        if not self._buffer and not data.startswith(b"\x7B\x41"):
+            _LOGGER.debug(f"Dropping history fragment without a frame header: {data.hex()}")
+            return
+        self._buffer += data
+
+        while len(self._buffer) >= 4:
+            size = int.from_bytes(self._buffer[2:4], byteorder="big") + 4
+            if len(self._buffer) < size:
+                return
+            frame = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            if frame[-1] != 0x7D:
+                # Lost sync, the rest of the buffer cannot be trusted either
+                _LOGGER.debug(f"Discarding malformed history frame: {frame.hex()}")
+                self._buffer.clear()
+                return
+            if frame[4:6].hex() == RESPONSE_HISTORY:
+                self.chunks.put_nowait(frame)
+
+    async def async_collect(self, timeout: float) -> tuple[list[bytes], bool]:
+        """Collect chunks until the end marker.
+
+        Returns the chunks in order and whether the download completed. A gap
+        in the sequence or a silent device ends the download early; everything
+        before the gap is still usable.
+        """
+        chunks: list[bytes] = []
+        expected = 0
+        while True:
+            try:
+                frame = await asyncio.wait_for(self.chunks.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.debug(f"History download timed out after {len(chunks)} chunk(s)")
+                return chunks, False
+
+            if len(frame) < 11:
+                return chunks, False
+            sequence, count = frame[6], frame[7]
+            if sequence != expected:
+                _LOGGER.debug(f"History chunk {sequence} received, expected {expected}")
+                return chunks, False
+            if count == 0:
+                return chunks, True
+            chunks.append(frame)
+            expected = (expected + 1) & 0xFF
+
+
+def decode_chunks(chunks: list[bytes], since: datetime) -> tuple[dict[str, list[dict]], int, datetime | None]:
+    """Decode history chunks into hourly statistics.
+
+    Runs in the executor. Returns the statistics per quantity, the number of
+    records used and the time of the newest one.
+    """
+    hours: dict[datetime, dict[str, Aggregate]] = {}
+    used = 0
+    newest = None
+
+    for frame in chunks:
+        count = frame[7]
+        payload = frame[8:-3]
+        for index in range(min(count, len(payload) // HISTORY_RECORD_SIZE)):
+            record = payload[index * HISTORY_RECORD_SIZE:(index + 1) * HISTORY_RECORD_SIZE]
+            try:
+                when = datetime(2000 + record[0], record[1], record[2], record[3], record[4], record[5], tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            if when < since:
+                continue
+
+            co2 = int.from_bytes(record[6:8], byteorder="big")
+            temp = record[8] - 256 if record[8] > 128 else record[8]
+            values = {"co2": co2, "temperature": temp, "humidity": record[9]}
+
+            bucket = hours.setdefault(when.replace(minute=0, second=0), {})
+            for quantity, value in values.items():
+                bucket.setdefault(quantity, Aggregate()).add(value)
+            used += 1
+            if newest is None or when > newest:
+                newest = when
+
+    statistics: dict[str, list[dict]] = {quantity: [] for quantity in HISTORY_QUANTITIES}
+    for start in sorted(hours):
+        for quantity, aggregate in hours[start].items():
+            statistics[quantity].append(aggregate.row(start))
+    return statistics, used, newest
+
+
+async def async_get_resume_time(hass: HomeAssistant, address: str, max_age: timedelta) -> datetime:
+    """Return where the previous backfill left off (at most ``max_age`` ago)."""
+    from homeassistant.components.recorder import get_instance
+    from homeassistant.components.recorder.statistics import get_last_statistics
+
+    earliest = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - max_age
+    stat_id = statistic_id(address, "co2")
+    last = await get_instance(hass).async_add_executor_job(
+        get_last_statistics, hass, 1, stat_id, True, {"mean"}
+    )
+    if not last.get(stat_id):
+        return earliest
+
+    # Re-import the last hour, it may have been partial
+    start = last[stat_id][0]["start"]
+    if not isinstance(start, datetime):
+        start = dt_util.utc_from_timestamp(start)
+    return max(start, earliest)
+
+
+def async_import_statistics(hass: HomeAssistant, address: str, name: str, statistics: dict[str, list[dict]]) -> None:
+    """Queue hourly statistics for import by the recorder."""
+    # The recorder is only imported once statistics are written, not with the integration
+    from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+    for quantity, rows in statistics.items():
+        if not rows:
+            continue
+        metadata = {
+            "has_mean": True,
+            "has_sum": False,
+            "name": f"{name} {quantity}",
+            "source": DOMAIN,
+            "statistic_id": statistic_id(address, quantity),
+            "unit_of_measurement": HISTORY_QUANTITIES[quantity],
+        }
+        async_add_external_statistics(hass, metadata, rows)
@@ -0,0 +1,59 @@
+"""CO2 level tracking with hysteresis and dwell time."""
+from __future__ import annotations
+
+from .const import CO2_LEVELS, CO2_LEVEL_GOOD, CO2_LEVEL_WARNING, CO2_LEVEL_ALARM
+
+
+class CO2LevelTracker:
+    """Classify CO2 against the alarm thresholds and detect level changes.
+
+    Leaving a level downwards requires the reading to fall ``hysteresis`` ppm
+    below the threshold, and a new level is only committed once it has been
+    observed for ``dwell`` seconds, so readings hovering around a threshold
+    do not produce a stream of transitions.
+    """
+
+    def __init__(self, hysteresis: int, dwell: float) -> None:
+        """Initialize the tracker."""
+        self.hysteresis = hysteresis
+        self.dwell = dwell
+        self.level: str | None = None
+        self._candidate: str | None = None
+        self._candidate_since = 0.0
+
+    def _target(self, co2: int, low: int, high: int) -> str:
+        """Return the level for a reading, applying hysteresis to the current level."""
+        current = CO2_LEVELS.index(self.level) if self.level is not None else 0
+        low_threshold = low - self.hysteresis if current >= 1 else low
+        high_threshold = high - self.hysteresis if current >= 2 else high
+
+        if co2 >= high_threshold:
+            return CO2_LEVEL_ALARM
+        if co2 >= low_threshold:
+            return CO2_LEVEL_WARNING
+        return CO2_LEVEL_GOOD
+
+    def update(self, now: float, co2: int, low: int, high: int) -> tuple[str | None, str] | None:
+        """Feed a reading and return (previous, new) when the level changes."""
+        target = self._target(co2, low, high)
+
+        if target == self.level:
+            self._candidate = None
+            return None
+
+        if self.level is None:
+            # First classification is not a transition
+            self.level = target
+            return None
+
+        if target != self._candidate:
+            self._candidate = target
+            self._candidate_since = now
+
+        if now - self._candidate_since < self.dwell:
+            return None
+
+        previous = self.level
+        self.level = target
+        self._candidate = None
+        return previous, target
@@ -0,0 +1,119 @@
+"""MQTT ingest transport for HTRAM devices provisioned onto a local broker."""
+from __future__ import annotations
+
+import base64
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAME_HEAD = 0x7B
+FRAME_TAIL = 0x7D
+
+# Same signature as homeassistant.components.mqtt.async_subscribe
+SubscribeType = Callable[..., Awaitable[CALLBACK_TYPE]]
+
+
+def _ciphertext(payload: bytes) -> bytes:
+    """Return the ciphertext of a payload published as Base64 text or raw bytes.
+
+    Raw ciphertext is practically never valid Base64 that decodes to whole
+    AES blocks, so strict Base64 is tried first.
+    """
+    try:
+        decoded = base64.b64decode(payload, validate=True)
+    except ValueError:
+        return payload
+    return decoded if decoded and len(decoded) % 16 == 0 else payload
+
+
+class HTRAMMqttIngest:
+    """Receive encrypted device frames from the broker the device was provisioned with.
+
+    Payloads are AES-CBC encrypted with the key and IV sent by
+    ``async_provision_mqtt``. Decrypted payloads carry the same frames the
+    device sends over BLE notifications and are handed to ``frame_callback``.
+    The subscribe function can be replaced with a broker stand-in.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        topic: str,
+        aes_key: bytes,
+        aes_iv: bytes,
+        frame_callback: Callable[[bytes], None],
+        subscribe: SubscribeType | None = None,
+    ) -> None:
+        """Initialize the ingest."""
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        self.hass = hass
+        self.topic = topic
+        self._frame_callback = frame_callback
+        self._subscribe = subscribe
+        self._unsubscribe: CALLBACK_TYPE | None = None
+        # Cipher objects are immutable and reusable; each message only creates a decryptor
+        self._cipher = Cipher(algorithms.AES(aes_key), modes.CBC(aes_iv))
+        self._padding = padding.PKCS7(128)
+
+        self.frames = 0
+        self.errors = 0
+        self.last_frame_at: float | None = None
+
+    async def async_start(self) -> bool:
+        """Subscribe to the device topic."""
+        subscribe = self._subscribe
+        if subscribe is None:
+            from homeassistant.components import mqtt
+
+            if not await mqtt.async_wait_for_mqtt_client(self.hass):
+                _LOGGER.warning("MQTT integration is not available, MQTT ingest disabled")
+                return False
+            subscribe = mqtt.async_subscribe
+
+        self._unsubscribe = await subscribe(
+            self.hass, self.topic, self._async_message_received, qos=0, encoding=None
+        )
+        _LOGGER.debug(f"Subscribed to {self.topic}")
+        return True
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe from the device topic."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def decrypt(self, payload: bytes) -> bytes:
+        """Decrypt a payload and strip its PKCS7 padding."""
+        payload = _ciphertext(payload)
+
+        decryptor = self._cipher.decryptor()
+        padded = decryptor.update(payload) + decryptor.finalize()
+        unpadder = self._padding.unpadder()
+        return unpadder.update(padded) + unpadder.finalize()
+
+    @callback
+    def _async_message_received(self, msg: Any) -> None:
+        """Decrypt a message and pass the contained frame on."""
+        try:
+            frame = self.decrypt(msg.payload)
+        except ValueError as err:
+            self.errors += 1
+            _LOGGER.debug(f"Could not decrypt message on {msg.topic}: {err}")
+            return
+
+        if len(frame) < 6 or frame[0] != FRAME_HEAD or frame[-1] != FRAME_TAIL:
+            self.errors += 1
+            _LOGGER.debug(f"Ignoring malformed frame on {msg.topic}: {frame.hex()}")
+            return
+
+        self.frames += 1
+        self.last_frame_at = time.monotonic()
+        self._frame_callback(frame)
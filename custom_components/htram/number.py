@@ -1,13 +1,47 @@
 """Number platform for HTRAM."""
-from homeassistant.components.number import NumberEntity, NumberMode
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from homeassistant.components.number import NumberEntity, NumberEntityDescription, NumberMode
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import HTRAMDataUpdateCoordinator
+from .entity import HTRAMEntity
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTRAMNumberEntityDescription(NumberEntityDescription):
+    """Describes a HTRAM number."""
+
+    value_fn: Callable[[dict], float | None]
+    set_fn: Callable[[HTRAMDataUpdateCoordinator, int], Awaitable[None]]
+
+
+NUMBERS: tuple[HTRAMNumberEntityDescription, ...] = (
+    HTRAMNumberEntityDescription(
+        key="alarm_low",
+        translation_key="alarm_low",
+        native_step=50,
+        native_min_value=400,
+        native_max_value=1500,  # Practical limits
+        mode=NumberMode.BOX,
+        value_fn=lambda data: data.get("alarm_low", 800),
+        set_fn=lambda coordinator, value: coordinator.async_set_alarm_thresholds(low=value),
+    ),
+    HTRAMNumberEntityDescription(
+        key="alarm_high",
+        translation_key="alarm_high",
+        native_step=50,
+        native_min_value=800,
+        native_max_value=5000,
+        mode=NumberMode.BOX,
+        value_fn=lambda data: data.get("alarm_high", 1000),
+        set_fn=lambda coordinator, value: coordinator.async_set_alarm_thresholds(high=value),
+    ),
+)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -16,57 +50,18 @@ async def async_setup_entry(
 ) -> None:
     """Set up the number platform."""
     coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([
-        HTRAMAlarmLowNumber(coordinator),
-        HTRAMAlarmHighNumber(coordinator),
-    ])
-
-
-
-class HTRAMAlarmLowNumber(CoordinatorEntity, NumberEntity):
-    """Representation of HTRAM CO2 Alarm Low Threshold."""
-
-    def __init__(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_has_entity_name = True
-        self._attr_translation_key = "alarm_low"
-        self._attr_unique_id = f"{coordinator.address}_alarm_low"
-        self._attr_native_step = 50
-        self._attr_native_min_value = 400
-        self._attr_native_max_value = 1500 # Practical limits
-        self._attr_mode = NumberMode.BOX
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-        }
-
-    @property
-    def native_value(self) -> float | None:
-        return self.coordinator.data.get("alarm_low", 800)
-
-    async def async_set_native_value(self, value: float) -> None:
-        await self.coordinator.async_set_alarm_thresholds(low=int(value))
+    async_add_entities(HTRAMNumber(coordinator, description) for description in NUMBERS)
 
-class HTRAMAlarmHighNumber(CoordinatorEntity, NumberEntity):
-    """Representation of HTRAM CO2 Alarm High Threshold."""
+class HTRAMNumber(HTRAMEntity, NumberEntity):
+    """Representation of a HTRAM CO2 alarm threshold."""
 
-    def __init__(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_has_entity_name = True
-        self._attr_translation_key = "alarm_high"
-        self._attr_unique_id = f"{coordinator.address}_alarm_high"
-        self._attr_native_step = 50
-        self._attr_native_min_value = 800
-        self._attr_native_max_value = 5000
-        self._attr_mode = NumberMode.BOX
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-        }
+    entity_description: HTRAMNumberEntityDescription
 
     @property
     def native_value(self) -> float | None:
-        return self.coordinator.data.get("alarm_high", 1000)
+        """Return the threshold."""
+        return self.entity_description.value_fn(self.coordinator.data)
 
     async def async_set_native_value(self, value: float) -> None:
-        await self.coordinator.async_set_alarm_thresholds(high=int(value))
+        """Write the threshold to the device."""
+        await self.entity_description.set_fn(self.coordinator, int(value))
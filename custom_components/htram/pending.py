@@ -0,0 +1,93 @@
+"""Setting writes waiting to be confirmed by a HTRAM device."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, PENDING_MAX_ATTEMPTS, PENDING_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds the store waits before writing, batching changes made together
+SAVE_DELAY = 5
+
+
+class PendingWrites:
+    """Persisted queue of setting changes, at most one per field.
+
+    A later change of a field replaces the queued one. A field leaves the
+    queue when the device confirms the value, or after
+    ``PENDING_MAX_ATTEMPTS`` writes the device did not take, so changes made
+    while the device is unreachable survive restarts and are sent on the
+    next connection.
+    """
+
+    def __init__(self, hass: HomeAssistant, address: str) -> None:
+        """Initialize the queue."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, PENDING_STORAGE_VERSION, f"{DOMAIN}.pending.{address.replace(':', '').lower()}"
+        )
+        self._writes: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load the writes left from a previous run."""
+        if data := await self._store.async_load():
+            self._writes = data.get("writes", {})
+
+    async def async_remove(self) -> None:
+        """Delete the stored queue."""
+        self._writes = {}
+        await self._store.async_remove()
+
+    def __bool__(self) -> bool:
+        """Return True if a write is waiting."""
+        return bool(self._writes)
+
+    @property
+    def values(self) -> dict[str, Any]:
+        """Return the queued value of each field."""
+        return {field: write["value"] for field, write in self._writes.items()}
+
+    def set(self, field: str, value: Any) -> None:
+        """Queue a value, replacing one queued earlier for the field."""
+        self._writes[field] = {"value": value, "attempts": 0}
+        self._async_save()
+
+    def attempted(self, fields: dict[str, Any]) -> None:
+        """Count a write of these values, dropping fields out of attempts."""
+        for field, value in fields.items():
+            write = self._writes.get(field)
+            if write is None or write["value"] != value:
+                # Replaced while it was being written
+                continue
+            write["attempts"] += 1
+            if write["attempts"] >= PENDING_MAX_ATTEMPTS:
+                _LOGGER.warning(f"Giving up writing {field}={value} after {write['attempts']} attempts")
+                del self._writes[field]
+        self._async_save()
+
+    def confirm(self, field: str, value: Any) -> None:
+        """Remove a field once the device has the queued value."""
+        write = self._writes.get(field)
+        if write is not None and write["value"] == value:
+            del self._writes[field]
+            self._async_save()
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the queue for diagnostics."""
+        return {field: dict(write) for field, write in self._writes.items()}
+
+    async def async_save(self) -> None:
+        """Write the queue to disk now (e.g. before a reload reads it again)."""
+        await self._store.async_save(self._data_to_save())
+
+    def _async_save(self) -> None:
+        """Schedule writing the queue to disk."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {"writes": self.as_dict()}
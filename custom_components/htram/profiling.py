@@ -0,0 +1,209 @@
+"""On-demand profiling of HTRAM poll cycles.
+
+The profile covers the event loop thread while a cycle is in flight,
+including whatever else the loop runs while the cycle awaits the device.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import PROFILE_DIR, PROFILE_MAX_DURATION
+
+if TYPE_CHECKING:
+    from .coordinator import HTRAMDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Functions listed in the service response
+TOP_FUNCTIONS = 15
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collect the slow callback warnings asyncio logs in debug mode."""
+
+    def __init__(self) -> None:
+        """Initialize the handler."""
+        super().__init__(logging.WARNING)
+        self.records: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Keep slow callback messages."""
+        message = record.getMessage()
+        if message.startswith("Executing "):
+            self.records.append(message)
+
+
+class ProfileSession:
+    """Profile the next poll cycles of some coordinators.
+
+    Each coordinator runs its refresh (request/response exchange, parsing,
+    listener fan-out and entity state writes) inside ``cycle``. One
+    ``cProfile`` profiler is shared and only enabled while at least one
+    profiled cycle is running. It stays enabled while a cycle awaits the
+    device, so other callbacks and tasks the loop runs meanwhile are in the
+    profile too; look for the coordinator's functions rather than taking the
+    totals as the cost of a cycle. For the duration of the session the loop
+    runs in debug mode with ``slow_callback_duration`` set to the threshold,
+    and the callbacks asyncio reports as blocking are collected. The session
+    ends after ``PROFILE_MAX_DURATION`` even if cycles are left, so a device
+    that stops polling does not keep the loop in debug mode.
+
+    Coordinators without a session do a single ``None`` check per cycle.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: list[HTRAMDataUpdateCoordinator],
+        cycles: int,
+        threshold: float,
+    ) -> None:
+        """Initialize the session."""
+        self.hass = hass
+        self.threshold = threshold
+        self.path = hass.config.path(PROFILE_DIR, f"htram_{dt_util.utcnow():%Y%m%d_%H%M%S}.pstats")
+        self._remaining = {coordinator: cycles for coordinator in coordinators}
+        self._durations: dict[str, list[float]] = {coordinator.address: [] for coordinator in coordinators}
+        self._profiler = cProfile.Profile()
+        self._running = 0
+        self._slow = _SlowCallbackHandler()
+        self._loop_debug: tuple[bool, float] | None = None
+        self._error: str | None = None
+        self._unsub_expire: CALLBACK_TYPE | None = None
+        self._done: asyncio.Future = hass.loop.create_future()
+
+    @callback
+    def async_start(self) -> None:
+        """Attach to the coordinators and watch for blocking callbacks."""
+        loop = self.hass.loop
+        self._loop_debug = (loop.get_debug(), loop.slow_callback_duration)
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.threshold
+        logging.getLogger("asyncio").addHandler(self._slow)
+        self._unsub_expire = async_call_later(self.hass, PROFILE_MAX_DURATION, self._async_expire)
+
+        for coordinator in self._remaining:
+            coordinator.profiler = self
+        _LOGGER.info(f"Profiling {len(self._remaining)} HTRAM device(s), writing to {self.path}")
+
+    @contextlib.contextmanager
+    def cycle(self, coordinator: HTRAMDataUpdateCoordinator) -> Iterator[None]:
+        """Profile one refresh of a coordinator."""
+        if self._running == 0:
+            try:
+                self._profiler.enable()
+            except ValueError as err:
+                # Only one profiler can be active per thread (e.g. the profiler integration)
+                _LOGGER.warning(f"Could not profile {coordinator.address}: {err}")
+                self._error = str(err)
+                for other in list(self._remaining):
+                    self.async_discard(other)
+                yield
+                return
+        self._running += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._durations[coordinator.address].append(time.perf_counter() - started)
+            self._running -= 1
+            if self._running == 0:
+                self._profiler.disable()
+            # Gone if the session expired while the cycle ran
+            if coordinator in self._remaining:
+                self._remaining[coordinator] -= 1
+                if self._remaining[coordinator] <= 0:
+                    self.async_discard(coordinator)
+
+    @callback
+    def async_discard(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
+        """Stop profiling a coordinator, finishing the session after the last one."""
+        if self._remaining.pop(coordinator, None) is None:
+            return
+        coordinator.profiler = None
+        if not self._remaining:
+            self.hass.async_create_task(self._async_finish())
+
+    @callback
+    def _async_expire(self, _now: Any) -> None:
+        """End the session with the cycles profiled so far."""
+        self._unsub_expire = None
+        _LOGGER.warning(f"Profiling stopped after {PROFILE_MAX_DURATION} s with cycles left")
+        for coordinator in list(self._remaining):
+            self.async_discard(coordinator)
+
+    async def _async_finish(self) -> None:
+        """Restore the loop and write the profile."""
+        if self._unsub_expire is not None:
+            self._unsub_expire()
+            self._unsub_expire = None
+        if self._loop_debug is not None:
+            loop = self.hass.loop
+            loop.set_debug(self._loop_debug[0])
+            loop.slow_callback_duration = self._loop_debug[1]
+        logging.getLogger("asyncio").removeHandler(self._slow)
+        if self._error is not None:
+            self._done.set_result(None)
+            return
+
+        top = await self.hass.async_add_executor_job(self._write)
+        for message in self._slow.records:
+            _LOGGER.warning(f"Blocking callback during profiling: {message}")
+        _LOGGER.info(f"Profile of HTRAM poll cycles written to {self.path}")
+
+        self._done.set_result(
+            {
+                "path": self.path,
+                "cycle_seconds": {
+                    address: [round(duration, 4) for duration in durations]
+                    for address, durations in self._durations.items()
+                },
+                "slow_callbacks": self._slow.records,
+                "top_functions": top,
+            }
+        )
+
+    def _write(self) -> list[str]:
+        """Dump the stats file and summarize it (in the executor)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._profiler.dump_stats(self.path)
+
+        stream = io.StringIO()
+        try:
+            stats = pstats.Stats(self._profiler, stream=stream)
+        except TypeError:
+            # Nothing was recorded
+            return []
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        lines = stream.getvalue().splitlines()
+        # Skip the header up to the column titles
+        for index, line in enumerate(lines):
+            if line.lstrip().startswith("ncalls"):
+                return [line.strip() for line in lines[index + 1:] if line.strip()]
+        return []
+
+    async def async_wait(self) -> dict[str, Any]:
+        """Wait for the profiled cycles and return the report."""
+        report = await asyncio.shield(self._done)
+        if self._error is not None:
+            raise HomeAssistantError(f"Could not profile: {self._error}")
+        return report
+
+    @property
+    def active(self) -> bool:
+        """Return True until the report is written."""
+        return not self._done.done()
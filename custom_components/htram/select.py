@@ -1,13 +1,54 @@
 """Select platform for HTRAM."""
-from homeassistant.components.select import SelectEntity
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from homeassistant.components.select import SelectEntity, SelectEntityDescription
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import HTRAMDataUpdateCoordinator
+from .entity import HTRAMEntity
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTRAMSelectEntityDescription(SelectEntityDescription):
+    """Describes a HTRAM select."""
+
+    value_fn: Callable[[dict], str | None]
+    select_fn: Callable[[HTRAMDataUpdateCoordinator, str], Awaitable[None]]
+
+
+def _screen_off(data: dict) -> str | None:
+    """Return the screen off option.
+
+    The device reports 0 for always on and a timeout in seconds (usually
+    120) for auto off.
+    """
+    if "screen_off" not in data:
+        return None
+    return "Always On" if data["screen_off"] == 0 else "Auto Off (2 min)"
+
+
+SELECTS: tuple[HTRAMSelectEntityDescription, ...] = (
+    HTRAMSelectEntityDescription(
+        key="temp_unit",
+        translation_key="temp_unit",
+        options=["Celsius", "Fahrenheit"],
+        icon="mdi:thermometer-cog",
+        value_fn=lambda data: "Celsius" if data.get("temp_unit", "C") == "C" else "Fahrenheit",
+        select_fn=lambda coordinator, option: coordinator.async_set_temp_unit(option == "Celsius"),
+    ),
+    HTRAMSelectEntityDescription(
+        key="screen_off",
+        translation_key="screen_off",
+        options=["Always On", "Auto Off (2 min)"],
+        icon="mdi:monitor-off",
+        value_fn=_screen_off,
+        select_fn=lambda coordinator, option: coordinator.async_set_screen_off(0 if option == "Always On" else 120),
+    ),
+)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -16,67 +57,18 @@ async def async_setup_entry(
 ) -> None:
     """Set up the select platform."""
     coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([
-        HTRAMTempUnitSelect(coordinator),
-        HTRAMScreenOffSelect(coordinator),
-    ])
-
-class HTRAMTempUnitSelect(CoordinatorEntity, SelectEntity):
-    """Representation of HTRAM Temperature Unit Select."""
-
-    def __init__(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_has_entity_name = True
-        self._attr_translation_key = "temp_unit"
-        self._attr_unique_id = f"{coordinator.address}_temp_unit"
-        self._attr_options = ["Celsius", "Fahrenheit"]
-        self._attr_icon = "mdi:thermometer-cog"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-        }
-
-    @property
-    def current_option(self) -> str | None:
-        """Return the current option."""
-        unit = self.coordinator.data.get("temp_unit", "C")
-        return "Celsius" if unit == "C" else "Fahrenheit"
-
-    async def async_select_option(self, option: str) -> None:
-        """Change the selected option."""
-        is_c = option == "Celsius"
-        await self.coordinator.async_set_temp_unit(is_c)
+    async_add_entities(HTRAMSelect(coordinator, description) for description in SELECTS)
 
-class HTRAMScreenOffSelect(CoordinatorEntity, SelectEntity):
-    """Representation of HTRAM Screen Off Select."""
+class HTRAMSelect(HTRAMEntity, SelectEntity):
+    """Representation of a HTRAM select."""
 
-    def __init__(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_has_entity_name = True
-        self._attr_translation_key = "screen_off"
-        self._attr_unique_id = f"{coordinator.address}_screen_off"
-        self._attr_options = ["Always On", "Auto Off (2 min)"]
-        self._attr_icon = "mdi:monitor-off"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-        }
+    entity_description: HTRAMSelectEntityDescription
 
     @property
     def current_option(self) -> str | None:
         """Return the current option."""
-        # Value from coordinator is int (minutes or seconds?)
-        # Java uses 120 (seconds?) for Auto Off, 0 for Always On.
-        # Coordinator reads value from device.
-        if "screen_off" not in self.coordinator.data:
-            return None
-            
-        val = self.coordinator.data["screen_off"]
-        # Assuming 0 is Always On, anything else is Auto Off (usually 120)
-        return "Always On" if val == 0 else "Auto Off (2 min)"
+        return self.entity_description.value_fn(self.coordinator.data)
 
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
-        # Map option to value
-        val = 0 if option == "Always On" else 120
-        await self.coordinator.async_set_screen_off(val)
+        await self.entity_description.select_fn(self.coordinator, option)
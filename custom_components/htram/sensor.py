@@ -1,7 +1,13 @@
 """Sensor platform for HTRAM."""
+from collections.abc import Callable
+from dataclasses import dataclass
+import time
+from typing import Any
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
@@ -9,14 +15,178 @@ from homeassistant.const import (
     CONCENTRATION_PARTS_PER_MILLION,
     PERCENTAGE,
     UnitOfTemperature,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .breaker import BREAKER_STATES
+from .const import (
+    DOMAIN,
+    CO2_LEVELS,
+    CONF_DERIVED_SENSORS,
+    CONF_FLEET,
+    CONF_MQTT_INGEST,
+    DATA_FLEET,
+    FLEET_UNIQUE_ID,
+    DEFAULT_DERIVED_SENSORS,
+    DEFAULT_MQTT_INGEST,
+    TRANSPORT_BLE,
+    TRANSPORT_MQTT,
+)
 from .coordinator import HTRAMDataUpdateCoordinator
+from .entity import HTRAMEntity
+from .fleet import HTRAMFleet
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTRAMSensorEntityDescription(SensorEntityDescription):
+    """Describes a HTRAM sensor."""
+
+    value_fn: Callable[[HTRAMDataUpdateCoordinator], Any]
+    attributes_fn: Callable[[HTRAMDataUpdateCoordinator], dict] | None = None
+    # Keep the entity available while the device is unreachable
+    always_available: bool = False
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTRAMFleetSensorEntityDescription(SensorEntityDescription):
+    """Describes a fleet aggregate sensor."""
+
+    # Fleet value naming the device the aggregate comes from
+    device_key: str | None = None
+
+
+def _reading(key: str) -> Callable[[HTRAMDataUpdateCoordinator], Any]:
+    """Return an accessor for a reading of the coordinator data."""
+    return lambda coordinator: coordinator.data.get(key)
+
+
+def _transport_attributes(coordinator: HTRAMDataUpdateCoordinator) -> dict:
+    """Return transport switch details."""
+    ingest = coordinator.mqtt_ingest
+    return {
+        "switches": coordinator.transport_switches,
+        "last_switch": coordinator.transport_changed_at,
+        "mqtt_frames": ingest.frames if ingest else 0,
+        "mqtt_errors": ingest.errors if ingest else 0,
+    }
+
+
+def _breaker_attributes(coordinator: HTRAMDataUpdateCoordinator) -> dict:
+    """Return backoff details."""
+    breaker = coordinator.breaker
+    return {
+        "consecutive_failures": breaker.failures,
+        "next_attempt_in": round(breaker.time_until_next_attempt(time.monotonic())),
+        "pending_writes": sorted(coordinator.pending.values),
+    }
+
+
+def _measurement(
+    key: str,
+    device_class: SensorDeviceClass | None,
+    unit: str,
+    precision: int = 0,
+) -> HTRAMSensorEntityDescription:
+    """Describe a measurement read from the coordinator data."""
+    return HTRAMSensorEntityDescription(
+        key=key,
+        translation_key=key,
+        device_class=device_class,
+        native_unit_of_measurement=unit,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=precision,
+        value_fn=_reading(key),
+    )
+
+
+SENSORS: tuple[HTRAMSensorEntityDescription, ...] = (
+    _measurement("co2", SensorDeviceClass.CO2, CONCENTRATION_PARTS_PER_MILLION),
+    _measurement("temperature", SensorDeviceClass.TEMPERATURE, UnitOfTemperature.CELSIUS, precision=1),
+    _measurement("humidity", SensorDeviceClass.HUMIDITY, PERCENTAGE),
+    _measurement("battery", SensorDeviceClass.BATTERY, PERCENTAGE),
+    HTRAMSensorEntityDescription(
+        key="co2_level",
+        translation_key="co2_level",
+        device_class=SensorDeviceClass.ENUM,
+        options=CO2_LEVELS,
+        icon="mdi:molecule-co2",
+        value_fn=_reading("co2_level"),
+    ),
+    HTRAMSensorEntityDescription(
+        key="connection",
+        translation_key="connection",
+        device_class=SensorDeviceClass.ENUM,
+        options=BREAKER_STATES,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:bluetooth-connect",
+        value_fn=lambda coordinator: coordinator.breaker.state,
+        attributes_fn=_breaker_attributes,
+        always_available=True,
+    ),
+    # A value that changes on every poll, so it is kept out of the measurement
+    # sensors (their states are only written when a reading changes)
+    HTRAMSensorEntityDescription(
+        key="last_reading_age",
+        translation_key="last_reading_age",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: (
+            round(age) if (age := coordinator.last_reading_age) is not None else None
+        ),
+    ),
+)
+
+# Computed by the coordinator from its rolling window of recent readings
+DERIVED_SENSORS: tuple[HTRAMSensorEntityDescription, ...] = (
+    _measurement("co2_average", SensorDeviceClass.CO2, CONCENTRATION_PARTS_PER_MILLION),
+    _measurement("co2_peak", SensorDeviceClass.CO2, CONCENTRATION_PARTS_PER_MILLION),
+    _measurement("co2_rate", None, "ppm/min", precision=1),
+    _measurement("co2_time_above_high", SensorDeviceClass.DURATION, UnitOfTime.MINUTES, precision=1),
+    _measurement("air_change_rate", None, "1/h", precision=2),
+)
+
+TRANSPORT_SENSOR = HTRAMSensorEntityDescription(
+    key="transport",
+    translation_key="transport",
+    device_class=SensorDeviceClass.ENUM,
+    options=[TRANSPORT_BLE, TRANSPORT_MQTT],
+    entity_category=EntityCategory.DIAGNOSTIC,
+    icon="mdi:swap-horizontal",
+    value_fn=lambda coordinator: coordinator.transport,
+    attributes_fn=_transport_attributes,
+)
+
+FLEET_SENSORS: tuple[HTRAMFleetSensorEntityDescription, ...] = (
+    HTRAMFleetSensorEntityDescription(
+        key="max_co2",
+        translation_key="fleet_max_co2",
+        device_class=SensorDeviceClass.CO2,
+        native_unit_of_measurement=CONCENTRATION_PARTS_PER_MILLION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        device_key="max_co2_device",
+    ),
+    HTRAMFleetSensorEntityDescription(
+        key="rooms_above_alarm",
+        translation_key="fleet_rooms_above_alarm",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    HTRAMFleetSensorEntityDescription(
+        key="min_battery",
+        translation_key="fleet_min_battery",
+        device_class=SensorDeviceClass.BATTERY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        device_key="min_battery_device",
+    ),
+)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -24,52 +194,87 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the sensor platform."""
+    if entry.data.get(CONF_FLEET):
+        fleet: HTRAMFleet = hass.data[DATA_FLEET]
+        async_add_entities(HTRAMFleetSensor(fleet, description) for description in FLEET_SENSORS)
+        return
+
     coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    
-    entities = [
-        HTRAMSensor(coordinator, "co2", "CO2", SensorDeviceClass.CO2, CONCENTRATION_PARTS_PER_MILLION),
-        HTRAMSensor(coordinator, "temperature", "Temperature", SensorDeviceClass.TEMPERATURE, UnitOfTemperature.CELSIUS),
-        HTRAMSensor(coordinator, "humidity", "Humidity", SensorDeviceClass.HUMIDITY, PERCENTAGE),
-        HTRAMSensor(coordinator, "battery", "Battery", SensorDeviceClass.BATTERY, PERCENTAGE),
-    ]
-    async_add_entities(entities)
-
-class HTRAMSensor(CoordinatorEntity, SensorEntity):
+
+    descriptions = list(SENSORS)
+    if entry.options.get(CONF_DERIVED_SENSORS, DEFAULT_DERIVED_SENSORS):
+        descriptions += DERIVED_SENSORS
+    if entry.options.get(CONF_MQTT_INGEST, DEFAULT_MQTT_INGEST):
+        descriptions.append(TRANSPORT_SENSOR)
+
+    async_add_entities(HTRAMSensor(coordinator, description) for description in descriptions)
+
+class HTRAMSensor(HTRAMEntity, SensorEntity):
     """Representation of a HTRAM Sensor."""
 
-    def __init__(
-        self,
-        coordinator: HTRAMDataUpdateCoordinator,
-        key: str,
-        name: str,
-        device_class: SensorDeviceClass,
-        unit: str,
-    ) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._key = key
-        self._attr_has_entity_name = True
-        self._attr_translation_key = key
-        self._attr_unique_id = f"{coordinator.address}_{key}"
-        self._attr_device_class = device_class
-        self._attr_native_unit_of_measurement = unit
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-        
-        # Set precision
-        if device_class == SensorDeviceClass.TEMPERATURE:
-             self._attr_suggested_display_precision = 1
-        else:
-             self._attr_suggested_display_precision = 0
-
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-            "name": "HTRAM Air Monitor",
-            "manufacturer": "Honeywell",
-            "model": "HTRAM-RM",
-            "connections": {(dr.CONNECTION_BLUETOOTH, coordinator.address)},
-        }
+    entity_description: HTRAMSensorEntityDescription
+
+    @property
+    def available(self) -> bool:
+        """Return if the entity is available."""
+        return self.entity_description.always_available or super().available
 
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        return self.coordinator.data.get(self._key)
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Return the attributes of the sensor."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator)
+
+
+class HTRAMFleetSensor(SensorEntity):
+    """Aggregate over all HTRAM devices, maintained by the fleet."""
+
+    entity_description: HTRAMFleetSensorEntityDescription
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, fleet: HTRAMFleet, description: HTRAMFleetSensorEntityDescription) -> None:
+        """Initialize the sensor."""
+        self._fleet = fleet
+        self.entity_description = description
+        # Aggregate and source device of the last written state
+        self._written = None
+        self._attr_unique_id = f"{FLEET_UNIQUE_ID}_{description.key}"
+        self._attr_device_info = fleet.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the fleet aggregates."""
+        self.async_on_remove(self._fleet.async_add_listener(self._handle_fleet_update))
+
+    @callback
+    def _handle_fleet_update(self) -> None:
+        """Write the state only if this aggregate changed."""
+        written = (self.native_value, self._device)
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        """Return the aggregate."""
+        return self._fleet.values.get(self.entity_description.key)
+
+    @property
+    def _device(self) -> str | None:
+        """Return the device the aggregate comes from."""
+        device_key = self.entity_description.device_key
+        return self._fleet.values.get(device_key) if device_key else None
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Return the device the value comes from."""
+        if self.entity_description.device_key is None:
+            return None
+        return {"address": self._device}
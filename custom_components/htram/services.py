@@ -0,0 +1,273 @@
+"""Services for the HTRAM integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import async_timeout
+import voluptuous as vol
+from bleak.exc import BleakError
+from bleak_retry_connector import BleakConnectionError, BleakNotFoundError
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_extract_config_entry_ids
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .const import (
+    DOMAIN,
+    BURST_MIN_INTERVAL,
+    BURST_MAX_DURATION,
+    PROVISION_TIMEOUT,
+    DEFAULT_PROVISION_CONCURRENCY,
+    PARTS,
+    PART_KEYS,
+    PART_REALTIME,
+    PROFILE_MAX_CYCLES,
+    PROFILE_RESPONSE_TIMEOUT,
+)
+from .coordinator import HTRAMDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_CONFIGURE_DEVICE = "configure_device"
+SERVICE_START_BURST = "start_burst"
+SERVICE_SYNC_HISTORY = "sync_history"
+SERVICE_REFRESH = "refresh"
+SERVICE_PROFILE = "profile"
+SERVICES = [
+    SERVICE_CONFIGURE_DEVICE,
+    SERVICE_START_BURST,
+    SERVICE_SYNC_HISTORY,
+    SERVICE_REFRESH,
+    SERVICE_PROFILE,
+]
+
+CONFIGURE_DEVICE_SCHEMA = cv.make_entity_service_schema({
+    vol.Optional("ssid"): cv.string,
+    vol.Optional("password"): cv.string,
+    vol.Optional("mqtt_server"): cv.string,
+    vol.Optional("aes_key"): cv.string,
+    vol.Optional("aes_iv"): cv.string,
+    vol.Optional("max_concurrent", default=DEFAULT_PROVISION_CONCURRENCY): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=10)
+    ),
+})
+
+START_BURST_SCHEMA = cv.make_entity_service_schema({
+    vol.Optional("duration", default=300): vol.All(
+        vol.Coerce(int), vol.Range(min=10, max=BURST_MAX_DURATION)
+    ),
+    vol.Optional("interval", default=5): vol.All(
+        vol.Coerce(float), vol.Range(min=BURST_MIN_INTERVAL, max=60)
+    ),
+})
+
+SYNC_HISTORY_SCHEMA = cv.make_entity_service_schema({})
+
+REFRESH_SCHEMA = cv.make_entity_service_schema({
+    vol.Optional("max_age", default=60): vol.All(vol.Coerce(float), vol.Range(min=0, max=86400)),
+    vol.Optional("parts", default=[PART_REALTIME]): vol.All(cv.ensure_list, [vol.In(PARTS)]),
+})
+
+PROFILE_SCHEMA = cv.make_entity_service_schema({
+    vol.Optional("cycles", default=5): vol.All(vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_CYCLES)),
+    vol.Optional("slow_callback_threshold", default=50): vol.All(
+        vol.Coerce(float), vol.Range(min=1, max=10000)
+    ),
+})
+
+
+async def async_get_target_coordinators(
+    hass: HomeAssistant, call: ServiceCall
+) -> list[HTRAMDataUpdateCoordinator]:
+    """Return the coordinators targeted by a service call (all if no target)."""
+    coordinators: dict[str, HTRAMDataUpdateCoordinator] = hass.data.get(DOMAIN, {})
+    if not any(key in call.data for key in ("device_id", "entity_id", "area_id")):
+        return list(coordinators.values())
+
+    entry_ids = await async_extract_config_entry_ids(hass, call)
+    return [coordinators[entry_id] for entry_id in entry_ids if entry_id in coordinators]
+
+
+async def _async_refresh(
+    coordinator: HTRAMDataUpdateCoordinator, parts: list[str], max_age: float
+) -> dict:
+    """Refresh the requested parts of one device and return them with their age."""
+    try:
+        await coordinator.async_fetch(set(parts), max_age)
+    except UpdateFailed as err:
+        result = {"status": "error", "error": str(err)}
+    else:
+        result = {"status": "success"}
+
+    result["data"] = {
+        key: coordinator.data.get(key) for part in parts for key in PART_KEYS[part]
+    }
+    # Seconds since each part was read, None if it never was
+    result["age"] = {
+        part: round(age, 1) if (age := coordinator.part_age(part)) != float("inf") else None
+        for part in parts
+    }
+    return result
+
+
+async def _async_provision(coordinator: HTRAMDataUpdateCoordinator, data: dict) -> dict[str, str]:
+    """Provision one device and describe the outcome."""
+    ssid = data.get("ssid")
+    password = data.get("password")
+    mqtt_server = data.get("mqtt_server")
+    aes_key = data.get("aes_key")
+    aes_iv = data.get("aes_iv")
+
+    try:
+        async with async_timeout.timeout(PROVISION_TIMEOUT):
+            if mqtt_server and aes_key and aes_iv:
+                await coordinator.async_provision_mqtt(mqtt_server, aes_key, aes_iv)
+                # Small delay between commands
+                await asyncio.sleep(1)
+
+            if ssid and password:
+                await coordinator.async_provision_wifi(ssid, password)
+    except asyncio.TimeoutError:
+        return {"status": "timeout"}
+    except (BleakNotFoundError, BleakConnectionError) as err:
+        return {"status": "connect_failed", "error": str(err)}
+    except UpdateFailed as err:
+        # The circuit breaker is holding off connection attempts
+        return {"status": "unavailable", "error": str(err)}
+    except BleakError as err:
+        return {"status": "error", "error": str(err)}
+    except Exception as err:
+        # One bad device must not discard the results of the others
+        _LOGGER.exception(f"Unexpected error provisioning {coordinator.address}")
+        return {"status": "error", "error": repr(err)}
+
+    return {"status": "success"}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services once."""
+    if hass.services.has_service(DOMAIN, SERVICE_CONFIGURE_DEVICE):
+        return
+
+    async def handle_configure_device(call: ServiceCall) -> ServiceResponse:
+        """Provision WiFi/MQTT credentials on the targeted devices concurrently."""
+        coordinators = await async_get_target_coordinators(hass, call)
+        # Each device is a separate connection, so stay within the adapter/proxy slots
+        semaphore = asyncio.Semaphore(call.data["max_concurrent"])
+
+        async def provision(coordinator: HTRAMDataUpdateCoordinator) -> dict[str, str]:
+            async with semaphore:
+                _LOGGER.debug(f"Provisioning {coordinator.address}")
+                return await _async_provision(coordinator, call.data)
+
+        results = await asyncio.gather(*(provision(coordinator) for coordinator in coordinators))
+        for coordinator, result in zip(coordinators, results):
+            if result["status"] != "success":
+                _LOGGER.warning(f"Provisioning {coordinator.address} failed: {result}")
+
+        return {
+            "results": {
+                coordinator.address: result
+                for coordinator, result in zip(coordinators, results)
+            }
+        }
+
+    async def handle_start_burst(call: ServiceCall) -> None:
+        """Start burst sampling on the targeted devices."""
+        for coordinator in await async_get_target_coordinators(hass, call):
+            coordinator.async_start_burst(call.data["duration"], call.data["interval"])
+
+    async def handle_sync_history(call: ServiceCall) -> ServiceResponse:
+        """Backfill the logged history of the targeted devices one at a time."""
+        coordinators = await async_get_target_coordinators(hass, call)
+        # The history request is not confirmed on all firmware, only send it where it was enabled
+        if disabled := [coordinator.entry.title for coordinator in coordinators if not coordinator.history_backfill]:
+            raise HomeAssistantError(f"History backfill is not enabled for {', '.join(disabled)}")
+
+        results = {}
+        # One long download per adapter slot at a time
+        for coordinator in coordinators:
+            results[coordinator.address] = await coordinator.async_sync_history()
+        return {"results": results}
+
+    async def handle_refresh(call: ServiceCall) -> ServiceResponse:
+        """Return fresh data, reading from the devices only what is older than max_age."""
+        coordinators = await async_get_target_coordinators(hass, call)
+        results = await asyncio.gather(
+            *(
+                _async_refresh(coordinator, call.data["parts"], call.data["max_age"])
+                for coordinator in coordinators
+            )
+        )
+        return {
+            "results": {
+                coordinator.address: result
+                for coordinator, result in zip(coordinators, results)
+            }
+        }
+
+    async def handle_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the next poll cycles of the targeted devices."""
+        coordinators = await async_get_target_coordinators(hass, call)
+        if not coordinators:
+            raise HomeAssistantError("No HTRAM devices to profile")
+        # Only one profiler can be active on the event loop thread
+        if any(coordinator.profiler is not None for coordinator in hass.data[DOMAIN].values()):
+            raise HomeAssistantError("A profile is already running")
+
+        # cProfile and pstats are only needed once somebody profiles
+        from .profiling import ProfileSession
+
+        session = ProfileSession(
+            hass, coordinators, call.data["cycles"], call.data["slow_callback_threshold"] / 1000
+        )
+        session.async_start()
+        if not call.return_response:
+            return None
+        try:
+            return await asyncio.wait_for(session.async_wait(), timeout=PROFILE_RESPONSE_TIMEOUT)
+        except asyncio.TimeoutError as err:
+            raise HomeAssistantError(
+                f"The profile is still running, it will be written to {session.path}"
+            ) from err
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CONFIGURE_DEVICE,
+        handle_configure_device,
+        schema=CONFIGURE_DEVICE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_BURST, handle_start_burst, schema=START_BURST_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SYNC_HISTORY,
+        handle_sync_history,
+        schema=SYNC_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REFRESH,
+        handle_refresh,
+        schema=REFRESH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        handle_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the integration services."""
+    for service in SERVICES:
+        hass.services.async_remove(DOMAIN, service)
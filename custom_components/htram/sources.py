@@ -0,0 +1,92 @@
+"""Scoring of the Bluetooth adapters and proxies that can reach a device."""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+try:
+    from habluetooth import get_manager
+except ImportError:  # Home Assistant before the habluetooth split
+    get_manager = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.3
+# Sources below this success rate (after MIN_ATTEMPTS) are demoted for DEMOTE_SECONDS
+DEMOTE_SUCCESS_RATE = 0.5
+MIN_ATTEMPTS = 3
+DEMOTE_SECONDS = 600
+
+
+@dataclass(slots=True)
+class SourceStats:
+    """Connection history of one adapter or proxy."""
+
+    attempts: int = 0
+    success_rate: float = 1.0
+    # Moving average of the connect time in seconds
+    rtt: float | None = None
+    demoted_until: float = 0.0
+
+
+class SourceScorer:
+    """Rank connectable sources by signal, reliability, latency and free slots."""
+
+    def __init__(self) -> None:
+        """Initialize the scorer."""
+        self.stats: dict[str, SourceStats] = {}
+
+    def record(self, source: str | None, success: bool, rtt: float | None, now: float) -> None:
+        """Record the outcome of a connection attempt through a source."""
+        if source is None:
+            return
+        stats = self.stats.setdefault(source, SourceStats())
+        stats.attempts += 1
+        stats.success_rate += EWMA_ALPHA * ((1.0 if success else 0.0) - stats.success_rate)
+        if rtt is not None:
+            stats.rtt = rtt if stats.rtt is None else stats.rtt + EWMA_ALPHA * (rtt - stats.rtt)
+
+        if stats.attempts >= MIN_ATTEMPTS and stats.success_rate < DEMOTE_SUCCESS_RATE:
+            _LOGGER.debug(f"Demoting source {source} (success rate {stats.success_rate:.2f})")
+            stats.demoted_until = now + DEMOTE_SECONDS
+            # Give it a fresh start once the demotion expires
+            stats.success_rate = DEMOTE_SUCCESS_RATE
+
+    def score(self, source: str, rssi: int | None, free_slots: int | None, now: float) -> float:
+        """Return a score for connecting through a source (higher is better)."""
+        stats = self.stats.get(source) or SourceStats()
+        score = (rssi if rssi is not None else -100) + 100
+        score += 50 * stats.success_rate
+        if stats.rtt is not None:
+            score -= 10 * stats.rtt
+        if free_slots is not None:
+            score += 5 * min(free_slots, 3) if free_slots else -100
+        if now < stats.demoted_until:
+            score -= 1000
+        return score
+
+    def as_dict(self, now: float) -> dict[str, dict]:
+        """Return the per-source history for diagnostics."""
+        return {
+            source: {
+                "attempts": stats.attempts,
+                "success_rate": round(stats.success_rate, 2),
+                "rtt": round(stats.rtt, 2) if stats.rtt is not None else None,
+                "demoted_for": max(0, round(stats.demoted_until - now)),
+            }
+            for source, stats in self.stats.items()
+        }
+
+
+def free_slots(source: str) -> int | None:
+    """Return the free connection slots of a source if the Bluetooth stack reports them."""
+    if get_manager is None:
+        return None
+    try:
+        allocations = get_manager().async_current_allocations(source)
+    except (AttributeError, RuntimeError):
+        return None
+    if not allocations:
+        return None
+    return allocations[0].free
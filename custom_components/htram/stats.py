@@ -0,0 +1,118 @@
+"""Incremental rolling statistics over recent HTRAM readings."""
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Sample:
+    """A single realtime reading kept in the rolling window."""
+
+    time: float
+    co2: int
+    # Seconds since the previous sample that are attributed to this one
+    duration: float
+    above_high: bool
+
+
+class RollingStats:
+    """Maintain CO2 statistics over a sliding time window in O(1) per sample.
+
+    Samples live in a deque evicted by age. Readings less than
+    ``min_interval`` seconds after the last kept sample are skipped, which
+    bounds the window to ``window / min_interval`` samples at any reading
+    rate while it still always covers ``window`` seconds. The average uses a
+    running sum, the peak a monotonic deque and the time above the high alarm
+    a running total of sample durations, so nothing is recomputed over the
+    window.
+    """
+
+    def __init__(self, window: float, min_interval: float, outdoor_co2: int) -> None:
+        """Initialize the statistics."""
+        self.window = window
+        self.min_interval = min_interval
+        self.outdoor_co2 = outdoor_co2
+        self._samples: deque[Sample] = deque()
+        # Candidates for the window maximum, in decreasing CO2 order
+        self._peaks: deque[Sample] = deque()
+        self._co2_sum = 0
+        self._above_high = 0.0
+
+    def add(self, now: float, co2: int, alarm_high: int | None) -> None:
+        """Add a realtime reading."""
+        duration = 0.0
+        if self._samples:
+            elapsed = now - self._samples[-1].time
+            if elapsed < self.min_interval:
+                return
+            duration = min(elapsed, self.window)
+        sample = Sample(now, co2, duration, alarm_high is not None and co2 >= alarm_high)
+
+        self._samples.append(sample)
+        self._co2_sum += co2
+        if sample.above_high:
+            self._above_high += duration
+        while self._peaks and self._peaks[-1].co2 <= co2:
+            self._peaks.pop()
+        self._peaks.append(sample)
+
+        while now - self._samples[0].time > self.window:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the oldest sample from the window."""
+        sample = self._samples.popleft()
+        self._co2_sum -= sample.co2
+        if sample.above_high:
+            self._above_high -= sample.duration
+        if self._peaks and self._peaks[0] is sample:
+            self._peaks.popleft()
+
+    @property
+    def average(self) -> float | None:
+        """Return the mean CO2 over the window."""
+        if not self._samples:
+            return None
+        return self._co2_sum / len(self._samples)
+
+    @property
+    def peak(self) -> int | None:
+        """Return the highest CO2 over the window."""
+        if not self._peaks:
+            return None
+        return self._peaks[0].co2
+
+    @property
+    def rate(self) -> float | None:
+        """Return the CO2 rate of change across the window in ppm/min."""
+        if len(self._samples) < 2:
+            return None
+        first, last = self._samples[0], self._samples[-1]
+        elapsed = last.time - first.time
+        if elapsed <= 0:
+            return None
+        return (last.co2 - first.co2) / elapsed * 60
+
+    @property
+    def time_above_high(self) -> float:
+        """Return the minutes spent at or above the high alarm within the window."""
+        return max(self._above_high, 0.0) / 60
+
+    @property
+    def air_change_rate(self) -> float | None:
+        """Estimate air changes per hour from CO2 decay towards outdoor level.
+
+        Uses the tracer gas decay method between the oldest and newest sample
+        in the window; only meaningful while CO2 is falling.
+        """
+        if len(self._samples) < 2:
+            return None
+        first, last = self._samples[0], self._samples[-1]
+        elapsed = last.time - first.time
+        start = first.co2 - self.outdoor_co2
+        end = last.co2 - self.outdoor_co2
+        if elapsed <= 0 or start <= 0 or end <= 0 or end >= start:
+            return None
+        return math.log(start / end) / (elapsed / 3600)
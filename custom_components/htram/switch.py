@@ -1,14 +1,36 @@
 """Switch platform for HTRAM."""
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from typing import Any
 
-from homeassistant.components.switch import SwitchEntity
+from homeassistant.components.switch import SwitchEntity, SwitchEntityDescription
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import HTRAMDataUpdateCoordinator
+from .entity import HTRAMEntity
+
+
+@dataclass(frozen=True, kw_only=True)
+class HTRAMSwitchEntityDescription(SwitchEntityDescription):
+    """Describes a HTRAM switch."""
+
+    value_fn: Callable[[dict], bool]
+    set_fn: Callable[[HTRAMDataUpdateCoordinator, bool], Awaitable[None]]
+
+
+SWITCHES: tuple[HTRAMSwitchEntityDescription, ...] = (
+    # Switch ON means mute is active (sound off); data["mute"] is True when muted
+    HTRAMSwitchEntityDescription(
+        key="mute",
+        translation_key="mute",
+        icon="mdi:volume-off",
+        value_fn=lambda data: data.get("mute", False),
+        set_fn=lambda coordinator, on: coordinator.async_set_mute(on),
+    ),
+)
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -17,38 +39,22 @@ async def async_setup_entry(
 ) -> None:
     """Set up the switch platform."""
     coordinator: HTRAMDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([HTRAMMuteSwitch(coordinator)])
-
-class HTRAMMuteSwitch(CoordinatorEntity, SwitchEntity):
-    """Representation of HTRAM Mute Switch."""
-
-    def __init__(self, coordinator: HTRAMDataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
-        self._attr_has_entity_name = True
-        self._attr_translation_key = "mute"
-        self._attr_unique_id = f"{coordinator.address}_mute"
-        self._attr_icon = "mdi:volume-off"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, coordinator.address)},
-        }
+    async_add_entities(HTRAMSwitch(coordinator, description) for description in SWITCHES)
+
+class HTRAMSwitch(HTRAMEntity, SwitchEntity):
+    """Representation of a HTRAM switch."""
+
+    entity_description: HTRAMSwitchEntityDescription
 
     @property
     def is_on(self) -> bool:
-        """Return true if switch is on.
-        Note: Switch ON means MUTE IS ACTIVE (Silent).
-        Switch OFF means MUTE IS INACTIVE (Sound is ON).
-        Wait, standard UX: "Mute" switch ON = No Sound.
-        """
-        # data["mute"] is boolean (True = Muted/Off, False = On)
-        # Verify coordinator logic: `is_off = data[9] == 0`. 
-        # App shows "Mute State" switch. If switch is ON -> Mute is ON (Sound OFF).
-        return self.coordinator.data.get("mute", False)
+        """Return true if switch is on."""
+        return self.entity_description.value_fn(self.coordinator.data)
 
     async def async_turn_on(self, **kwargs: Any) -> None:
-        """Turn the switch on (Mute)."""
-        await self.coordinator.async_set_mute(True)
+        """Turn the switch on."""
+        await self.entity_description.set_fn(self.coordinator, True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
-        """Turn the switch off (Unmute)."""
-        await self.coordinator.async_set_mute(False)
+        """Turn the switch off."""
+        await self.entity_description.set_fn(self.coordinator, False)
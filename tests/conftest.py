@@ -0,0 +1,65 @@
+"""Fixtures for HTRAM tests."""
+from collections.abc import AsyncGenerator
+from types import SimpleNamespace
+
+from bleak.backends.device import BLEDevice
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.htram.const import DOMAIN, WRITE_UUID
+from custom_components.htram.coordinator import HTRAMDataUpdateCoordinator
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components in every test."""
+    yield
+
+
+class FakeClient:
+    """BleakClient stand-in recording writes."""
+
+    def __init__(self, properties: list[str] | None = None, mtu_size: int = 23) -> None:
+        self.is_connected = True
+        self.mtu_size = mtu_size
+        self.writes: list[tuple[bytes, bool]] = []
+        char = SimpleNamespace(properties=properties or ["write", "write-without-response"])
+        self.services = SimpleNamespace(get_characteristic=lambda uuid: char if uuid == WRITE_UUID else None)
+        self.disconnected_callback = None
+
+    async def write_gatt_char(self, uuid: str, data: bytes, response: bool = False) -> None:
+        self.writes.append((bytes(data), response))
+
+    async def start_notify(self, uuid: str, callback) -> None:
+        pass
+
+    async def stop_notify(self, uuid: str) -> None:
+        pass
+
+    def set_disconnected_callback(self, callback) -> None:
+        self.disconnected_callback = callback
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+
+
+@pytest.fixture
+def mock_entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Return a device config entry added to hass."""
+    entry = MockConfigEntry(domain=DOMAIN, unique_id=ADDRESS, data={CONF_ADDRESS: ADDRESS})
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+async def coordinator(
+    hass: HomeAssistant, mock_entry: MockConfigEntry
+) -> AsyncGenerator[HTRAMDataUpdateCoordinator]:
+    """Return a coordinator that is shut down after the test."""
+    coordinator = HTRAMDataUpdateCoordinator(hass, BLEDevice(ADDRESS, "HTRAM", {}), mock_entry)
+    yield coordinator
+    await coordinator.async_shutdown()
@@ -0,0 +1,354 @@
+"""Replay captured device traffic through the coordinator on a virtual clock.
+
+The harness answers the coordinator's writes with the notifications that
+followed the matching write in a capture (see ``capture.py``), with the same
+delays, the same fragmentation and the same disconnects, while a virtual
+clock skips over idle time so a day of traffic replays in seconds::
+
+    async def main():
+        async with async_test_home_assistant() as hass:
+            report = await async_replay(hass, entry, "htram_captures/....htrc")
+        print(report.summary)
+
+    replay.run(main)
+
+Only ``loop.time()``, asyncio timers and the coordinator's monotonic clock
+are virtual; the wall clock used for statistics timestamps is not. The
+coordinator's stores are kept in memory, so a replay of a real device does
+not touch its queued writes or statistics.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+import selectors
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from bleak.exc import BleakError
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from custom_components.htram import coordinator as coordinator_module, pending as pending_module
+from custom_components.htram.capture import (
+    DIRECTION_CONNECT,
+    DIRECTION_DISCONNECT,
+    DIRECTION_MQTT,
+    DIRECTION_RX,
+    DIRECTION_TX,
+    HEADER,
+    MAGIC,
+    RECORD,
+    VERSION,
+    CaptureReader,
+)
+from custom_components.htram.const import DOMAIN
+from custom_components.htram.coordinator import HTRAMDataUpdateCoordinator
+
+# Real seconds spent looking for I/O before idle time is skipped, so
+# executor jobs still complete before the next timer fires
+IDLE_POLL = 0.001
+# CPU seconds of the event loop thread a poll cycle should stay under
+CYCLE_OVERHEAD_BUDGET = 0.005
+
+
+class _FastForwardSelector(selectors.DefaultSelector):
+    """Selector that advances a virtual clock instead of blocking."""
+
+    def __init__(self) -> None:
+        """Initialize the selector."""
+        super().__init__()
+        self.now = 0.0
+
+    def select(self, timeout: float | None = None):
+        """Return ready events, skipping the timeout if there are none."""
+        events = super().select(0 if timeout == 0 else IDLE_POLL)
+        if not events and timeout:
+            self.now += timeout
+        return events
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock jumps to the next timer when idle."""
+
+    def __init__(self) -> None:
+        """Initialize the loop."""
+        self._virtual = _FastForwardSelector()
+        super().__init__(self._virtual)
+
+    def time(self) -> float:
+        """Return the virtual time."""
+        return self._virtual.now
+
+
+def run(main: Callable[[], Awaitable[Any]]) -> Any:
+    """Run ``main`` on a new virtual clock loop."""
+    loop = VirtualClockLoop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def write_capture(path: str, address: str, records: list[tuple[float, int, bytes]]) -> None:
+    """Write a capture of ``(seconds, direction, payload)`` records, e.g. for tests."""
+    data = bytearray(HEADER.pack(MAGIC, VERSION, 0, bytes.fromhex(address.replace(":", "")), 0))
+    for seconds, direction, payload in records:
+        data += RECORD.pack(len(payload), int(seconds * 1e9), direction) + payload
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+class _VirtualTime:
+    """Stand-in for the ``time`` module of the coordinator."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the clock."""
+        self._loop = loop
+        self._offset = time.time() - loop.time()
+
+    def monotonic(self) -> float:
+        """Return the loop time."""
+        return self._loop.time()
+
+    def monotonic_ns(self) -> int:
+        """Return the loop time in nanoseconds."""
+        return int(self._loop.time() * 1e9)
+
+    def time(self) -> float:
+        """Return the wall clock advanced by the virtual time."""
+        return self._offset + self._loop.time()
+
+
+class _MemoryStore:
+    """Stand-in for ``Store`` that starts empty and never writes to disk."""
+
+    def __init__(self, hass: HomeAssistant, version: int, key: str) -> None:
+        """Initialize the store."""
+        self.key = key
+        self.data = None
+
+    async def async_load(self) -> Any:
+        """Return the data saved during this replay."""
+        return self.data
+
+    async def async_save(self, data: Any) -> None:
+        """Keep the data."""
+        self.data = data
+
+    def async_delay_save(self, data_func: Callable[[], Any], delay: float = 0) -> None:
+        """Keep the data right away."""
+        self.data = data_func()
+
+    async def async_remove(self) -> None:
+        """Drop the data."""
+        self.data = None
+
+
+class ReplaySession:
+    """Captured records and the position reached by the replay."""
+
+    def __init__(self, records: list[tuple[int, int, bytes]]) -> None:
+        """Initialize the session."""
+        self.records = records
+        self.cursor = 0
+        self.matched = 0
+        self.unmatched = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """Return True when no write is left to answer."""
+        return not any(direction == DIRECTION_TX for _, direction, _ in self.records[self.cursor:])
+
+    def connect(self) -> bool:
+        """Move to the next captured connection. Return False if there is none."""
+        for index in range(self.cursor, len(self.records)):
+            if self.records[index][1] == DIRECTION_CONNECT:
+                self.cursor = index + 1
+                return True
+        return False
+
+    def respond(self, frame: bytes) -> list[tuple[float, int, bytes]]:
+        """Return ``(delay, direction, payload)`` of what followed the matching write.
+
+        Writes are matched on their command id, so a changed request order
+        still gets the captured answers. Continuation chunks of a split
+        frame and writes the capture never saw get no answer.
+        """
+        if len(frame) < 6 or not frame.startswith(b"\x7B\x41"):
+            return []
+        command = frame[4:6]
+        for index in range(self.cursor, len(self.records)):
+            sent_at, direction, payload = self.records[index]
+            if direction == DIRECTION_TX and payload[4:6] == command:
+                break
+        else:
+            self.unmatched += 1
+            return []
+
+        self.matched += 1
+        responses = []
+        index += 1
+        while index < len(self.records):
+            timestamp, direction, payload = self.records[index]
+            if direction in (DIRECTION_TX, DIRECTION_CONNECT):
+                break
+            if direction in (DIRECTION_RX, DIRECTION_MQTT, DIRECTION_DISCONNECT):
+                responses.append(((timestamp - sent_at) / 1e9, direction, payload))
+            index += 1
+            if direction == DIRECTION_DISCONNECT:
+                break
+        self.cursor = index
+        return responses
+
+
+class ReplayClient:
+    """BleakClient stand-in answering writes from a replay session."""
+
+    def __init__(self, session: ReplaySession, loop: asyncio.AbstractEventLoop, disconnected_callback) -> None:
+        """Initialize the client."""
+        self._session = session
+        self._loop = loop
+        self._disconnected_callback = disconnected_callback
+        self._notify_callback = None
+        self._pending: list[asyncio.TimerHandle] = []
+        self.is_connected = True
+        self.mtu_size = 23
+        self.services = None
+
+    def set_disconnected_callback(self, callback) -> None:
+        """Report drops to another coordinator."""
+        self._disconnected_callback = callback
+
+    async def start_notify(self, uuid: str, callback) -> None:
+        """Subscribe to notifications."""
+        self._notify_callback = callback
+
+    async def stop_notify(self, uuid: str) -> None:
+        """Unsubscribe from notifications."""
+        self._notify_callback = None
+
+    async def write_gatt_char(self, uuid: str, data: bytes, response: bool = False) -> None:
+        """Schedule the captured answers to a write."""
+        if not self.is_connected:
+            raise BleakError("Not connected")
+        for delay, direction, payload in self._session.respond(bytes(data)):
+            self._pending.append(self._loop.call_later(delay, self._deliver, direction, payload))
+
+    def _deliver(self, direction: int, payload: bytes) -> None:
+        """Hand a captured notification to the subscriber or drop the link."""
+        if not self.is_connected:
+            return
+        if direction == DIRECTION_DISCONNECT:
+            self._drop()
+        elif self._notify_callback is not None:
+            self._notify_callback(None, bytearray(payload))
+
+    def _drop(self) -> None:
+        """Lose the connection like the captured device did."""
+        self.is_connected = False
+        for handle in self._pending:
+            handle.cancel()
+        self._pending.clear()
+        self._disconnected_callback(self)
+
+    async def disconnect(self) -> None:
+        """Close the connection."""
+        if self.is_connected:
+            self._drop()
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of a replay."""
+
+    cycles: int = 0
+    failures: int = 0
+    # Virtual seconds per poll cycle
+    latencies: list[float] = field(default_factory=list)
+    # CPU seconds the event loop thread spent per poll cycle
+    overhead: list[float] = field(default_factory=list)
+    matched: int = 0
+    unmatched: int = 0
+
+    @property
+    def summary(self) -> dict[str, Any]:
+        """Return the headline numbers."""
+        latencies = sorted(self.latencies)
+        overhead = sorted(self.overhead)
+        return {
+            "cycles": self.cycles,
+            "failures": self.failures,
+            "matched_writes": self.matched,
+            "unmatched_writes": self.unmatched,
+            "latency_median": statistics.median(latencies) if latencies else None,
+            "latency_p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+            "latency_max": latencies[-1] if latencies else None,
+            "overhead_median": statistics.median(overhead) if overhead else None,
+            "overhead_p95": overhead[int(0.95 * (len(overhead) - 1))] if overhead else None,
+            "over_budget": sum(1 for value in overhead if value > CYCLE_OVERHEAD_BUDGET),
+        }
+
+
+async def async_replay(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    path: str,
+    connect_latency: float = 1.0,
+    max_cycles: int | None = None,
+) -> ReplayReport:
+    """Drive a coordinator with a capture until the capture is used up."""
+    loop = hass.loop
+    with CaptureReader(path) as reader:
+        address = reader.header.address
+        records = list(reader.records())
+
+    session = ReplaySession(records)
+    device = SimpleNamespace(address=address, name="HTRAM replay", details={})
+    # The device is only reachable through the replay session
+    no_scanners = SimpleNamespace(
+        async_ble_device_from_address=lambda *args, **kwargs: None,
+        async_scanner_devices_by_address=lambda *args, **kwargs: [],
+    )
+
+    with patch.object(coordinator_module, "bluetooth", no_scanners), patch.object(
+        coordinator_module, "time", _VirtualTime(loop)
+    ), patch.object(coordinator_module, "Store", _MemoryStore), patch.object(pending_module, "Store", _MemoryStore):
+        coordinator = HTRAMDataUpdateCoordinator(hass, device, entry)
+
+        async def _async_establish_connection(ble_device):
+            await asyncio.sleep(connect_latency)
+            if not session.connect():
+                raise BleakError("No more connections in the capture")
+            return ReplayClient(session, loop, coordinator._on_disconnected)
+
+        coordinator._async_establish_connection = _async_establish_connection
+        # Registered like a set up device, so services can target it
+        hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+
+        report = ReplayReport()
+        interval = coordinator.update_interval.total_seconds()
+        while not session.exhausted and (max_cycles is None or report.cycles < max_cycles):
+            started = loop.time()
+            # Thread CPU time leaves out the idle polls of the virtual clock
+            # and the executor, so this is the Python cost of the cycle
+            cpu_started = time.thread_time()
+            await coordinator.async_refresh()
+            report.overhead.append(time.thread_time() - cpu_started)
+            report.cycles += 1
+            report.latencies.append(loop.time() - started)
+            if not coordinator.last_update_success:
+                report.failures += 1
+            await asyncio.sleep(interval)
+
+        await coordinator.async_shutdown()
+        hass.data[DOMAIN].pop(entry.entry_id)
+
+    report.matched = session.matched
+    report.unmatched = session.unmatched
+    return report
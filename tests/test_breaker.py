@@ -0,0 +1,85 @@
+"""Tests for the connection circuit breaker."""
+from unittest.mock import patch
+
+from custom_components.htram.breaker import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    CircuitBreaker,
+)
+
+
+def _breaker() -> CircuitBreaker:
+    return CircuitBreaker(base_delay=60, max_delay=900, failure_threshold=3, open_interval=3600)
+
+
+def test_failures_back_off_exponentially() -> None:
+    """Each failure doubles the delay, with jitter between half and full."""
+    breaker = _breaker()
+    with patch("custom_components.htram.breaker.random.uniform", return_value=1.0):
+        breaker.record_failure(0)
+        assert breaker.time_until_next_attempt(0) == 60
+        breaker.record_failure(0)
+        assert breaker.time_until_next_attempt(0) == 120
+
+    assert breaker.state == BREAKER_CLOSED
+    assert not breaker.allow(119)
+    assert breaker.allow(120)
+
+
+def test_jitter_stays_within_half_and_full_delay() -> None:
+    """The jittered delay never exceeds the nominal delay."""
+    for _ in range(100):
+        breaker = _breaker()
+        breaker.record_failure(0)
+        assert 30 <= breaker.time_until_next_attempt(0) <= 60
+
+
+def test_delay_is_capped() -> None:
+    """The backoff delay does not grow past max_delay."""
+    breaker = CircuitBreaker(base_delay=60, max_delay=100, failure_threshold=10, open_interval=3600)
+    with patch("custom_components.htram.breaker.random.uniform", return_value=1.0):
+        for _ in range(5):
+            breaker.record_failure(0)
+    assert breaker.time_until_next_attempt(0) == 100
+
+
+def test_opens_after_threshold_and_half_opens() -> None:
+    """The breaker opens after the threshold and allows one probe per interval."""
+    breaker = _breaker()
+    with patch("custom_components.htram.breaker.random.uniform", return_value=1.0):
+        for _ in range(3):
+            breaker.record_failure(0)
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.time_until_next_attempt(0) == 3600
+
+        assert breaker.allow(3600)
+        assert breaker.state == BREAKER_HALF_OPEN
+
+        # A failed probe opens the breaker again
+        breaker.record_failure(3600)
+        assert breaker.state == BREAKER_OPEN
+        assert not breaker.allow(3601)
+
+
+def test_probe_allows_immediate_attempt() -> None:
+    """An advertisement lets an open breaker try right away."""
+    breaker = _breaker()
+    assert not breaker.probe()
+    for _ in range(3):
+        breaker.record_failure(0)
+
+    assert breaker.probe()
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert breaker.allow(1)
+
+
+def test_success_closes() -> None:
+    """A success resets failures and the delay."""
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure(0)
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow(0)
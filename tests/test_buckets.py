@@ -0,0 +1,49 @@
+"""Tests for bucket aggregation."""
+from datetime import UTC, datetime, timedelta
+import json
+
+from custom_components.htram.buckets import BucketAggregator
+
+
+def _at(hour: int, minute: int, second: int = 0) -> datetime:
+    return datetime(2024, 1, 1, hour, minute, second, tzinfo=UTC)
+
+
+def test_bucket_closes_on_first_reading_after_it() -> None:
+    """A bucket is closed by the first reading of the next bucket."""
+    aggregator = BucketAggregator(timedelta(minutes=5))
+    assert not aggregator.add(_at(10, 0), {"co2": 800})
+    assert not aggregator.add(_at(10, 4, 59), {"co2": 900})
+    assert aggregator.add(_at(10, 5), {"co2": 1000})
+    assert aggregator.last_bucket["co2"] == {"start": _at(10, 0), "mean": 850, "min": 800, "max": 900}
+
+
+def test_hours_are_completed_once() -> None:
+    """Closed buckets roll up into hourly rows returned once."""
+    aggregator = BucketAggregator(timedelta(minutes=5))
+    aggregator.add(_at(10, 0), {"co2": 800, "temperature": None})
+    aggregator.add(_at(10, 30), {"co2": 1000})
+    assert aggregator.pop_completed() == {}
+
+    aggregator.add(_at(11, 0), {"co2": 600})
+    aggregator.add(_at(11, 5), {"co2": 600})
+    assert aggregator.pop_completed() == {
+        "co2": [{"start": _at(10, 0), "mean": 900, "min": 800, "max": 1000}]
+    }
+    assert aggregator.pop_completed() == {}
+
+
+def test_open_hour_survives_restore() -> None:
+    """A restored aggregator continues the open bucket and hour."""
+    aggregator = BucketAggregator(timedelta(minutes=5))
+    aggregator.add(_at(10, 0), {"co2": 800})
+    aggregator.add(_at(10, 7), {"co2": 1000})
+
+    restored = BucketAggregator(timedelta(minutes=5))
+    restored.restore(json.loads(json.dumps(aggregator.as_dict())))
+    restored.add(_at(10, 8), {"co2": 1200})
+    restored.add(_at(11, 0), {"co2": 600})
+    restored.add(_at(11, 5), {"co2": 600})
+    assert restored.pop_completed() == {
+        "co2": [{"start": _at(10, 0), "mean": 1000, "min": 800, "max": 1200}]
+    }
@@ -0,0 +1,93 @@
+"""Budgets for the integration import time and the Python cost of a poll cycle."""
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+from homeassistant.const import CONF_ADDRESS
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+
+from custom_components.htram.capture import DIRECTION_CONNECT, DIRECTION_RX, DIRECTION_TX
+from custom_components.htram.const import (
+    CMD_GET_REALTIME,
+    CMD_GET_SETTINGS,
+    CMD_GET_SOUND_STATUS,
+    CMD_HEARTBEAT,
+    DOMAIN,
+)
+
+from . import replay
+from .conftest import ADDRESS
+
+# Seconds importing the integration may take once Home Assistant has loaded
+# what it loads before any integration (and bluetooth, a dependency)
+IMPORT_TIME_BUDGET = 0.25
+# Modules only imported when the feature using them runs
+LAZY_MODULES = (
+    "numpy",
+    "homeassistant.components.recorder",
+    "homeassistant.components.mqtt",
+    "custom_components.htram.profiling",
+)
+
+IMPORT_SCRIPT = f"""
+import sys, time
+import homeassistant.components.bluetooth, homeassistant.helpers.config_validation
+import homeassistant.helpers.update_coordinator
+started = time.perf_counter()
+import custom_components.htram
+print(time.perf_counter() - started)
+print(",".join(name for name in {LAZY_MODULES!r} if name in sys.modules))
+"""
+
+REALTIME = bytes.fromhex("7b41000d4144010320152d030000007d")
+SOUND = bytes.fromhex("7b41000a27230100000100007d")
+SETTINGS = bytes.fromhex("7b41000f414304025803e8007800007d")
+CYCLES = 20
+
+
+def test_import_time_within_budget() -> None:
+    """Importing the integration stays cheap and leaves optional modules out."""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+        text=True,
+    )
+    elapsed, loaded = result.stdout.splitlines()
+    assert float(elapsed) < IMPORT_TIME_BUDGET
+    assert loaded == ""
+
+
+def test_poll_cycle_overhead_within_budget(tmp_path: Path, hass_storage: dict[str, Any]) -> None:
+    """Poll cycles replayed from a capture stay within CYCLE_OVERHEAD_BUDGET."""
+    records = [(0.0, DIRECTION_CONNECT, b"")]
+    for cycle in range(CYCLES):
+        start = 1.0 + cycle * 60
+        records += [
+            (start, DIRECTION_TX, CMD_HEARTBEAT),
+            (start + 0.5, DIRECTION_TX, CMD_GET_REALTIME),
+            (start + 0.6, DIRECTION_RX, REALTIME),
+            (start + 0.7, DIRECTION_TX, CMD_GET_SOUND_STATUS),
+            (start + 0.8, DIRECTION_RX, SOUND),
+            (start + 0.9, DIRECTION_TX, CMD_GET_SETTINGS),
+            (start + 1.0, DIRECTION_RX, SETTINGS),
+        ]
+    path = str(tmp_path / "capture.htrc")
+    replay.write_capture(path, ADDRESS, records)
+
+    async def main() -> replay.ReplayReport:
+        async with async_test_home_assistant() as hass:
+            entry = MockConfigEntry(domain=DOMAIN, unique_id=ADDRESS, data={CONF_ADDRESS: ADDRESS})
+            entry.add_to_hass(hass)
+            report = await replay.async_replay(hass, entry, path)
+            await hass.async_stop(force=True)
+        return report
+
+    report = replay.run(main)
+
+    assert report.cycles == CYCLES
+    assert report.failures == 0
+    assert report.unmatched == 0
+    assert report.summary["over_budget"] == 0
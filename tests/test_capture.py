@@ -0,0 +1,55 @@
+"""Tests for traffic captures."""
+import logging
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.htram.capture import (
+    DIRECTION_RX,
+    DIRECTION_TX,
+    HEADER,
+    RECORD,
+    CaptureReader,
+    CaptureWriter,
+)
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+async def test_records_read_back(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Written records are indexed in order."""
+    path = str(tmp_path / "capture.bin")
+    writer = CaptureWriter(hass, path, ADDRESS, 1024)
+    await writer.async_open()
+    writer.record(DIRECTION_TX, b"\x7b\x7d")
+    writer.record(DIRECTION_RX, b"\x7b\x01\x7d")
+    await writer.async_close()
+
+    with CaptureReader(path) as reader:
+        assert reader.header.address == ADDRESS
+        assert [(direction, payload) for _, direction, payload in reader.records()] == [
+            (DIRECTION_TX, b"\x7b\x7d"),
+            (DIRECTION_RX, b"\x7b\x01\x7d"),
+        ]
+
+
+async def test_full_capture_closes_once(
+    hass: HomeAssistant, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Records past the size limit close the file once and are dropped."""
+    path = str(tmp_path / "capture.bin")
+    writer = CaptureWriter(hass, path, ADDRESS, HEADER.size + RECORD.size + 4)
+    await writer.async_open()
+    writer.record(DIRECTION_RX, b"\x00" * 4)
+    with caplog.at_level(logging.WARNING):
+        for _ in range(10):
+            writer.record(DIRECTION_RX, b"\x00" * 4)
+        # An explicit close racing the one scheduled by the overflow
+        await writer.async_close()
+        await hass.async_block_till_done()
+    assert caplog.text.count("stopping") == 1
+    assert writer._file is None
+
+    with CaptureReader(path) as reader:
+        assert len(reader.index()[0]) == 1
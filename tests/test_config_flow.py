@@ -0,0 +1,77 @@
+"""Tests for the HTRAM config flow."""
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.components.bluetooth import BluetoothServiceInfo
+from homeassistant.config_entries import SOURCE_USER
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.htram.config_flow import CONF_ADDRESSES
+from custom_components.htram.const import DOMAIN
+
+
+@pytest.fixture
+def bypass_setup():
+    """Create entries without setting up the devices."""
+    with patch("custom_components.htram.async_setup_entry", return_value=True), patch(
+        "custom_components.htram.async_unload_entry", return_value=True
+    ):
+        yield
+
+
+def _discovery(address: str, name: str) -> BluetoothServiceInfo:
+    return BluetoothServiceInfo(
+        name=name,
+        address=address,
+        rssi=-60,
+        manufacturer_data={},
+        service_data={},
+        service_uuids=[],
+        source="local",
+    )
+
+
+@pytest.mark.usefixtures("mock_bluetooth", "bypass_setup")
+async def test_bulk_add_creates_an_entry_per_device(hass: HomeAssistant) -> None:
+    """Each selected device gets its own entry and configured devices are skipped."""
+    MockConfigEntry(domain=DOMAIN, unique_id="AA:AA:AA:AA:AA:01", title="Configured").add_to_hass(hass)
+    discovered = [
+        _discovery("AA:AA:AA:AA:AA:01", "HTRAM configured"),
+        _discovery("AA:AA:AA:AA:AA:02", "HTRAM office"),
+        _discovery("AA:AA:AA:AA:AA:03", "HTRAM bedroom"),
+        _discovery("AA:AA:AA:AA:AA:04", "HTRAM kitchen"),
+        _discovery("AA:AA:AA:AA:AA:05", "HTRAM hall"),
+    ]
+
+    with patch(
+        "custom_components.htram.config_flow.async_discovered_service_info", return_value=discovered
+    ), patch(
+        "custom_components.htram.config_flow.HTRAMConfigFlow._async_verify_connection",
+        AsyncMock(return_value=None),
+    ):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
+        assert result["type"] is FlowResultType.MENU
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {"next_step_id": "bulk_add"})
+        assert result["step_id"] == "bulk_add"
+
+        # Added elsewhere while the form was open
+        MockConfigEntry(domain=DOMAIN, unique_id="AA:AA:AA:AA:AA:05", title="Hall").add_to_hass(hass)
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {CONF_ADDRESSES: ["AA:AA:AA:AA:AA:02", "AA:AA:AA:AA:AA:03", "AA:AA:AA:AA:AA:04", "AA:AA:AA:AA:AA:05"]},
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    entries = hass.config_entries.async_entries(DOMAIN)
+    assert sorted(entry.unique_id for entry in entries) == [
+        "AA:AA:AA:AA:AA:01",
+        "AA:AA:AA:AA:AA:02",
+        "AA:AA:AA:AA:AA:03",
+        "AA:AA:AA:AA:AA:04",
+        "AA:AA:AA:AA:AA:05",
+    ]
+    assert {entry.unique_id: entry.title for entry in entries}["AA:AA:AA:AA:AA:04"] == "HTRAM kitchen"
+    assert not hass.config_entries.flow.async_progress_by_handler(DOMAIN)
@@ -0,0 +1,157 @@
+"""Tests for the HTRAM coordinator."""
+import asyncio
+from datetime import UTC, datetime
+import time
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+from bleak.backends.device import BLEDevice
+from bleak.exc import BleakError
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.htram.const import (
+    BREAKER_FAILURE_THRESHOLD,
+    CONF_STATISTICS_IMPORT,
+    PART_REALTIME,
+    PART_SETTINGS,
+)
+from custom_components.htram.coordinator import HTRAMDataUpdateCoordinator
+
+from .conftest import ADDRESS, FakeClient
+
+
+async def test_short_frame_written_without_response(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """Frames that fit one packet are written without response."""
+    client = FakeClient()
+    await coordinator._async_write_frame(client, b"\x7b\x41\x00\x05\x7d")
+    assert client.writes == [(b"\x7b\x41\x00\x05\x7d", False)]
+
+
+async def test_chunks_written_with_response_when_supported(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """Chunked frames are paced by write responses."""
+    client = FakeClient()
+    frame = bytes(range(50))
+    await coordinator._async_write_frame(client, frame)
+    assert b"".join(data for data, _ in client.writes) == frame
+    assert {response for _, response in client.writes} == {True}
+
+
+async def test_chunks_follow_characteristic_properties(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """Firmware without acknowledged writes gets chunks without response, and vice versa."""
+    client = FakeClient(properties=["write-without-response"])
+    await coordinator._async_write_frame(client, bytes(50))
+    assert {response for _, response in client.writes} == {False}
+
+    client = FakeClient(properties=["write"])
+    await coordinator._async_write_frame(client, bytes(5))
+    assert client.writes == [(bytes(5), True)]
+
+
+async def test_command_waits_for_the_poll_connection(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """Commands share the locked connection instead of opening a second one."""
+    client = FakeClient()
+    coordinator._client = client
+
+    async with coordinator._lock:
+        task = asyncio.ensure_future(coordinator._send_command(b"\x7b\x7d"))
+        await asyncio.sleep(0)
+        assert client.writes == []
+    await task
+    assert client.writes == [(b"\x7b\x7d", False)]
+
+
+async def test_command_respects_open_breaker(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """An open breaker fails commands without connecting."""
+    connect = AsyncMock()
+    coordinator._async_establish_connection = connect
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        coordinator.breaker.record_failure(time.monotonic())
+
+    with pytest.raises(UpdateFailed):
+        await coordinator._send_command(b"\x7b\x7d")
+    connect.assert_not_called()
+
+
+async def test_adopted_client_is_rebound(
+    hass: HomeAssistant, mock_entry: MockConfigEntry, coordinator: HTRAMDataUpdateCoordinator
+) -> None:
+    """A reloaded coordinator takes over the parked client and its disconnect callback."""
+    client = FakeClient()
+    coordinator._client = client
+    await coordinator.async_shutdown(handover=True)
+    # The config entry calls async_shutdown again on unload
+    await coordinator.async_shutdown()
+    assert client.is_connected
+
+    reloaded = HTRAMDataUpdateCoordinator(hass, coordinator.ble_device, mock_entry)
+    assert await reloaded._async_get_client() is client
+    assert client.disconnected_callback == reloaded._on_disconnected
+    await reloaded.async_shutdown()
+    assert not client.is_connected
+
+
+async def test_open_hour_stored_on_shutdown(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_entry: MockConfigEntry
+) -> None:
+    """Unloading stores the partial hour instead of importing it."""
+    hass.config_entries.async_update_entry(mock_entry, options={CONF_STATISTICS_IMPORT: True})
+    coordinator = HTRAMDataUpdateCoordinator(hass, BLEDevice(ADDRESS, "HTRAM", {}), mock_entry)
+    with patch.object(coordinator, "_import_statistics") as import_statistics:
+        coordinator._update_buckets(time.monotonic(), {"co2": 800})
+        await coordinator.async_shutdown()
+        await coordinator.async_shutdown()
+    import_statistics.assert_not_called()
+    stored = hass_storage["htram.buckets.aabbccddeeff"]["data"]
+    assert stored["bucket"] == {"co2": [800, 800, 800, 1]}
+
+    reloaded = HTRAMDataUpdateCoordinator(hass, BLEDevice(ADDRESS, "HTRAM", {}), mock_entry)
+    await reloaded.async_load_buckets()
+    assert reloaded.buckets.as_dict() == stored
+    await reloaded.async_shutdown()
+
+
+async def test_burst_serves_realtime_and_rejects_the_rest(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """Reads and commands do not wait for a running burst to release the connection."""
+    connect = AsyncMock()
+    coordinator._async_establish_connection = connect
+    coordinator._burst_task = asyncio.get_running_loop().create_future()
+
+    async with asyncio.timeout(1):
+        await coordinator.async_fetch({PART_REALTIME}, 0)
+        with pytest.raises(UpdateFailed, match="Burst sampling"):
+            await coordinator.async_fetch({PART_REALTIME, PART_SETTINGS}, 0)
+        with pytest.raises(UpdateFailed, match="Burst sampling"):
+            await coordinator._send_command(b"\x7b\x7d")
+    connect.assert_not_called()
+    coordinator._burst_task.cancel()
+
+
+async def test_history_sync_respects_breaker_and_burst(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """A history download is not attempted while the device is backed off or sampled."""
+    connect = AsyncMock()
+    coordinator._async_establish_connection = connect
+
+    coordinator._burst_task = asyncio.get_running_loop().create_future()
+    async with asyncio.timeout(1):
+        assert (await coordinator.async_sync_history())["status"] == "unavailable"
+    coordinator._burst_task.cancel()
+
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        coordinator.breaker.record_failure(time.monotonic())
+    assert (await coordinator.async_sync_history())["status"] == "unavailable"
+    connect.assert_not_called()
+
+
+async def test_history_sync_failure_counts_for_the_breaker(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """A failed download is recorded like a failed poll."""
+    coordinator._async_get_client = AsyncMock(side_effect=BleakError("gone"))
+    with patch(
+        "custom_components.htram.coordinator.history.async_get_resume_time",
+        AsyncMock(return_value=datetime(2024, 1, 1, tzinfo=UTC)),
+    ):
+        assert (await coordinator.async_sync_history())["status"] == "error"
+    assert coordinator.breaker.failures == 1
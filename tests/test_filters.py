@@ -0,0 +1,37 @@
+"""Tests for significant-change filtering."""
+from custom_components.htram.filters import DeadbandFilter, crosses_threshold
+
+
+def test_small_changes_are_held_back() -> None:
+    """Readings within the deadband keep the published value."""
+    deadband = DeadbandFilter(deadband=20, max_silence=900)
+    assert deadband.update(800, 0) == 800
+    assert deadband.update(815, 60) == 800
+    assert deadband.update(790, 120) == 800
+    assert deadband.update(820, 180) == 820
+
+
+def test_max_silence_republishes() -> None:
+    """A drifting value is published once max_silence has passed."""
+    deadband = DeadbandFilter(deadband=20, max_silence=900)
+    deadband.update(800, 0)
+    assert deadband.update(810, 899) == 800
+    assert deadband.update(810, 900) == 810
+
+
+def test_force_and_none() -> None:
+    """Forced readings and missing values always pass."""
+    deadband = DeadbandFilter(deadband=20, max_silence=900)
+    deadband.update(800, 0)
+    assert deadband.update(801, 1, force=True) == 801
+    assert deadband.update(None, 2) is None
+    assert deadband.update(802, 3) == 802
+
+
+def test_crosses_threshold() -> None:
+    """A threshold between old and new values is detected."""
+    assert crosses_threshold(790, 805, [800, 1000])
+    assert crosses_threshold(1005, 990, [800, 1000])
+    assert not crosses_threshold(810, 990, [800, 1000])
+    assert not crosses_threshold(None, 900, [800])
+    assert not crosses_threshold(790, 805, [None])
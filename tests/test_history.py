@@ -0,0 +1,97 @@
+"""Tests for the history download."""
+from datetime import UTC, datetime
+
+import pytest
+
+from custom_components.htram.history import HistoryStream, build_history_request, decode_chunks
+from custom_components.htram.utils import CRC16
+
+SINCE = datetime(2024, 1, 1, 10, 0, tzinfo=UTC)
+
+
+def _record(when: datetime, co2: int, temperature: int, humidity: int) -> bytes:
+    return bytes(
+        [when.year % 100, when.month, when.day, when.hour, when.minute, when.second]
+    ) + co2.to_bytes(2, "big") + bytes([temperature & 0xFF, humidity])
+
+
+def _chunk(sequence: int, records: list[bytes]) -> bytes:
+    frame = bytearray([0x7B, 0x41, 0x00, 0x00, 0x41, 0x46, sequence, len(records)])
+    frame += b"".join(records) + b"\x00\x00\x7D"
+    frame[2:4] = (len(frame) - 4).to_bytes(2, "big")
+    return bytes(frame)
+
+
+def _feed_in_pieces(stream: HistoryStream, frame: bytes, size: int = 20) -> None:
+    """Split a frame like notifications at the default MTU."""
+    for offset in range(0, len(frame), size):
+        stream.feed(frame[offset:offset + size])
+
+
+def test_request_carries_the_frame_crc() -> None:
+    """The request is framed like the other commands."""
+    request = build_history_request(SINCE)
+    assert request[4:6] == b"\x40\x46"
+    assert request[3] == len(request) - 4
+    assert CRC16.crc16_bytes(request[:-3]) == request[-3:-1]
+
+
+async def test_chunks_reassembled_until_end_marker() -> None:
+    """Chunks split across notifications are rebuilt and collected in order."""
+    stream = HistoryStream()
+    first = _chunk(0, [_record(SINCE, 800, 21, 40)] * 3)
+    second = _chunk(1, [_record(SINCE, 900, 22, 41)])
+    # Other responses arriving meanwhile are ignored
+    stream.feed(bytes.fromhex("7b41000c4144010320152d030000007d"))
+    _feed_in_pieces(stream, first)
+    _feed_in_pieces(stream, second + _chunk(2, []))
+
+    chunks, complete = await stream.async_collect(0.1)
+    assert complete
+    assert chunks == [first, second]
+
+
+async def test_sequence_gap_ends_download() -> None:
+    """A missing chunk keeps what came before it and reports an incomplete download."""
+    stream = HistoryStream()
+    first = _chunk(0, [_record(SINCE, 800, 21, 40)])
+    stream.feed(first)
+    stream.feed(_chunk(2, [_record(SINCE, 900, 22, 41)]))
+
+    assert await stream.async_collect(0.1) == ([first], False)
+
+
+async def test_silent_device_ends_download() -> None:
+    """A chunk that never arrives times out instead of waiting forever."""
+    stream = HistoryStream()
+    first = _chunk(0, [_record(SINCE, 800, 21, 40)])
+    stream.feed(first)
+    # Only the start of the next chunk arrives
+    stream.feed(_chunk(1, [_record(SINCE, 900, 22, 41)])[:12])
+
+    assert await stream.async_collect(0.05) == ([first], False)
+
+
+def test_decode_aggregates_hours() -> None:
+    """Records are rolled up per hour; older and invalid records are skipped."""
+    chunks = [
+        _chunk(0, [
+            _record(datetime(2024, 1, 1, 9, 59, tzinfo=UTC), 2000, 25, 50),
+            _record(datetime(2024, 1, 1, 10, 0, tzinfo=UTC), 800, 20, 40),
+            _record(datetime(2024, 1, 1, 10, 30, tzinfo=UTC), 1000, -2, 42),
+        ]),
+        _chunk(1, [
+            bytes(10),
+            _record(datetime(2024, 1, 1, 11, 5, tzinfo=UTC), 600, 19, 45),
+        ]),
+    ]
+
+    statistics, used, newest = decode_chunks(chunks, SINCE)
+    assert used == 3
+    assert newest == datetime(2024, 1, 1, 11, 5, tzinfo=UTC)
+    assert statistics["co2"] == [
+        {"start": SINCE, "mean": 900, "min": 800, "max": 1000},
+        {"start": datetime(2024, 1, 1, 11, 0, tzinfo=UTC), "mean": 600, "min": 600, "max": 600},
+    ]
+    assert statistics["temperature"][0] == {"start": SINCE, "mean": 9, "min": -2, "max": 20}
+    assert statistics["humidity"][0]["mean"] == pytest.approx(41)
@@ -0,0 +1,35 @@
+"""Tests for setting up a HTRAM device."""
+from unittest.mock import AsyncMock, patch
+
+from bleak.backends.device import BLEDevice
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import async_get_platforms
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.htram.const import DOMAIN
+
+from .conftest import ADDRESS
+
+
+@pytest.mark.usefixtures("mock_bluetooth")
+async def test_setup_adds_all_platforms(hass: HomeAssistant, mock_entry: MockConfigEntry) -> None:
+    """Every platform is set up and its entities share the coordinator's device info."""
+    with patch(
+        "custom_components.htram.bluetooth.async_ble_device_from_address",
+        return_value=BLEDevice(ADDRESS, "HTRAM", {}),
+    ), patch(
+        "custom_components.htram.coordinator.HTRAMDataUpdateCoordinator._async_update_data",
+        AsyncMock(return_value={"co2": 800, "charging": True}),
+    ):
+        assert await hass.config_entries.async_setup(mock_entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][mock_entry.entry_id]
+    platforms = async_get_platforms(hass, DOMAIN)
+    assert Platform.BINARY_SENSOR in {platform.domain for platform in platforms}
+    entities = [entity for platform in platforms for entity in platform.entities.values()]
+    assert all(entity.device_info is coordinator.device_info for entity in entities)
+
+    assert await hass.config_entries.async_unload(mock_entry.entry_id)
@@ -0,0 +1,52 @@
+"""Tests for CO2 level tracking."""
+from custom_components.htram.const import CO2_LEVEL_ALARM, CO2_LEVEL_GOOD, CO2_LEVEL_WARNING
+from custom_components.htram.levels import CO2LevelTracker
+
+
+def test_first_reading_is_not_a_transition() -> None:
+    """The initial level is set without reporting a change."""
+    tracker = CO2LevelTracker(hysteresis=50, dwell=0)
+    assert tracker.update(0, 1200, 800, 1000) is None
+    assert tracker.level == CO2_LEVEL_ALARM
+
+
+def test_hysteresis_on_the_way_down() -> None:
+    """Leaving a level downwards requires falling below threshold minus hysteresis."""
+    tracker = CO2LevelTracker(hysteresis=50, dwell=0)
+    tracker.update(0, 700, 800, 1000)
+    assert tracker.update(1, 820, 800, 1000) == (CO2_LEVEL_GOOD, CO2_LEVEL_WARNING)
+
+    # Within the hysteresis band the level is kept
+    assert tracker.update(2, 780, 800, 1000) is None
+    assert tracker.level == CO2_LEVEL_WARNING
+
+    assert tracker.update(3, 749, 800, 1000) == (CO2_LEVEL_WARNING, CO2_LEVEL_GOOD)
+
+
+def test_rising_uses_plain_threshold() -> None:
+    """Entering a higher level happens at the threshold itself."""
+    tracker = CO2LevelTracker(hysteresis=50, dwell=0)
+    tracker.update(0, 900, 800, 1000)
+    assert tracker.update(1, 999, 800, 1000) is None
+    assert tracker.update(2, 1000, 800, 1000) == (CO2_LEVEL_WARNING, CO2_LEVEL_ALARM)
+
+
+def test_dwell_delays_transition() -> None:
+    """A new level is only committed after it was seen for the dwell time."""
+    tracker = CO2LevelTracker(hysteresis=0, dwell=60)
+    tracker.update(0, 700, 800, 1000)
+
+    assert tracker.update(10, 900, 800, 1000) is None
+    assert tracker.update(40, 900, 800, 1000) is None
+    assert tracker.update(70, 900, 800, 1000) == (CO2_LEVEL_GOOD, CO2_LEVEL_WARNING)
+
+
+def test_dwell_restarts_when_reading_returns() -> None:
+    """A reading back at the current level cancels the pending transition."""
+    tracker = CO2LevelTracker(hysteresis=0, dwell=60)
+    tracker.update(0, 700, 800, 1000)
+    tracker.update(10, 900, 800, 1000)
+    tracker.update(30, 700, 800, 1000)
+
+    assert tracker.update(80, 900, 800, 1000) is None
+    assert tracker.update(140, 900, 800, 1000) == (CO2_LEVEL_GOOD, CO2_LEVEL_WARNING)
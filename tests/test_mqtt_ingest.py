@@ -0,0 +1,86 @@
+"""Tests for the MQTT ingest transport."""
+import base64
+from types import SimpleNamespace
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from homeassistant.core import HomeAssistant
+
+from custom_components.htram.mqtt_ingest import HTRAMMqttIngest
+
+KEY = b"0123456789abcdef"
+IV = b"fedcba9876543210"
+TOPIC = "htram/aabbccddeeff/data"
+# Realtime frame: CO2 800 ppm, 21 °C, 45 %, 3 bars, not charging
+FRAME = bytes.fromhex("7b41000d4144010320152d030000007d")
+
+
+def _encrypt(data: bytes) -> bytes:
+    padder = padding.PKCS7(128).padder()
+    padded = padder.update(data) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(KEY), modes.CBC(IV)).encryptor()
+    return encryptor.update(padded) + encryptor.finalize()
+
+
+class FakeBroker:
+    """Stand-in for mqtt.async_subscribe delivering payloads to the subscriber."""
+
+    def __init__(self) -> None:
+        self.callbacks = {}
+
+    async def subscribe(self, hass, topic, msg_callback, qos=0, encoding="utf-8"):
+        assert encoding is None
+        self.callbacks[topic] = msg_callback
+        return lambda: self.callbacks.pop(topic)
+
+    def publish(self, topic: str, payload: bytes) -> None:
+        self.callbacks[topic](SimpleNamespace(topic=topic, payload=payload))
+
+
+async def _start(hass: HomeAssistant) -> tuple[HTRAMMqttIngest, FakeBroker, list[bytes]]:
+    broker = FakeBroker()
+    frames: list[bytes] = []
+    ingest = HTRAMMqttIngest(hass, TOPIC, KEY, IV, frames.append, subscribe=broker.subscribe)
+    assert await ingest.async_start()
+    return ingest, broker, frames
+
+
+async def test_raw_and_base64_payloads(hass: HomeAssistant) -> None:
+    """Raw ciphertext and its Base64 text decrypt to the same frame."""
+    ingest, broker, frames = await _start(hass)
+
+    broker.publish(TOPIC, _encrypt(FRAME))
+    broker.publish(TOPIC, base64.b64encode(_encrypt(FRAME)))
+    assert frames == [FRAME, FRAME]
+    assert ingest.frames == 2
+    assert ingest.errors == 0
+
+
+async def test_base64_of_whole_blocks(hass: HomeAssistant) -> None:
+    """Base64 text whose length is a multiple of 16 is still decoded."""
+    ingest, broker, frames = await _start(hass)
+    # 40 byte frame -> 48 byte ciphertext -> 64 Base64 characters
+    frame = b"\x7b" + bytes(38) + b"\x7d"
+    payload = base64.b64encode(_encrypt(frame))
+    assert len(payload) % 16 == 0
+
+    broker.publish(TOPIC, payload)
+    assert frames == [frame]
+
+
+async def test_plain_and_undecryptable_payloads(hass: HomeAssistant) -> None:
+    """Unencrypted frames and garbage are counted as errors and dropped."""
+    ingest, broker, frames = await _start(hass)
+
+    broker.publish(TOPIC, FRAME)
+    broker.publish(TOPIC, b"hello")
+    broker.publish(TOPIC, _encrypt(b"not a frame"))
+    assert frames == []
+    assert ingest.errors == 3
+
+
+async def test_stop_unsubscribes(hass: HomeAssistant) -> None:
+    """Stopping removes the subscription."""
+    ingest, broker, _ = await _start(hass)
+    ingest.async_stop()
+    assert broker.callbacks == {}
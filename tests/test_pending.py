@@ -0,0 +1,64 @@
+"""Tests for the pending setting writes queue."""
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.htram.const import PENDING_MAX_ATTEMPTS
+from custom_components.htram.pending import PendingWrites
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+STORAGE_KEY = "htram.pending.aabbccddeeff"
+
+
+async def test_later_write_replaces_earlier(hass: HomeAssistant) -> None:
+    """One value is queued per field."""
+    pending = PendingWrites(hass, ADDRESS)
+    pending.set("mute", True)
+    pending.set("mute", False)
+    pending.set("alarm_low", 600)
+    assert pending.values == {"mute": False, "alarm_low": 600}
+
+
+async def test_confirm_only_matching_value(hass: HomeAssistant) -> None:
+    """A confirmation of a replaced value keeps the newer write."""
+    pending = PendingWrites(hass, ADDRESS)
+    pending.set("mute", True)
+    pending.confirm("mute", False)
+    assert pending.values == {"mute": True}
+    pending.confirm("mute", True)
+    assert not pending
+
+
+async def test_gives_up_after_max_attempts(hass: HomeAssistant) -> None:
+    """Writes the device keeps refusing are dropped."""
+    pending = PendingWrites(hass, ADDRESS)
+    pending.set("alarm_low", 600)
+    for _ in range(PENDING_MAX_ATTEMPTS - 1):
+        pending.attempted({"alarm_low": 600})
+    assert pending.values == {"alarm_low": 600}
+    pending.attempted({"alarm_low": 600})
+    assert not pending
+
+
+async def test_attempt_of_replaced_value_is_not_counted(hass: HomeAssistant) -> None:
+    """A value replaced while it was written starts with no attempts."""
+    pending = PendingWrites(hass, ADDRESS)
+    pending.set("alarm_low", 600)
+    pending.set("alarm_low", 700)
+    pending.attempted({"alarm_low": 600})
+    assert pending.as_dict() == {"alarm_low": {"value": 700, "attempts": 0}}
+
+
+async def test_persisted_across_instances(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    """A new queue (after a restart or reload) loads the saved writes."""
+    pending = PendingWrites(hass, ADDRESS)
+    pending.set("screen_off", 120)
+    await pending.async_save()
+    assert hass_storage[STORAGE_KEY]["data"] == {"writes": {"screen_off": {"value": 120, "attempts": 0}}}
+
+    loaded = PendingWrites(hass, ADDRESS)
+    await loaded.async_load()
+    assert loaded.values == {"screen_off": 120}
+
+    await loaded.async_remove()
+    assert STORAGE_KEY not in hass_storage
@@ -0,0 +1,41 @@
+"""Tests for the capture replay harness."""
+from pathlib import Path
+from typing import Any
+
+from homeassistant.const import CONF_ADDRESS
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+
+from custom_components.htram.capture import DIRECTION_CONNECT, DIRECTION_RX, DIRECTION_TX
+from custom_components.htram.const import CMD_GET_REALTIME, CMD_HEARTBEAT, DOMAIN
+
+from . import replay
+from .conftest import ADDRESS
+
+# Realtime frame: CO2 800 ppm, 21 °C, 45 %, 3 bars, not charging
+REALTIME = bytes.fromhex("7b41000d4144010320152d030000007d")
+
+
+def test_replay_answers_polls_from_capture(tmp_path: Path, hass_storage: dict[str, Any]) -> None:
+    """A captured poll is replayed without touching the device's stores."""
+    path = str(tmp_path / "capture.htrc")
+    replay.write_capture(path, ADDRESS, [
+        (0.0, DIRECTION_CONNECT, b""),
+        (1.0, DIRECTION_TX, CMD_HEARTBEAT),
+        (1.5, DIRECTION_TX, CMD_GET_REALTIME),
+        (1.6, DIRECTION_RX, REALTIME),
+    ])
+
+    async def main() -> replay.ReplayReport:
+        async with async_test_home_assistant() as hass:
+            entry = MockConfigEntry(domain=DOMAIN, unique_id=ADDRESS, data={CONF_ADDRESS: ADDRESS})
+            entry.add_to_hass(hass)
+            report = await replay.async_replay(hass, entry, path)
+            await hass.async_stop(force=True)
+        return report
+
+    report = replay.run(main)
+
+    assert report.cycles == 1
+    assert report.failures == 0
+    assert report.matched == 2
+    assert not [key for key in hass_storage if key.startswith(DOMAIN)]
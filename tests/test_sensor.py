@@ -0,0 +1,21 @@
+"""Tests for the sensor descriptions."""
+import time
+
+from custom_components.htram.coordinator import HTRAMDataUpdateCoordinator
+from custom_components.htram.sensor import DERIVED_SENSORS, SENSORS
+
+
+def test_measurements_have_no_changing_attributes() -> None:
+    """Measurement states are only rewritten when a reading changes."""
+    for description in (*SENSORS, *DERIVED_SENSORS):
+        if description.device_class is not None and description.entity_category is None:
+            assert description.attributes_fn is None, description.key
+
+
+async def test_last_reading_age(coordinator: HTRAMDataUpdateCoordinator) -> None:
+    """The reading age is its own diagnostic sensor."""
+    description = next(d for d in SENSORS if d.key == "last_reading_age")
+    assert description.value_fn(coordinator) is None
+
+    coordinator._realtime_at = time.monotonic() - 12.4
+    assert description.value_fn(coordinator) == 12
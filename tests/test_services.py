@@ -0,0 +1,188 @@
+"""Tests for the HTRAM services."""
+import asyncio
+import cProfile
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+from bleak.exc import BleakError
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+
+from custom_components.htram.capture import DIRECTION_CONNECT, DIRECTION_RX, DIRECTION_TX
+from custom_components.htram.const import CMD_GET_REALTIME, CMD_HEARTBEAT, DOMAIN
+from custom_components.htram.services import (
+    SERVICE_CONFIGURE_DEVICE,
+    SERVICE_PROFILE,
+    SERVICE_SYNC_HISTORY,
+    async_setup_services,
+)
+
+from . import replay
+from .conftest import ADDRESS
+
+# Realtime frame: CO2 800 ppm, 21 °C, 45 %, 3 bars, not charging
+REALTIME = bytes.fromhex("7b41000d4144010320152d030000007d")
+
+
+def _device(address: str, error: Exception | None = None) -> SimpleNamespace:
+    async def async_provision_wifi(ssid: str, password: str) -> None:
+        if error is not None:
+            raise error
+
+    return SimpleNamespace(address=address, async_provision_wifi=async_provision_wifi)
+
+
+async def test_configure_device_reports_each_device(hass: HomeAssistant) -> None:
+    """A failing device does not discard the results of the others."""
+    hass.data[DOMAIN] = {
+        "ok": _device("AA:AA:AA:AA:AA:01"),
+        "bleak": _device("AA:AA:AA:AA:AA:02", BleakError("gone")),
+        "broken": _device("AA:AA:AA:AA:AA:03", KeyError("aes_key")),
+    }
+    async_setup_services(hass)
+
+    with patch(
+        "custom_components.htram.services.async_extract_config_entry_ids",
+        return_value={"ok", "bleak", "broken"},
+    ):
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_CONFIGURE_DEVICE,
+            {"device_id": ["device"], "ssid": "home", "password": "secret"},
+            blocking=True,
+            return_response=True,
+        )
+
+    results = response["results"]
+    assert results["AA:AA:AA:AA:AA:01"] == {"status": "success"}
+    assert results["AA:AA:AA:AA:AA:02"] == {"status": "error", "error": "gone"}
+    assert results["AA:AA:AA:AA:AA:03"]["status"] == "error"
+
+
+async def test_sync_history_refused_without_backfill_option(hass: HomeAssistant) -> None:
+    """The unverified history request is only sent to devices that opted in."""
+    download = AsyncMock(return_value={"status": "success"})
+    hass.data[DOMAIN] = {
+        "on": SimpleNamespace(
+            address="AA:AA:AA:AA:AA:01", history_backfill=True, entry=SimpleNamespace(title="Office"),
+            async_sync_history=download,
+        ),
+        "off": SimpleNamespace(
+            address="AA:AA:AA:AA:AA:02", history_backfill=False, entry=SimpleNamespace(title="Bedroom"),
+            async_sync_history=download,
+        ),
+    }
+    async_setup_services(hass)
+
+    with (
+        patch("custom_components.htram.services.async_extract_config_entry_ids", return_value={"on", "off"}),
+        pytest.raises(HomeAssistantError, match="Bedroom"),
+    ):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_SYNC_HISTORY, {"device_id": ["device"]}, blocking=True, return_response=True
+        )
+    download.assert_not_called()
+
+    with patch("custom_components.htram.services.async_extract_config_entry_ids", return_value={"on"}):
+        response = await hass.services.async_call(
+            DOMAIN, SERVICE_SYNC_HISTORY, {"device_id": ["device"]}, blocking=True, return_response=True
+        )
+    assert response == {"results": {"AA:AA:AA:AA:AA:01": {"status": "success"}}}
+
+
+def _write_polls(tmp_path: Path, cycles: int) -> str:
+    """Write a capture of realtime polls a minute apart."""
+    records = [(0.0, DIRECTION_CONNECT, b"")]
+    for cycle in range(cycles):
+        start = 1.0 + cycle * 60
+        records += [
+            (start, DIRECTION_TX, CMD_HEARTBEAT),
+            (start + 0.5, DIRECTION_TX, CMD_GET_REALTIME),
+            (start + 0.6, DIRECTION_RX, REALTIME),
+        ]
+    path = str(tmp_path / "capture.htrc")
+    replay.write_capture(path, ADDRESS, records)
+    return path
+
+
+def test_profile_replayed_cycles(tmp_path: Path, hass_storage: dict[str, Any]) -> None:
+    """A profile writes its stats, restores the loop and excludes a second one."""
+    path = _write_polls(tmp_path, 4)
+
+    async def main() -> tuple[dict[str, Any], bool]:
+        async with async_test_home_assistant(config_dir=str(tmp_path)) as hass:
+            entry = MockConfigEntry(domain=DOMAIN, unique_id=ADDRESS, data={CONF_ADDRESS: ADDRESS})
+            entry.add_to_hass(hass)
+            async_setup_services(hass)
+            debug = hass.loop.get_debug()
+
+            replaying = hass.async_create_task(replay.async_replay(hass, entry, path))
+            await asyncio.sleep(0)
+            with patch(
+                "custom_components.htram.services.async_extract_config_entry_ids", return_value={entry.entry_id}
+            ):
+                profiling = hass.async_create_task(
+                    hass.services.async_call(
+                        DOMAIN, SERVICE_PROFILE, {"device_id": ["device"], "cycles": 2},
+                        blocking=True, return_response=True,
+                    )
+                )
+                await asyncio.sleep(0)
+                with pytest.raises(HomeAssistantError, match="A profile is already running"):
+                    await hass.services.async_call(
+                        DOMAIN, SERVICE_PROFILE, {"device_id": ["device"]}, blocking=True, return_response=True
+                    )
+                response = await profiling
+                restored = hass.loop.get_debug() == debug
+            await replaying
+            await hass.async_stop(force=True)
+        return response, restored
+
+    response, restored = replay.run(main)
+
+    assert restored
+    assert os.path.getsize(response["path"]) > 0
+    assert response["path"].startswith(str(tmp_path))
+    assert len(response["cycle_seconds"][ADDRESS]) == 2
+
+
+def test_profile_reports_busy_profiler(tmp_path: Path, hass_storage: dict[str, Any]) -> None:
+    """Another active profiler fails the call instead of returning an empty profile."""
+    path = _write_polls(tmp_path, 3)
+
+    async def main() -> None:
+        async with async_test_home_assistant(config_dir=str(tmp_path)) as hass:
+            entry = MockConfigEntry(domain=DOMAIN, unique_id=ADDRESS, data={CONF_ADDRESS: ADDRESS})
+            entry.add_to_hass(hass)
+            async_setup_services(hass)
+
+            replaying = hass.async_create_task(replay.async_replay(hass, entry, path))
+            await asyncio.sleep(0)
+            other = cProfile.Profile()
+            other.enable()
+            try:
+                with (
+                    patch(
+                        "custom_components.htram.services.async_extract_config_entry_ids",
+                        return_value={entry.entry_id},
+                    ),
+                    pytest.raises(HomeAssistantError, match="Could not profile"),
+                ):
+                    await hass.services.async_call(
+                        DOMAIN, SERVICE_PROFILE, {"device_id": ["device"]}, blocking=True, return_response=True
+                    )
+            finally:
+                other.disable()
+            assert hass.data[DOMAIN][entry.entry_id].profiler is None
+            await replaying
+            await hass.async_stop(force=True)
+
+    replay.run(main)
+
+    assert not os.path.exists(tmp_path / "htram_profiles")
@@ -0,0 +1,47 @@
+"""Tests for connection source scoring."""
+from custom_components.htram.sources import DEMOTE_SECONDS, SourceScorer
+
+
+def test_stronger_signal_scores_higher() -> None:
+    """Without history, RSSI decides."""
+    scorer = SourceScorer()
+    assert scorer.score("proxy-a", -60, None, 0) > scorer.score("proxy-b", -80, None, 0)
+
+
+def test_unreliable_source_is_demoted() -> None:
+    """Repeated failures demote a source below a weaker reliable one."""
+    scorer = SourceScorer()
+    for _ in range(3):
+        scorer.record("proxy-a", False, None, 0)
+    scorer.record("proxy-b", True, 1.0, 0)
+
+    assert scorer.score("proxy-a", -50, None, 1) < scorer.score("proxy-b", -90, None, 1)
+    # The demotion expires
+    assert scorer.score("proxy-a", -50, None, DEMOTE_SECONDS + 1) > scorer.score(
+        "proxy-b", -90, None, DEMOTE_SECONDS + 1
+    )
+
+
+def test_slow_connects_and_full_slots_lower_score() -> None:
+    """Connect time and a lack of free slots count against a source."""
+    scorer = SourceScorer()
+    scorer.record("slow", True, 8.0, 0)
+    scorer.record("fast", True, 0.5, 0)
+    assert scorer.score("fast", -70, None, 0) > scorer.score("slow", -70, None, 0)
+    assert scorer.score("fast", -70, 0, 0) < scorer.score("fast", -70, 2, 0)
+
+
+def test_unknown_source_is_not_recorded() -> None:
+    """Attempts without a known source are ignored."""
+    scorer = SourceScorer()
+    scorer.record(None, False, None, 0)
+    assert scorer.as_dict(0) == {}
+
+
+def test_as_dict() -> None:
+    """Diagnostics contain the rounded history."""
+    scorer = SourceScorer()
+    scorer.record("proxy-a", True, 1.234, 0)
+    assert scorer.as_dict(0) == {
+        "proxy-a": {"attempts": 1, "success_rate": 1.0, "rtt": 1.23, "demoted_for": 0}
+    }
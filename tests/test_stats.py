@@ -0,0 +1,67 @@
+"""Tests for rolling statistics."""
+import math
+
+import pytest
+
+from custom_components.htram.stats import RollingStats
+
+
+def test_average_and_peak_over_window() -> None:
+    """Samples older than the window no longer count."""
+    stats = RollingStats(window=900, min_interval=1, outdoor_co2=420)
+    stats.add(0, 1200, 1000)
+    stats.add(60, 800, 1000)
+    stats.add(120, 1000, 1000)
+    assert stats.average == 1000
+    assert stats.peak == 1200
+
+    stats.add(901, 700, 1000)
+    assert stats.average == pytest.approx((800 + 1000 + 700) / 3)
+    assert stats.peak == 1000
+
+
+def test_empty() -> None:
+    """Without samples there is nothing to report."""
+    stats = RollingStats(window=900, min_interval=1, outdoor_co2=420)
+    assert stats.average is None
+    assert stats.peak is None
+    assert stats.rate is None
+    assert stats.air_change_rate is None
+    assert stats.time_above_high == 0
+
+
+def test_rate_and_time_above_high() -> None:
+    """Rate is ppm per minute across the window; time above high is in minutes."""
+    stats = RollingStats(window=900, min_interval=1, outdoor_co2=420)
+    stats.add(0, 800, 1000)
+    stats.add(60, 1100, 1000)
+    stats.add(180, 1400, 1000)
+    assert stats.rate == pytest.approx(200)
+    # The durations since the previous sample count for samples above the alarm
+    assert stats.time_above_high == pytest.approx(3)
+
+
+def test_air_change_rate_from_decay() -> None:
+    """Falling CO2 gives the air changes per hour of the tracer gas decay."""
+    stats = RollingStats(window=3600, min_interval=1, outdoor_co2=420)
+    stats.add(0, 1420, None)
+    stats.add(1800, 920, None)
+    assert stats.air_change_rate == pytest.approx(math.log(1000 / 500) / 0.5)
+
+    # Rising above the start is not a decay
+    stats.add(2400, 1500, None)
+    assert stats.air_change_rate is None
+
+
+def test_fast_readings_keep_the_whole_window() -> None:
+    """Sub-second readings are thinned instead of shrinking the window."""
+    stats = RollingStats(window=900, min_interval=1, outdoor_co2=420)
+    stats.add(0, 2000, None)
+    for step in range(1, 4000):
+        stats.add(step * 0.2, 800, None)
+
+    # 800 s of readings, so the first one is still in the window
+    assert stats.peak == 2000
+    assert len(stats._samples) == 800
+    stats.add(901, 800, None)
+    assert stats.peak == 800
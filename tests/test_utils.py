@@ -0,0 +1,42 @@
+"""Tests for the protocol helpers."""
+import pytest
+
+from custom_components.htram.const import (
+    CMD_GET_REALTIME,
+    CMD_GET_SOUND_STATUS,
+    CMD_GET_TEMP_UNIT,
+    CMD_HEARTBEAT,
+    CMD_SET_SOUND_OFF,
+    CMD_SET_SOUND_ON,
+    CMD_SET_TEMP_UNIT_C,
+    CMD_SET_TEMP_UNIT_F,
+)
+from custom_components.htram.utils import CRC16, decode_aes_key
+
+
+def test_decode_aes_key_base64() -> None:
+    """Keys are Base64 like in the app."""
+    assert decode_aes_key("MTIzNDU2Nzg5MGFiY2RlZg==") == b"1234567890abcdef"
+
+
+def test_decode_aes_key_falls_back_to_raw() -> None:
+    """A key that is not Base64 is used as is."""
+    assert decode_aes_key("not base64!") == b"not base64!"
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        CMD_GET_REALTIME,
+        CMD_HEARTBEAT,
+        CMD_GET_SOUND_STATUS,
+        CMD_SET_SOUND_OFF,
+        CMD_SET_SOUND_ON,
+        CMD_GET_TEMP_UNIT,
+        CMD_SET_TEMP_UNIT_C,
+        CMD_SET_TEMP_UNIT_F,
+    ],
+)
+def test_crc_matches_captured_frames(frame: bytes) -> None:
+    """Frames built at runtime get the checksum the captured frames carry."""
+    assert CRC16.crc16_bytes(frame[:-3]) == frame[-3:-1]